@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import database, signals  # noqa: F401
+        from .metrics import instrument_serializers
+        if settings.METRICS_ENABLED:
+            instrument_serializers()
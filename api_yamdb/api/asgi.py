@@ -0,0 +1,197 @@
+"""
+ASGI application for Django 2.2, which has no ASGI handler of its own.
+
+Requests are run by the regular WSGI handler in thread pools, so
+middleware, views and the ORM stay synchronous while the event loop
+holds the waiting connections. Catalog reads (GET and HEAD of titles,
+genres, categories and their reviews and comments) have a pool of
+ASGI_READ_THREADS, everything else one of ASGI_WRITE_THREADS, so writes
+waiting for the database lock can not take the threads of the reads.
+The pools bound the requests, and the database connections, that are
+inside Django at once; the others wait in the event loop without a
+thread. Streaming response bodies are iterated by one pool job, which
+hands the chunks to the event loop through a queue of STREAM_BUFFER.
+"""
+import asyncio
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import django
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+
+CATALOG_READS = re.compile(r'^/api/v1/(titles|genres|categories)(/|$)')
+READ_METHODS = ('GET', 'HEAD')
+# Chunks of a streaming response read ahead of a slow client.
+STREAM_BUFFER = 8
+
+
+def wsgi_environ(scope, body):
+    """The WSGI environ of an ASGI http scope."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        # WSGI strings are bytes decoded as latin-1.
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        environ[name] = (
+            f'{environ[name]},{value}' if name in environ else value
+        )
+    environ.setdefault('CONTENT_LENGTH', str(len(body)))
+    return environ
+
+
+class ASGIHandler:
+
+    def __init__(self):
+        self.wsgi = WSGIHandler()
+        self.reads = ThreadPoolExecutor(
+            settings.ASGI_READ_THREADS, thread_name_prefix='asgi-read'
+        )
+        self.writes = ThreadPoolExecutor(
+            settings.ASGI_WRITE_THREADS, thread_name_prefix='asgi-write'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        else:
+            raise ValueError(f'Неподдерживаемый тип ASGI: {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.reads.shutdown(wait=False)
+                self.writes.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def executor(self, scope):
+        if (
+            scope['method'] in READ_METHODS
+            and CATALOG_READS.match(scope['path'])
+        ):
+            return self.reads
+        return self.writes
+
+    def run(self, environ):
+        """
+        Runs the request in a pool thread. Returns the status, the headers
+        and either the body or, for a streaming response, the response
+        to iterate later.
+        """
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = int(status.split(' ', 1)[0]), headers
+
+        response = self.wsgi(environ, start_response)
+        if getattr(response, 'streaming', False):
+            return (*started, None, response)
+        try:
+            # request_finished closes the database connections of the
+            # thread, so close() runs here and not in the event loop.
+            return (*started, b''.join(response), None)
+        finally:
+            response.close()
+
+    def stream(self, response, chunks, loop, stopped):
+        """
+        Iterates a streaming response and closes it in one pool thread, so
+        the database cursor behind it stays on the thread and connection
+        that opened it. Puts the chunks and then None to the queue, waits
+        while the queue is full.
+        """
+        try:
+            for chunk in response:
+                if stopped.is_set():
+                    break
+                asyncio.run_coroutine_threadsafe(
+                    chunks.put(chunk), loop
+                ).result()
+        finally:
+            response.close()
+            asyncio.run_coroutine_threadsafe(chunks.put(None), loop).result()
+
+    async def http(self, scope, receive, send):
+        body = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        loop = asyncio.get_running_loop()
+        executor = self.executor(scope)
+        status, headers, content, response = await loop.run_in_executor(
+            executor, self.run, wsgi_environ(scope, b''.join(body))
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ],
+        })
+        if response is None:
+            await send({'type': 'http.response.body', 'body': content})
+            return
+        chunks = asyncio.Queue(STREAM_BUFFER)
+        stopped = threading.Event()
+        job = loop.run_in_executor(
+            executor, self.stream, response, chunks, loop, stopped
+        )
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                await send({
+                    'type': 'http.response.body', 'body': chunk,
+                    'more_body': True,
+                })
+            await job
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if not job.done():
+                # The client is gone, unblock the job and let it close
+                # the response.
+                stopped.set()
+                while not chunks.empty():
+                    chunks.get_nowait()
+                await asyncio.wait([job])
+
+
+def get_asgi_application():
+    """The counterpart of django.core.wsgi.get_wsgi_application."""
+    django.setup(set_prefix=False)
+    return ASGIHandler()
@@ -0,0 +1,203 @@
+"""
+JWT authentication that does not load the user row on every request.
+
+The fields the permissions need are cached per user id for a few
+seconds: in a per-process LRU by default, or in a shared Django cache
+when AUTH_USER_CACHE_ALIAS is set. A cache hit gives request.user as a
+User instance with only these fields loaded, the others are deferred and
+loaded together on the first access. Saving or deleting a user drops
+the entry of the cache the process uses: with the per-process LRU the
+other processes keep the old role, a deactivated or deleted user and
+the old token version for up to AUTH_USER_CACHE_TTL seconds.
+
+With AUTH_STATELESS_TOKENS the access token carries these fields itself
+together with the token_version of the user, so only the version is
+looked up (and cached). Bumping the version revokes issued tokens.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from reviews.models import User
+
+CACHED_FIELDS = (
+    'id', 'username', 'role', 'is_staff', 'is_superuser', 'is_active',
+)
+TOKEN_CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+VERSION_CLAIM = 'token_version'
+
+
+class LocalCache:
+    """Thread-safe LRU with a time to live for every entry."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class SharedCache:
+    """The same interface on top of a configured Django cache."""
+
+    def __init__(self, alias, ttl):
+        self.cache = caches[alias]
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.cache.get(self.key(key))
+
+    def set(self, key, value):
+        self.cache.set(self.key(key), value, self.ttl)
+
+    def delete(self, key):
+        self.cache.delete(self.key(key))
+
+    def clear(self):
+        pass
+
+    @staticmethod
+    def key(key):
+        return f'auth-user:{key}'
+
+
+local_cache = LocalCache(
+    settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL
+)
+
+
+def get_user_cache():
+    if settings.AUTH_USER_CACHE_ALIAS:
+        return SharedCache(
+            settings.AUTH_USER_CACHE_ALIAS, settings.AUTH_USER_CACHE_TTL
+        )
+    return local_cache
+
+
+def forget_user(user_id):
+    cache = get_user_cache()
+    cache.delete(f'user:{user_id}')
+    cache.delete(f'version:{user_id}')
+
+
+def token_version(user_id):
+    cache = get_user_cache()
+    version = cache.get(f'version:{user_id}')
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list(
+            'token_version', flat=True
+        ).first()
+        if version is not None:
+            cache.set(f'version:{user_id}', version)
+    return version
+
+
+def revoke_tokens(user):
+    """Makes every stateless token issued to user invalid."""
+    User.objects.filter(pk=user.pk).update(
+        token_version=F('token_version') + 1
+    )
+    user.token_version += 1
+    forget_user(user.pk)
+
+
+def access_token_for(user):
+    token = RefreshToken.for_user(user).access_token
+    if settings.AUTH_STATELESS_TOKENS:
+        for claim in TOKEN_CLAIMS:
+            token[claim] = getattr(user, claim)
+        token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+def cached_user(values):
+    names = [field.attname for field in User._meta.concrete_fields
+             if field.attname in values]
+    return User.from_db(
+        DEFAULT_DB_ALIAS, names, [values[name] for name in names]
+    )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Токен не содержит идентификатор пользователя'
+            )
+        if (settings.AUTH_STATELESS_TOKENS
+                and VERSION_CLAIM in validated_token):
+            return self.get_token_user(user_id, validated_token)
+        cache = get_user_cache()
+        values = cache.get(f'user:{user_id}')
+        if values is not None:
+            user = cached_user(values)
+        else:
+            try:
+                user = User.objects.get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except User.DoesNotExist:
+                raise AuthenticationFailed(
+                    'Пользователь не найден', code='user_not_found'
+                )
+            cache.set(f'user:{user_id}', {
+                name: getattr(user, name) for name in CACHED_FIELDS
+            })
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'Пользователь неактивен', code='user_inactive'
+            )
+        return user
+
+    def get_token_user(self, user_id, validated_token):
+        version = token_version(user_id)
+        if version is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден', code='user_not_found'
+            )
+        if version != validated_token[VERSION_CLAIM]:
+            raise AuthenticationFailed('Токен отозван', code='token_revoked')
+        values = {
+            claim: validated_token.get(claim) for claim in TOKEN_CLAIMS
+        }
+        return cached_user({'id': user_id, 'is_active': True, **values})
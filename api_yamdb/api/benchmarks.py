@@ -0,0 +1,73 @@
+"""Helpers shared by the bench_* management commands."""
+import math
+import os
+import subprocess
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+
+@contextmanager
+def scratch_database(directory):
+    """
+    Runs the block against a fresh test database, so benchmarks never
+    touch the configured one. SQLite files are kept in directory.
+    The connection is switched back to its database afterwards.
+    """
+    settings_dict = connection.settings_dict
+    old_name = settings_dict['NAME']
+    old_test_name = settings_dict['TEST'].get('NAME')
+    if connection.vendor == 'sqlite':
+        settings_dict['TEST']['NAME'] = os.path.join(
+            directory, 'bench.sqlite3'
+        )
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        settings_dict['TEST']['NAME'] = old_test_name
+
+
+def percentile(values, share):
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return None
+    rank = max(math.ceil(share / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(latencies, elapsed):
+    """
+    Latency percentiles in milliseconds and throughput in requests/s,
+    None without latencies.
+    """
+    if not latencies:
+        return None
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+    }
+
+
+def current_commit():
+    """The checked out commit, so results can be compared across commits."""
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+            universal_newlines=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,225 @@
+"""
+Bulk creation for the ingestion endpoints.
+
+Every item is validated on its own and gets its own result: the id of the
+created object or the errors. Slugs, usernames and existing rows are
+looked up with one query per kind (in chunks) for the whole batch, valid
+items are inserted with bulk_create in one transaction. bulk_create does
+not send model signals, so the search index, title statistics and the
+response cache are updated here.
+"""
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+
+from .cache import invalidate, title_scopes
+from .importer import LOOKUP_CHUNK, batched
+from .search import KINDS_BY_MODEL, get_backend
+from reviews.models import Categorу, Genre, GenreTitle, Review, Title, User
+from reviews.stats import rebuild_title_ratings, rebuild_title_scores
+
+
+def lookup(queryset, field, values):
+    """{value: row} for the rows of queryset whose field is in values."""
+    found = {}
+    for chunk in batched(set(values), LOOKUP_CHUNK):
+        found.update(
+            (getattr(row, field), row)
+            for row in queryset.filter(**{f'{field}__in': chunk})
+        )
+    return found
+
+
+def insert(model, objects):
+    """
+    bulk_create that sets primary keys on every database. PostgreSQL
+    returns them, SQLite does not: there the caller's transaction holds
+    the write lock since the insert, so the new rows are the ones with
+    the largest ids, in the order of insertion.
+    """
+    model.objects.bulk_create(objects, batch_size=LOOKUP_CHUNK)
+    if objects and objects[0].pk is None:
+        ids = model.objects.order_by('-pk').values_list('pk', flat=True)
+        for obj, pk in zip(objects, reversed(ids[:len(objects)])):
+            obj.pk = pk
+
+
+class Batch:
+    """Per item results of a bulk request."""
+
+    def __init__(self, serializer_class, items):
+        self.results = [None] * len(items)
+        self.valid = []
+        # Building the fields of a serializer costs more than validating
+        # an item, one instance validates the whole batch.
+        serializer = serializer_class()
+        for index, item in enumerate(items):
+            try:
+                self.valid.append((index, serializer.run_validation(item)))
+            except ValidationError as error:
+                self.fail(index, error.detail)
+
+    def fail(self, index, errors):
+        self.results[index] = {
+            'status': status.HTTP_400_BAD_REQUEST, 'errors': errors
+        }
+
+    def created(self, index, obj):
+        self.results[index] = {'status': status.HTTP_201_CREATED, 'id': obj.pk}
+
+    def accept(self, check):
+        """Keeps the valid items check() returns no errors for."""
+        accepted = []
+        for index, data in self.valid:
+            errors = check(data)
+            if errors:
+                self.fail(index, errors)
+            else:
+                accepted.append((index, data))
+        self.valid = accepted
+
+
+def unique_in_batch(key, message):
+    seen = set()
+
+    def check(data):
+        if key(data) in seen:
+            return {'non_field_errors': [message]}
+        seen.add(key(data))
+        return None
+    return check
+
+
+def create_slugged(model, serializer_class, items, scope):
+    """Categories or genres."""
+    batch = Batch(serializer_class, items)
+    existing = lookup(
+        model.objects.all(), 'slug', [data['slug'] for _, data in batch.valid]
+    )
+    batch.accept(lambda data: data['slug'] in existing and {
+        'slug': ['Объект с таким slug уже существует.']
+    })
+    batch.accept(unique_in_batch(
+        lambda data: data['slug'], 'slug повторяется в запросе.'
+    ))
+    objects = [model(**data) for _, data in batch.valid]
+    with transaction.atomic():
+        insert(model, objects)
+        get_backend().index(KINDS_BY_MODEL[model], objects)
+    for (index, _), obj in zip(batch.valid, objects):
+        batch.created(index, obj)
+    if objects:
+        invalidate(scope)
+    return batch.results
+
+
+def create_titles(serializer_class, items):
+    batch = Batch(serializer_class, items)
+    genres = lookup(Genre.objects.all(), 'slug', [
+        slug for _, data in batch.valid for slug in data['genre']
+    ])
+    categories = lookup(
+        Categorу.objects.all(), 'slug',
+        [data['category'] for _, data in batch.valid]
+    )
+
+    def check(data):
+        errors = {}
+        unknown = [slug for slug in data['genre'] if slug not in genres]
+        if unknown:
+            errors['genre'] = [f'Жанры не найдены: {", ".join(unknown)}.']
+        if data['category'] not in categories:
+            errors['category'] = ['Категория не найдена.']
+        return errors
+    batch.accept(check)
+
+    titles = [
+        Title(
+            name=data['name'], year=data['year'],
+            description=data.get('description'),
+            category=categories[data['category']],
+        )
+        for _, data in batch.valid
+    ]
+    with transaction.atomic():
+        insert(Title, titles)
+        GenreTitle.objects.bulk_create(
+            (
+                GenreTitle(title=title, genre=genres[slug])
+                for title, (_, data) in zip(titles, batch.valid)
+                for slug in dict.fromkeys(data['genre'])
+            ),
+            batch_size=LOOKUP_CHUNK
+        )
+        get_backend().index(KINDS_BY_MODEL[Title], titles)
+    for (index, _), title in zip(batch.valid, titles):
+        batch.created(index, title)
+    if titles:
+        invalidate('titles')
+    return batch.results
+
+
+def create_reviews(serializer_class, items):
+    batch = Batch(serializer_class, items)
+    titles = lookup(
+        Title.objects.only('pk'), 'pk',
+        [data['title'] for _, data in batch.valid]
+    )
+    authors = lookup(
+        User.objects.only('pk', 'username'), 'username',
+        [data['author'] for _, data in batch.valid]
+    )
+
+    def check(data):
+        errors = {}
+        if data['title'] not in titles:
+            errors['title'] = ['Произведение не найдено.']
+        if data['author'] not in authors:
+            errors['author'] = ['Пользователь не найден.']
+        return errors
+    batch.accept(check)
+
+    existing = set()
+    for chunk in batched({data['title'] for _, data in batch.valid},
+                         LOOKUP_CHUNK):
+        existing.update(Review.objects.filter(
+            title_id__in=chunk,
+            author_id__in={authors[data['author']].pk
+                           for _, data in batch.valid},
+        ).values_list('title_id', 'author_id'))
+
+    def key(data):
+        return data['title'], authors[data['author']].pk
+    batch.accept(lambda data: key(data) in existing and {
+        'non_field_errors': ['Пользователь уже оставил отзыв.']
+    })
+    batch.accept(unique_in_batch(key, 'Отзыв повторяется в запросе.'))
+
+    reviews = [
+        Review(
+            title_id=data['title'], author=authors[data['author']],
+            text=data['text'], score=data['score'],
+        )
+        for _, data in batch.valid
+    ]
+    title_ids = {review.title_id for review in reviews}
+    with transaction.atomic():
+        insert(Review, reviews)
+        for chunk in batched(title_ids, LOOKUP_CHUNK):
+            rebuild_title_ratings(chunk)
+            rebuild_title_scores(chunk)
+    for (index, _), review in zip(batch.valid, reviews):
+        batch.created(index, review)
+    if reviews:
+        invalidate(*title_scopes(title_ids))
+    return batch.results
+
+
+def validate_size(items):
+    """The error for a request body that is not a list of allowed size."""
+    if not isinstance(items, list):
+        return 'Ожидается список объектов.'
+    if len(items) > settings.BULK_MAX_ITEMS:
+        return f'Не больше {settings.BULK_MAX_ITEMS} объектов за запрос.'
+    return None
@@ -0,0 +1,189 @@
+"""
+Response cache for catalog reads.
+
+Every cached response depends on a few scopes: `categories`, `genres`,
+`titles` for the lists and `titles:<id>` for one title. Each scope has
+a generation token stored in the cache and the tokens are part of the
+response key, so invalidating a scope replaces its token and makes every
+response that depends on it unreachable without scanning any keys.
+The `catalog` scope is part of every key and drops the whole cache.
+
+A token starts with the time it was made. A response read from a replica
+is not stored while one of its scopes is younger than
+REPLICA_STICKY_SECONDS, the replica may not have the change yet.
+"""
+import hashlib
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from .replicas import reading_replica
+
+ALL = 'catalog'
+STATS = (
+    ('categories', 'list'),
+    ('genres', 'list'),
+    ('titles', 'list'),
+    ('titles', 'retrieve'),
+    ('titles', 'stats'),
+    ('titles', 'top'),
+    ('titles', 'trending'),
+)
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def generation_key(scope):
+    return f'response-cache:generation:{scope}'
+
+
+def counter_key(scope, action, outcome):
+    return f'response-cache:{outcome}:{scope}:{action}'
+
+
+def new_generation():
+    return f'{time.time():.3f}:{uuid4().hex}'
+
+
+def changed_within(tokens, seconds):
+    since = time.time() - seconds
+    for token in tokens:
+        try:
+            if float(token.partition(':')[0]) > since:
+                return True
+        except ValueError:
+            pass
+    return False
+
+
+def generations(cache, scopes):
+    keys = [generation_key(scope) for scope in scopes]
+    tokens = cache.get_many(keys)
+    for key in keys:
+        if key not in tokens:
+            cache.add(key, new_generation(), None)
+            tokens[key] = cache.get(key)
+    return [tokens[key] for key in keys]
+
+
+def invalidate(*scopes):
+    """
+    Replaces the generation tokens of scopes. It is done right away and
+    once more after commit, so a response cached by a concurrent request
+    between the write and the commit is dropped too.
+    """
+    def bump():
+        get_cache().set_many(
+            {generation_key(scope): new_generation() for scope in scopes},
+            None
+        )
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def title_scopes(title_ids):
+    return ['titles', *(f'titles:{title_id}' for title_id in title_ids)]
+
+
+def increment(cache, key):
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The counter was evicted between add() and incr().
+        cache.add(key, 1, None)
+
+
+def stats():
+    cache = get_cache()
+    keys = [
+        counter_key(scope, action, outcome)
+        for scope, action in STATS for outcome in ('hits', 'misses')
+    ]
+    counters = cache.get_many(keys)
+    result = {}
+    for scope, action in STATS:
+        result.setdefault(scope, {})[action] = {
+            outcome: counters.get(counter_key(scope, action, outcome), 0)
+            for outcome in ('hits', 'misses')
+        }
+    return result
+
+
+def request_role(request):
+    user = request.user
+    if not user or not user.is_authenticated:
+        return 'anon'
+    return 'admin' if user.is_admin else user.role
+
+
+class CachedResponseMixin:
+    """
+    Serves list and detail responses of a viewset from the response
+    cache. The key is built from the absolute URL, the role of the
+    requester and the generations of the scopes of the view.
+    """
+    cache_scope = None
+
+    def get_cache_scopes(self):
+        if self.detail:
+            lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            return ALL, f'{self.cache_scope}:{lookup}'
+        return ALL, self.cache_scope
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        tokens = generations(cache, self.get_cache_scopes())
+        parts = [
+            # Pagination links in the data are absolute, so the scheme
+            # and the host are part of the key.
+            request.build_absolute_uri(request.path),
+            *sorted(
+                f'{key}={value}'
+                for key, values in request.query_params.lists()
+                for value in values
+            ),
+            request_role(request),
+            *tokens,
+        ]
+        key = 'response-cache:response:' + hashlib.sha1(
+            '\n'.join(parts).encode()
+        ).hexdigest()
+        cached = cache.get(key)
+        if cached is not None:
+            increment(cache, counter_key(self.cache_scope, self.action,
+                                         'hits'))
+            response = Response(cached)
+            response['X-Cache'] = 'HIT'
+            return response
+        increment(cache, counter_key(self.cache_scope, self.action, 'misses'))
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK and not (
+            reading_replica()
+            and changed_within(tokens, settings.REPLICA_STICKY_SECONDS)
+        ):
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,34 @@
+"""
+Connection setup from the DATABASES entries.
+
+Two keys of an entry are handled here. PRAGMAS are run on every new
+SQLite connection: WAL journal, synchronous=NORMAL, mmap and a busy
+timeout, so concurrent writers wait for the lock instead of failing
+with "database is locked". CONN_HEALTH_CHECKS makes a persistent
+connection answer a ping at the start of every request and reconnects
+if the server has dropped it (Django 4.1 has the same key built in).
+"""
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in connection.settings_dict.get('PRAGMAS', {}).items():
+        # On the raw connection: setup is not a query of the request.
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(request_started)
+def check_connections(**kwargs):
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not connection.is_usable()
+        ):
+            connection.close()
@@ -0,0 +1,221 @@
+"""
+Reproducible synthetic datasets in the static/data/*.csv layout.
+
+Popularity is skewed with a Zipf distribution: a few titles get most
+of the reviews and a few reviews get most of the comments. The same
+seed always produces the same files.
+"""
+import csv
+import os
+import random
+from array import array
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+from reviews.models import ADMIN, MODERATOR, USER
+
+CATEGORIES = (
+    ('Фильм', 'movie'), ('Книга', 'book'), ('Музыка', 'music'),
+    ('Сериал', 'series'), ('Игра', 'game'),
+)
+GENRES = (
+    ('Драма', 'drama'), ('Комедия', 'comedy'), ('Вестерн', 'western'),
+    ('Фэнтези', 'fantasy'), ('Фантастика', 'sci-fi'),
+    ('Детектив', 'detective'), ('Триллер', 'thriller'), ('Сказка', 'tale'),
+    ('Гонзо', 'gonzo'), ('Роман', 'roman'), ('Баллада', 'ballad'),
+    ('Рок-н-ролл', 'rock-n-roll'), ('Классика', 'classical'),
+    ('Рок', 'rock'), ('Шансон', 'chanson'),
+)
+WORDS = (
+    'фильм', 'книга', 'сюжет', 'герой', 'финал', 'автор', 'музыка',
+    'актёр', 'сцена', 'история', 'отлично', 'скучно', 'неожиданно',
+    'смешно', 'грустно', 'красиво', 'затянуто', 'рекомендую', 'шедевр',
+    'провал', 'классика', 'время', 'мир', 'любовь', 'дорога', 'ночь',
+)
+START = datetime(2015, 1, 1, tzinfo=timezone.utc)
+SPAN = timedelta(days=365 * 7).total_seconds()
+
+
+def zipf_weights(count, exponent):
+    """Cumulative Zipf weights for ranks 1..count."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def spread(total, cum_weights, cap):
+    """Splits total into per-rank counts following the weights, each <= cap."""
+    weights = [
+        right - left for left, right in zip([0] + cum_weights, cum_weights)
+    ]
+    scale = total / cum_weights[-1]
+    counts = [min(cap, int(weight * scale)) for weight in weights]
+    left = total - sum(counts)
+    while left > 0:
+        progress = False
+        for index, count in enumerate(counts):
+            if not left:
+                break
+            if count < cap:
+                counts[index] += 1
+                left -= 1
+                progress = True
+        if not progress:
+            break
+    return counts
+
+
+def text(rnd, words):
+    return ' '.join(rnd.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def iso(timestamp):
+    return (START + timedelta(seconds=timestamp)).isoformat(
+        timespec='milliseconds'
+    ).replace('+00:00', 'Z')
+
+
+class Writer:
+    def __init__(self, data_dir, filename, header):
+        self.file = open(
+            os.path.join(data_dir, filename), 'w', encoding='utf8', newline=''
+        )
+        self.csv = csv.writer(self.file)
+        self.csv.writerow(header)
+        self.rows = 0
+
+    def write(self, row):
+        self.csv.writerow(row)
+        self.rows += 1
+
+    def close(self):
+        self.file.close()
+
+
+def write_users(data_dir, rnd, users):
+    writer = Writer(
+        data_dir, 'users.csv',
+        ('id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name')
+    )
+    for pk in range(1, users + 1):
+        role = rnd.choices((USER, MODERATOR, ADMIN), (95, 4, 1))[0]
+        writer.write((
+            pk, f'user{pk}', f'user{pk}@yamdb.fake', role,
+            text(rnd, 5) if rnd.random() < 0.3 else '', '', ''
+        ))
+    writer.close()
+    return {'users.csv': writer.rows}
+
+
+def write_slugged(data_dir):
+    written = {}
+    for filename, rows in (
+        ('category.csv', CATEGORIES), ('genre.csv', GENRES)
+    ):
+        writer = Writer(data_dir, filename, ('id', 'name', 'slug'))
+        for pk, (name, slug) in enumerate(rows, 1):
+            writer.write((pk, name, slug))
+        writer.close()
+        written[filename] = writer.rows
+    return written
+
+
+def write_titles(data_dir, rnd, titles, skew):
+    title_writer = Writer(
+        data_dir, 'titles.csv', ('id', 'name', 'year', 'category')
+    )
+    link_writer = Writer(
+        data_dir, 'genre_title.csv', ('id', 'title_id', 'genre_id')
+    )
+    genre_weights = zipf_weights(len(GENRES), skew)
+    year = datetime.now().year
+    for pk in range(1, titles + 1):
+        title_writer.write((
+            pk, f'{text(rnd, rnd.randint(1, 4))} {pk}',
+            rnd.randint(1900, year), rnd.randint(1, len(CATEGORIES))
+        ))
+        genre_ids = set(rnd.choices(
+            range(1, len(GENRES) + 1), cum_weights=genre_weights,
+            k=rnd.randint(1, 3)
+        ))
+        for genre_id in sorted(genre_ids):
+            link_writer.write((link_writer.rows + 1, pk, genre_id))
+    title_writer.close()
+    link_writer.close()
+    return {
+        'titles.csv': title_writer.rows,
+        'genre_title.csv': link_writer.rows,
+    }
+
+
+def write_reviews(data_dir, rnd, users, titles, reviews, skew):
+    """Also returns the publication times of the reviews, by id - 1."""
+    # Titles are ranked by id, title 1 is the most popular one.
+    per_title = spread(reviews, zipf_weights(titles, skew), users)
+    review_times = array('d')
+    writer = Writer(
+        data_dir, 'review.csv',
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date')
+    )
+    for title_id, count in enumerate(per_title, 1):
+        mean = rnd.uniform(3, 9)
+        for author in rnd.sample(range(1, users + 1), count):
+            timestamp = rnd.uniform(0, SPAN)
+            review_times.append(timestamp)
+            score = min(10, max(1, round(rnd.gauss(mean, 2))))
+            writer.write((
+                writer.rows + 1, title_id, text(rnd, rnd.randint(5, 40)),
+                author, score, iso(timestamp)
+            ))
+    writer.close()
+    return {'review.csv': writer.rows}, review_times
+
+
+def write_comments(data_dir, rnd, users, review_times, comments, skew):
+    writer = Writer(
+        data_dir, 'comments.csv',
+        ('id', 'review_id', 'text', 'author', 'pub_date')
+    )
+    if review_times:
+        review_weights = zipf_weights(len(review_times), skew)
+        left = comments
+        while left:
+            chunk = min(left, 100000)
+            left -= chunk
+            for index in rnd.choices(
+                range(len(review_times)), cum_weights=review_weights, k=chunk
+            ):
+                created = review_times[index]
+                writer.write((
+                    writer.rows + 1, index + 1, text(rnd, rnd.randint(3, 20)),
+                    rnd.randint(1, users),
+                    iso(rnd.uniform(created, SPAN)),
+                ))
+    writer.close()
+    return {'comments.csv': writer.rows}
+
+
+def generate(data_dir, users=1000, titles=1000, reviews=10000,
+             comments=10000, seed=0, skew=1.1):
+    """
+    Writes users.csv, category.csv, genre.csv, titles.csv,
+    genre_title.csv, review.csv and comments.csv into data_dir.
+    Every author reviews a title at most once, so reviews per title are
+    capped by the number of users. Returns the number of written rows
+    per file.
+    """
+    rnd = random.Random(seed)
+    os.makedirs(data_dir, exist_ok=True)
+    written = {
+        **write_users(data_dir, rnd, users),
+        **write_slugged(data_dir),
+        **write_titles(data_dir, rnd, titles, skew),
+    }
+    review_rows, review_times = write_reviews(
+        data_dir, rnd, users, titles, reviews, skew
+    )
+    written.update(review_rows)
+    written.update(write_comments(
+        data_dir, rnd, users, review_times, comments, skew
+    ))
+    return written
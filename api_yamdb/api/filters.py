@@ -1,5 +1,7 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import SearchFilter
 
+from .search import search
 from reviews.models import Title
 
 
@@ -12,9 +14,22 @@ class TitleFilter(filters.FilterSet):
     category = CharFilterInFilter(
         field_name='category__slug', lookup_expr='in'
     )
-    year = filters.CharFilter(field_name='year', lookup_expr='icontains')
-    name = filters.CharFilter(field_name='name', lookup_expr='icontains')
+    year = filters.NumberFilter(field_name='year')
+    name = filters.CharFilter(method='filter_name')
 
     class Meta:
         model = Title
         fields = ['genre', 'name', 'category', 'year']
+
+    def filter_name(self, queryset, name, value):
+        return search(queryset, 'title', value)
+
+
+class IndexedSearchFilter(SearchFilter):
+    """SearchFilter backed by the search index of the view's search_kind."""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return search(queryset, view.search_kind, ' '.join(terms))
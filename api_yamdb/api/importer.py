@@ -0,0 +1,678 @@
+"""
+Bulk CSV import of the static/data/*.csv dumps.
+
+Files are streamed record by record, foreign keys are checked against
+in-memory sets of known ids and rows are inserted with multi-row INSERTs,
+one transaction per batch. With several workers the files are split
+into byte ranges that are parsed and validated by a process pool,
+while the parent process stays the only writer.
+
+In incremental mode existing tables are upserted: new ids are inserted,
+changed rows are updated and a per-table checkpoint is committed with
+every batch, so an interrupted import resumes where it stopped.
+"""
+import csv
+import hashlib
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import (
+    DEFAULT_DB_ALIAS, IntegrityError, connection, connections, transaction,
+)
+from django.utils.dateparse import parse_datetime
+
+from .cache import ALL, invalidate
+from .search import (
+    KINDS_BY_MODEL, get_backend, rebuild as rebuild_search_index,
+)
+from reviews.models import (
+    ROLE_CHOICES, Categorу, Comment, Genre, GenreTitle, ImportCheckpoint,
+    Review, Title, User,
+)
+from reviews.stats import rebuild_title_ratings, rebuild_title_scores
+from reviews.validators import username_validator
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+FINGERPRINT_BYTES = 64 * 1024
+# Keeps IN (...) lists below the SQLite parameter limit.
+LOOKUP_CHUNK = 500
+
+ROLES = {role for role, _ in ROLE_CHOICES}
+
+
+class RowError(ValueError):
+    """A CSV row that can not be imported."""
+
+
+class CsvSource:
+    """
+    Reads a CSV file as a stream of records with their byte offsets.
+
+    Quoted values may span several lines, a record ends on a line break
+    after an even number of quotes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as source:
+            header = source.readline()
+            self.data_start = source.tell()
+        self.fields = next(csv.reader([header.decode('utf-8-sig')]))
+
+    def fingerprint(self, offset):
+        """
+        Hash of the file up to offset (at most FINGERPRINT_BYTES).
+        It does not change when records are appended after offset.
+        """
+        with open(self.path, 'rb') as source:
+            data = source.read(min(offset, FINGERPRINT_BYTES))
+        return hashlib.sha1(data).hexdigest()
+
+    @property
+    def size(self):
+        return os.path.getsize(self.path)
+
+    def _raw_records(self, source, start, end):
+        offset = start
+        record = b''
+        quotes = 0
+        for line in source:
+            record += line
+            quotes += line.count(b'"')
+            if quotes % 2:
+                continue
+            offset += len(record)
+            yield offset, record.decode('utf-8')
+            record = b''
+            quotes = 0
+            if end is not None and offset >= end:
+                return
+        if record.strip():
+            raise RowError(f'Незакрытая кавычка в {self.path}')
+
+    def records(self, start=None, end=None):
+        """
+        Yields (line, end_offset, row) for every record that starts
+        in [start, end). start must point to the beginning of a record.
+        line is the number of the record's first line when the read
+        starts at the top of the file and None otherwise.
+        """
+        start = self.data_start if start is None else start
+        line = 2 if start == self.data_start else None
+        with open(self.path, 'rb') as source:
+            source.seek(start)
+            raw = self._raw_records(source, start, end)
+            state = {}
+
+            def texts():
+                for offset, text in raw:
+                    state['offset'] = offset
+                    state['lines'] = text.count('\n') or 1
+                    yield text
+
+            for values in csv.reader(texts()):
+                if not values:
+                    continue
+                yield line, state['offset'], dict(zip(self.fields, values))
+                if line is not None:
+                    line += state['lines']
+
+    def ranges(self, chunk_bytes):
+        """
+        Splits the data part of the file into (start, end) byte ranges
+        of about chunk_bytes that begin and end on record boundaries.
+        Only quotes are counted here, the records are not decoded.
+        """
+        start = offset = self.data_start
+        quotes = 0
+        with open(self.path, 'rb') as source:
+            source.seek(offset)
+            for line in source:
+                offset += len(line)
+                quotes += line.count(b'"')
+                if quotes % 2 == 0 and offset - start >= chunk_bytes:
+                    yield start, offset
+                    start = offset
+        if offset > start:
+            yield start, offset
+
+
+def _int(row, field):
+    try:
+        return int(row[field])
+    except (KeyError, TypeError, ValueError):
+        raise RowError(f'Поле {field} должно быть целым числом')
+
+
+def _required(row, field):
+    value = row.get(field)
+    if not value:
+        raise RowError(f'Поле {field} не заполнено')
+    return value
+
+
+def _datetime(row, field):
+    value = parse_datetime(row.get(field) or '')
+    if value is None:
+        raise RowError(f'Поле {field} не является датой')
+    return value
+
+
+def _reference(row, field, known_ids, name):
+    pk = _int(row, field)
+    if pk not in known_ids:
+        raise RowError(f'{name} с id={pk} не найден')
+    return pk
+
+
+def build_user(row, ids):
+    username = _required(row, 'username')
+    try:
+        username_validator(username)
+    except ValidationError as error:
+        raise RowError(' '.join(error.messages))
+    role = row.get('role') or User._meta.get_field('role').default
+    if role not in ROLES:
+        raise RowError(f'Неизвестная роль {role}')
+    return User(
+        id=_int(row, 'id'),
+        username=username,
+        email=_required(row, 'email'),
+        role=role,
+        bio=row.get('bio', ''),
+        first_name=row.get('first_name', ''),
+        last_name=row.get('last_name', ''),
+    )
+
+
+def build_category(row, ids):
+    return Categorу(
+        id=_int(row, 'id'),
+        name=_required(row, 'name'),
+        slug=_required(row, 'slug'),
+    )
+
+
+def build_genre(row, ids):
+    return Genre(
+        id=_int(row, 'id'),
+        name=_required(row, 'name'),
+        slug=_required(row, 'slug'),
+    )
+
+
+def build_title(row, ids):
+    category_id = None
+    if row.get('category'):
+        category_id = _reference(row, 'category', ids[Categorу], 'Категория')
+    return Title(
+        id=_int(row, 'id'),
+        name=_required(row, 'name'),
+        year=_int(row, 'year'),
+        description=row.get('description') or None,
+        category_id=category_id,
+    )
+
+
+def build_genretitle(row, ids):
+    return GenreTitle(
+        id=_int(row, 'id'),
+        title_id=_reference(row, 'title_id', ids[Title], 'Произведение'),
+        genre_id=_reference(row, 'genre_id', ids[Genre], 'Жанр'),
+    )
+
+
+def build_review(row, ids):
+    score = _int(row, 'score')
+    if not 1 <= score <= 10:
+        raise RowError('Значения рейтинга от 1 до 10')
+    return Review(
+        id=_int(row, 'id'),
+        title_id=_reference(row, 'title_id', ids[Title], 'Произведение'),
+        author_id=_reference(row, 'author', ids[User], 'Пользователь'),
+        text=_required(row, 'text'),
+        score=score,
+        pub_date=_datetime(row, 'pub_date'),
+    )
+
+
+def build_comment(row, ids):
+    return Comment(
+        id=_int(row, 'id'),
+        review_id=_reference(row, 'review_id', ids[Review], 'Отзыв'),
+        author_id=_reference(row, 'author', ids[User], 'Пользователь'),
+        text=_required(row, 'text'),
+        pub_date=_datetime(row, 'pub_date'),
+    )
+
+
+class Table:
+    """
+    A CSV file and the model it is loaded into.
+    update_fields are the columns that come from the file,
+    only they are compared and updated in incremental mode.
+    """
+
+    def __init__(self, name, filename, model, build, update_fields):
+        self.name = name
+        self.filename = filename
+        self.model = model
+        self.build = build
+        self.update_fields = update_fields
+        self.fields = model._meta.concrete_fields
+
+    def values(self, obj):
+        return tuple(getattr(obj, field) for field in self.update_fields)
+
+    def prepare(self, obj):
+        """
+        Database values of an object in self.fields order.
+        pre_save() is not called, so auto_now_add keeps the dump's dates.
+        """
+        database = connections[DEFAULT_DB_ALIAS]
+        return tuple(
+            field.get_db_prep_save(getattr(obj, field.attname), database)
+            for field in self.fields
+        )
+
+    def insert(self, cursor, rows):
+        """Inserts prepared value tuples with multi-row INSERTs."""
+        ops = connection.ops
+        size = max(ops.bulk_batch_size(self.fields, rows), 1)
+        columns = ', '.join(
+            ops.quote_name(field.column) for field in self.fields
+        )
+        placeholders = ['%s'] * len(self.fields)
+        for start in range(0, len(rows), size):
+            chunk = rows[start:start + size]
+            values = ops.bulk_insert_sql(
+                self.fields, [placeholders] * len(chunk)
+            )
+            cursor.execute(
+                f'INSERT INTO {ops.quote_name(self.model._meta.db_table)} '
+                f'({columns}) {values}',
+                [value for row in chunk for value in row]
+            )
+
+
+# Dependency order: every table only references tables above it.
+TABLES = (
+    Table(
+        'users', 'users.csv', User, build_user,
+        ('username', 'email', 'role', 'bio', 'first_name', 'last_name')
+    ),
+    Table(
+        'categories', 'category.csv', Categorу, build_category,
+        ('name', 'slug')
+    ),
+    Table('genres', 'genre.csv', Genre, build_genre, ('name', 'slug')),
+    Table(
+        'titles', 'titles.csv', Title, build_title,
+        ('name', 'year', 'description', 'category_id')
+    ),
+    Table(
+        'genre_title', 'genre_title.csv', GenreTitle, build_genretitle,
+        ('title_id', 'genre_id')
+    ),
+    Table(
+        'reviews', 'review.csv', Review, build_review,
+        ('title_id', 'author_id', 'text', 'score', 'pub_date')
+    ),
+    Table(
+        'comments', 'comments.csv', Comment, build_comment,
+        ('review_id', 'author_id', 'text', 'pub_date')
+    ),
+)
+
+TABLES_BY_NAME = {table.name: table for table in TABLES}
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+_worker_ids = {}
+
+
+def _init_worker(ids):
+    global _worker_ids
+    _worker_ids = ids
+
+
+def _parse_chunk(task):
+    """Pool task: builds the objects of one byte range of a file."""
+    name, path, start, end = task
+    table = TABLES_BY_NAME[name]
+    objects = []
+    errors = []
+    for _, _, row in CsvSource(path).records(start, end):
+        try:
+            obj = table.build(row, _worker_ids)
+        except RowError as error:
+            errors.append((row, str(error)))
+        else:
+            objects.append((obj.pk, table.prepare(obj)))
+    return objects, errors
+
+
+class TableReport:
+    def __init__(self, table):
+        self.table = table
+        self.inserted = 0
+        self.updated = 0
+        self.errors = 0
+        self.started = time.monotonic()
+        self.elapsed = 0
+
+    def finish(self):
+        self.elapsed = time.monotonic() - self.started
+
+    @property
+    def rows_per_second(self):
+        rows = self.inserted + self.updated
+        return rows / self.elapsed if self.elapsed else 0
+
+    def __str__(self):
+        return (
+            f'{self.table.name}: загружено {self.inserted}, '
+            f'обновлено {self.updated}, '
+            f'ошибок {self.errors}, {self.elapsed:.2f} с, '
+            f'{self.rows_per_second:.0f} строк/с'
+        )
+
+
+class Importer:
+    """
+    Loads the CSV dumps from data_dir into the database.
+
+    ids maps every model to the set of primary keys already present,
+    it is used to validate foreign keys without hitting the database.
+    Rejected rows are passed to on_error(table, line, row, message).
+    With incremental=True non-empty tables are upserted from their
+    checkpoints instead of being skipped, restart=True ignores the
+    stored checkpoints.
+    """
+
+    def __init__(self, data_dir, batch_size=DEFAULT_BATCH_SIZE,
+                 on_error=None, stdout=None, workers=1,
+                 chunk_bytes=DEFAULT_CHUNK_BYTES, incremental=False,
+                 restart=False):
+        self.data_dir = data_dir
+        self.batch_size = batch_size
+        self.workers = workers
+        self.chunk_bytes = chunk_bytes
+        self.incremental = incremental
+        self.restart = restart
+        self.touched_titles = set()
+        # Searchable rows written by an incremental import, by model.
+        self.touched_documents = defaultdict(set)
+        self.on_error = on_error or (lambda *args: None)
+        self.stdout = stdout
+        self.ids = {}
+
+    def write(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def known_ids(self, model):
+        if model not in self.ids:
+            self.ids[model] = set(
+                model.objects.values_list('pk', flat=True).iterator()
+            )
+        return self.ids[model]
+
+    def run(self, tables=TABLES):
+        reports = []
+        for table in TABLES:
+            self.known_ids(table.model)
+        for table in tables:
+            report = self.import_table(table)
+            if report is not None:
+                reports.append(report)
+                self.write(str(report))
+        models = [report.table.model for report in reports]
+        if Review in models and not self.incremental:
+            rebuild_title_ratings()
+            rebuild_title_scores()
+        for title_ids in batched(self.touched_titles, LOOKUP_CHUNK):
+            rebuild_title_ratings(title_ids)
+            rebuild_title_scores(title_ids)
+        self.reset_sequences(models)
+        if self.incremental:
+            self.reindex()
+        else:
+            searchable = [
+                KINDS_BY_MODEL[report.table.model] for report in reports
+                if report.table.model in KINDS_BY_MODEL
+                and report.inserted + report.updated
+            ]
+            if searchable:
+                rebuild_search_index(searchable)
+        if reports:
+            invalidate(ALL)
+        return reports
+
+    def import_table(self, table):
+        path = os.path.abspath(os.path.join(self.data_dir, table.filename))
+        if not os.path.exists(path):
+            self.write(f'{table.filename} не найден, пропускаю')
+            return None
+        if self.known_ids(table.model) and not self.incremental:
+            self.write(
+                f'Данные {table.name} уже загружены. Если необходимо '
+                'загрузить их снова, очистите таблицу или используйте '
+                '--incremental.'
+            )
+            return None
+        self.write(f'Загружаю {table.name}')
+        report = TableReport(table)
+        if self.incremental:
+            self.load_incremental(report, CsvSource(path))
+        elif self.workers > 1:
+            self.load_parallel(report, CsvSource(path))
+        else:
+            self.load(report, CsvSource(path))
+        report.finish()
+        return report
+
+    def load(self, report, source):
+        table = report.table
+        for batch in batched(source.records(), self.batch_size):
+            rows = []
+            for line, _, row in batch:
+                try:
+                    obj = table.build(row, self.ids)
+                except RowError as error:
+                    self.reject(report, line, row, str(error))
+                else:
+                    rows.append((line, row, obj.pk, table.prepare(obj)))
+            self.insert(report, rows)
+
+    def load_parallel(self, report, source):
+        """
+        Parses byte ranges of the file in a process pool and inserts the
+        results in file order. Workers get a copy of the known ids and
+        never touch the database. A table only starts once the previous
+        one is fully written, so comments always see the loaded reviews.
+        """
+        tasks = [
+            (report.table.name, source.path, start, end)
+            for start, end in source.ranges(self.chunk_bytes)
+        ]
+        # Forked children must not share the parent's connections.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(
+            self.workers, initializer=_init_worker, initargs=(self.ids,)
+        ) as pool:
+            for objects, errors in pool.imap(_parse_chunk, tasks):
+                for row, message in errors:
+                    self.reject(report, None, row, message)
+                for batch in batched(objects, self.batch_size):
+                    self.insert(report, [
+                        (None, {'id': pk}, pk, values) for pk, values in batch
+                    ])
+
+    def load_incremental(self, report, source):
+        """
+        Upserts the file starting at the table's checkpoint.
+        The checkpoint is only trusted while the beginning of the file
+        is unchanged, a replaced file is read again from the top.
+        """
+        table = report.table
+        checkpoint = ImportCheckpoint.objects.filter(table=table.name).first()
+        start = None
+        if (
+            checkpoint is not None
+            and not self.restart
+            and checkpoint.file == source.path
+            and checkpoint.byte_offset <= source.size
+            and checkpoint.fingerprint == source.fingerprint(
+                checkpoint.byte_offset
+            )
+        ):
+            start = checkpoint.byte_offset
+            self.write(f'Продолжаю {table.name} с байта {start}')
+        known = self.ids[table.model]
+        for batch in batched(source.records(start), self.batch_size):
+            # A later row with the same id supersedes the earlier one.
+            latest = {}
+            for line, _, row in batch:
+                try:
+                    obj = table.build(row, self.ids)
+                except RowError as error:
+                    self.reject(report, line, row, str(error))
+                    continue
+                latest.pop(obj.pk, None)
+                latest[obj.pk] = (line, row, obj)
+            new = []
+            existing = []
+            for pk, item in latest.items():
+                (existing if pk in known else new).append(item)
+            offset = batch[-1][1]
+            with transaction.atomic():
+                self.insert(report, [
+                    (line, row, obj.pk, table.prepare(obj))
+                    for line, row, obj in new
+                ])
+                changed = self.changed(table, existing)
+                self.update(report, changed)
+                ImportCheckpoint.objects.update_or_create(
+                    table=table.name,
+                    defaults={
+                        'file': source.path,
+                        'fingerprint': source.fingerprint(offset),
+                        'byte_offset': offset,
+                        'last_id': max(
+                            (obj.pk for _, _, obj in new + existing),
+                            default=checkpoint and checkpoint.last_id
+                        ),
+                    }
+                )
+            if table.model is Review:
+                self.touched_titles.update(
+                    obj.title_id for _, _, obj in new + existing
+                )
+            if table.model in KINDS_BY_MODEL:
+                self.touched_documents[table.model].update(
+                    obj.pk for _, _, obj in new + changed
+                )
+
+    def reindex(self):
+        """Indexes the searchable rows written by an incremental import."""
+        backend = get_backend()
+        for model, pks in self.touched_documents.items():
+            for chunk in batched(pks, LOOKUP_CHUNK):
+                backend.index(
+                    KINDS_BY_MODEL[model], model.objects.filter(pk__in=chunk)
+                )
+
+    def changed(self, table, rows):
+        """Keeps the rows whose file values differ from the database."""
+        current = {}
+        for chunk in batched(rows, LOOKUP_CHUNK):
+            current.update(
+                (values[0], values[1:])
+                for values in table.model.objects.filter(
+                    pk__in=[obj.pk for _, _, obj in chunk]
+                ).values_list('pk', *table.update_fields)
+            )
+        changed = []
+        for line, row, obj in rows:
+            old = current.get(obj.pk)
+            if old != table.values(obj):
+                changed.append((line, row, obj))
+                if table.model is Review and old is not None:
+                    self.touched_titles.add(
+                        old[table.update_fields.index('title_id')]
+                    )
+        return changed
+
+    def update(self, report, rows):
+        """Same as insert() for (line, row, object) rows that changed."""
+        model = report.table.model
+        fields = report.table.update_fields
+        try:
+            with transaction.atomic():
+                model.objects.bulk_update(
+                    [obj for _, _, obj in rows], fields
+                )
+            report.updated += len(rows)
+        except IntegrityError:
+            for line, row, obj in rows:
+                try:
+                    with transaction.atomic():
+                        model.objects.filter(pk=obj.pk).update(
+                            **dict(zip(fields, report.table.values(obj)))
+                        )
+                except IntegrityError as error:
+                    self.reject(report, line, row, str(error))
+                else:
+                    report.updated += 1
+
+    def reject(self, report, line, row, message):
+        report.errors += 1
+        self.on_error(report.table, line, row, message)
+
+    def insert(self, report, rows):
+        """
+        Inserts (line, row, pk, values) tuples in one transaction.
+        If the batch breaks a constraint it is retried row by row
+        to isolate the bad rows.
+        """
+        table = report.table
+        inserted = [pk for _, _, pk, _ in rows]
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                table.insert(cursor, [values for _, _, _, values in rows])
+        except IntegrityError:
+            inserted = []
+            with transaction.atomic(), connection.cursor() as cursor:
+                for line, row, pk, values in rows:
+                    try:
+                        with transaction.atomic():
+                            table.insert(cursor, [values])
+                    except IntegrityError as error:
+                        self.reject(report, line, row, str(error))
+                    else:
+                        inserted.append(pk)
+        self.ids[table.model].update(inserted)
+        report.inserted += len(inserted)
+
+    def reset_sequences(self, models):
+        """Moves id sequences past the imported ids (PostgreSQL)."""
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
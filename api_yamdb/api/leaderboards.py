@@ -0,0 +1,96 @@
+"""
+Precomputed title leaderboards.
+
+The top rated titles overall, per genre and per category are ranked by
+the stored rating for every threshold of LEADERBOARD_MIN_REVIEWS, the
+trending board by the number of reviews in the last
+LEADERBOARD_TRENDING_DAYS days. Every board keeps LEADERBOARD_SIZE rows
+in the Ranking table, so a read is an index range scan of at most that
+many rows however large the catalog is. refresh() recomputes all boards
+in one transaction and is meant to run on a schedule.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .cache import invalidate
+from reviews.models import Categorу, Genre, Ranking, Review, Title
+
+TRENDING = 'trending'
+
+
+def top_board(min_reviews, genre=None, category=None):
+    if genre:
+        return f'top:{min_reviews}:genre:{genre}'
+    if category:
+        return f'top:{min_reviews}:category:{category}'
+    return f'top:{min_reviews}'
+
+
+def top_rows(titles):
+    return (
+        titles.order_by('-rating', '-reviews_count', 'id')
+        .values_list('pk', 'rating', 'reviews_count')
+        [:settings.LEADERBOARD_SIZE]
+    )
+
+
+def boards():
+    """(board, [(title_id, score, reviews_count), ...]) pairs."""
+    for min_reviews in settings.LEADERBOARD_MIN_REVIEWS:
+        titles = Title.objects.filter(
+            reviews_count__gte=min_reviews, rating__isnull=False
+        )
+        yield top_board(min_reviews), top_rows(titles)
+        for slug in Genre.objects.values_list('slug', flat=True):
+            yield (
+                top_board(min_reviews, genre=slug),
+                top_rows(titles.filter(genre__slug=slug))
+            )
+        for slug in Categorу.objects.values_list('slug', flat=True):
+            yield (
+                top_board(min_reviews, category=slug),
+                top_rows(titles.filter(category__slug=slug))
+            )
+    since = timezone.now() - timedelta(
+        days=settings.LEADERBOARD_TRENDING_DAYS
+    )
+    yield TRENDING, (
+        Review.objects.filter(pub_date__gte=since)
+        .values('title', 'title__reviews_count').order_by()
+        .annotate(recent=Count('pk'))
+        .order_by('-recent', 'title')
+        .values_list('title', 'recent', 'title__reviews_count')
+        [:settings.LEADERBOARD_SIZE]
+    )
+
+
+def refresh():
+    """Replaces every board, returns the number of ranking rows."""
+    now = timezone.now()
+    rows = [
+        Ranking(
+            board=board, position=position, title_id=title_id,
+            score=score, reviews_count=reviews_count, updated=now
+        )
+        for board, ranked in boards()
+        for position, (title_id, score, reviews_count)
+        in enumerate(ranked, 1)
+    ]
+    with transaction.atomic():
+        Ranking.objects.all().delete()
+        Ranking.objects.bulk_create(rows, batch_size=500)
+    invalidate('titles')
+    return len(rows)
+
+
+def read(board, limit):
+    return list(
+        Ranking.objects.filter(board=board)
+        .select_related('title__category')
+        .prefetch_related('title__genre')
+        .order_by('position')[:limit]
+    )
@@ -0,0 +1,110 @@
+"""
+Outbound mail queue.
+
+Requests only insert rows into OutboundEmail in their own transaction,
+the send_queued_mail command delivers them in batches over one SMTP
+connection per batch. Failed messages are retried with an exponential
+backoff until MAIL_QUEUE_MAX_ATTEMPTS. With MAIL_QUEUE_EAGER the queued
+messages are delivered right after commit instead, so development and
+tests need no worker.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from reviews.models import OutboundEmail
+
+
+def queue_mail(recipient, subject, body):
+    email = OutboundEmail.objects.create(
+        recipient=recipient, subject=subject, body=body
+    )
+    if settings.MAIL_QUEUE_EAGER:
+        transaction.on_commit(lambda: deliver([email]))
+    return email
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(
+        settings.MAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.MAIL_QUEUE_MAX_RETRY_DELAY
+    ))
+
+
+def claim(batch_size):
+    """
+    Takes due messages and moves their next attempt past the lease, so
+    concurrent workers skip them and a crashed worker's batch is retried.
+    The lease is one conditional UPDATE that repeats the due filter, so
+    of two workers picking the same rows only the first takes them, and
+    no transaction reads before it writes (SQLite has no row locks and
+    can not upgrade such a transaction under a concurrent writer).
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.MAIL_QUEUE_LEASE)
+    token = get_random_string(length=20)
+    due = OutboundEmail.objects.filter(
+        sent_at__isnull=True,
+        attempts__lt=settings.MAIL_QUEUE_MAX_ATTEMPTS,
+        next_attempt_at__lte=now,
+    )
+    batch = due.order_by('next_attempt_at', 'id').values('pk')[:batch_size]
+    if not due.filter(pk__in=batch).update(
+        next_attempt_at=lease, lease_token=token
+    ):
+        return []
+    return list(OutboundEmail.objects.filter(
+        sent_at__isnull=True, next_attempt_at=lease, lease_token=token
+    ).order_by('id'))
+
+
+def deliver(emails, connection=None):
+    """Sends emails over one connection, returns the number sent."""
+    if not emails:
+        return 0
+    connection = connection or get_connection(fail_silently=False)
+    sent = []
+    failed = []
+    try:
+        connection.open()
+    except Exception as error:
+        failed = [(email, error) for email in emails]
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject, email.body, settings.DEFAULT_FROM_EMAIL,
+                    [email.recipient], connection=connection
+                )
+                try:
+                    connection.send_messages([message])
+                except Exception as error:
+                    failed.append((email, error))
+                else:
+                    sent.append(email.pk)
+        finally:
+            connection.close()
+    now = timezone.now()
+    if sent:
+        OutboundEmail.objects.filter(pk__in=sent).update(
+            sent_at=now, attempts=F('attempts') + 1, last_error=''
+        )
+    for email, error in failed:
+        attempts = email.attempts + 1
+        OutboundEmail.objects.filter(pk=email.pk).update(
+            attempts=attempts,
+            next_attempt_at=now + retry_delay(attempts),
+            last_error=repr(error),
+        )
+    return len(sent)
+
+
+def send_queued(batch_size):
+    """Delivers one batch of due messages, returns (sent, claimed)."""
+    emails = claim(batch_size)
+    return deliver(emails), len(emails)
@@ -0,0 +1,360 @@
+import json
+import os
+import random
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import leaderboards
+from api.benchmarks import current_commit, scratch_database, summarize
+from api.datagen import generate
+from api.export import EXPORTS
+from api.importer import Importer
+from reviews.models import (
+    ADMIN, USER, Categorу, Comment, Genre, Review, Title, User,
+)
+
+SAMPLES = 50
+# Objects in one request to a bulk route.
+BULK = 10
+
+
+def sample_ids(queryset, count, rnd):
+    """Random primary keys without ORDER BY RANDOM() over the whole table."""
+    total = queryset.count()
+    if not total:
+        return []
+    return [
+        queryset.values_list('pk', flat=True)[rnd.randrange(total)]
+        for _ in range(min(count, total))
+    ]
+
+
+class Route:
+    """
+    One route of api/urls.py. path and data are callables of the
+    samples, write routes are rolled back after every request.
+    """
+
+    def __init__(self, name, method, path, client='anon', data=None,
+                 format=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.client = client
+        self.data = data or (lambda samples: None)
+        self.format = format
+
+    @property
+    def write(self):
+        return self.method != 'get'
+
+
+def review_path(samples):
+    title_id, review_id = samples.choice(samples.reviews)
+    return f'/api/v1/titles/{title_id}/reviews/{review_id}/'
+
+
+def comment_path(samples):
+    title_id, review_id, comment_id = samples.choice(samples.comments)
+    return (
+        f'/api/v1/titles/{title_id}/reviews/{review_id}/'
+        f'comments/{comment_id}/'
+    )
+
+
+def bulk_slugs(samples):
+    return [
+        {'name': 'bench', 'slug': f'b{samples.next()}'} for _ in range(BULK)
+    ]
+
+
+ROUTES = (
+    Route('api-root', 'get', lambda s: '/api/v1/'),
+    Route('auth-signup', 'post', lambda s: '/api/v1/auth/signup/',
+          data=lambda s: {
+              'username': f'bench{s.next()}',
+              'email': f'bench{s.next()}@yamdb.fake',
+          }),
+    Route('auth-token', 'post', lambda s: '/api/v1/auth/token/',
+          data=lambda s: {
+              'username': s.user.username,
+              'confirmation_code': s.user.confirmation_code,
+          }),
+    Route('users-list', 'get', lambda s: '/api/v1/users/', 'admin'),
+    Route('users-create', 'post', lambda s: '/api/v1/users/', 'admin',
+          lambda s: {'username': f'new{s.next()}',
+                     'email': f'new{s.next()}@yamdb.fake'}),
+    Route('users-detail', 'get',
+          lambda s: f'/api/v1/users/{s.choice(s.usernames)}/', 'admin'),
+    Route('users-update', 'patch',
+          lambda s: f'/api/v1/users/{s.choice(s.usernames)}/', 'admin',
+          lambda s: {'bio': 'bench'}),
+    Route('users-delete', 'delete',
+          lambda s: f'/api/v1/users/{s.choice(s.usernames)}/', 'admin'),
+    Route('users-me', 'get', lambda s: '/api/v1/users/me/', 'user'),
+    Route('users-me-update', 'patch', lambda s: '/api/v1/users/me/', 'user',
+          lambda s: {'bio': 'bench'}),
+    Route('categories-list', 'get', lambda s: '/api/v1/categories/'),
+    Route('categories-search', 'get',
+          lambda s: f'/api/v1/categories/?search={s.choice(s.words)}'),
+    Route('categories-create', 'post', lambda s: '/api/v1/categories/',
+          'admin', lambda s: {'name': 'bench', 'slug': f'b{s.next()}'}),
+    Route('categories-delete', 'delete',
+          lambda s: f'/api/v1/categories/{s.choice(s.categories)}/',
+          'admin'),
+    Route('categories-bulk', 'post', lambda s: '/api/v1/categories/bulk/',
+          'admin', bulk_slugs, 'json'),
+    Route('genres-list', 'get', lambda s: '/api/v1/genres/'),
+    Route('genres-search', 'get',
+          lambda s: f'/api/v1/genres/?search={s.choice(s.words)}'),
+    Route('genres-create', 'post', lambda s: '/api/v1/genres/', 'admin',
+          lambda s: {'name': 'bench', 'slug': f'b{s.next()}'}),
+    Route('genres-delete', 'delete',
+          lambda s: f'/api/v1/genres/{s.choice(s.genres)}/', 'admin'),
+    Route('genres-bulk', 'post', lambda s: '/api/v1/genres/bulk/', 'admin',
+          bulk_slugs, 'json'),
+    Route('titles-list', 'get', lambda s: '/api/v1/titles/'),
+    Route('titles-list-deep', 'get',
+          lambda s: f'/api/v1/titles/?offset={s.titles_count // 2}'),
+    Route('titles-filter-genre', 'get',
+          lambda s: f'/api/v1/titles/?genre={s.choice(s.genres)}'),
+    Route('titles-filter-category', 'get',
+          lambda s: f'/api/v1/titles/?category={s.choice(s.categories)}'),
+    Route('titles-filter-year', 'get',
+          lambda s: f'/api/v1/titles/?year={s.rnd.randint(1900, 2020)}'),
+    Route('titles-filter-name', 'get',
+          lambda s: f'/api/v1/titles/?name={s.choice(s.words)}'),
+    Route('titles-create', 'post', lambda s: '/api/v1/titles/', 'admin',
+          lambda s: {'name': 'bench', 'year': 2000,
+                     'genre': [s.choice(s.genres)],
+                     'category': s.choice(s.categories)}),
+    Route('titles-detail', 'get',
+          lambda s: f'/api/v1/titles/{s.choice(s.titles)}/'),
+    Route('titles-update', 'patch',
+          lambda s: f'/api/v1/titles/{s.choice(s.titles)}/', 'admin',
+          lambda s: {'description': 'bench'}),
+    Route('titles-delete', 'delete',
+          lambda s: f'/api/v1/titles/{s.choice(s.titles)}/', 'admin'),
+    Route('titles-stats', 'get',
+          lambda s: f'/api/v1/titles/{s.choice(s.titles)}/stats/'),
+    Route('titles-top', 'get', lambda s: '/api/v1/titles/top/'),
+    Route('titles-top-genre', 'get',
+          lambda s: f'/api/v1/titles/top/?genre={s.choice(s.genres)}'),
+    Route('titles-trending', 'get', lambda s: '/api/v1/titles/trending/'),
+    Route('titles-bulk', 'post', lambda s: '/api/v1/titles/bulk/', 'admin',
+          lambda s: [{'name': 'bench', 'year': 2000,
+                      'genre': [s.choice(s.genres)],
+                      'category': s.choice(s.categories)}
+                     for _ in range(BULK)], 'json'),
+    Route('titles-bulk-reviews', 'post',
+          lambda s: '/api/v1/titles/reviews/bulk/', 'admin',
+          lambda s: [{'title': s.choice(s.titles),
+                      'author': s.choice(s.usernames),
+                      'text': 'bench', 'score': 5}
+                     for _ in range(BULK)], 'json'),
+    Route('reviews-list', 'get',
+          lambda s: f'/api/v1/titles/{s.choice(s.reviews)[0]}/reviews/'),
+    Route('reviews-create', 'post',
+          lambda s: f'/api/v1/titles/{s.choice(s.titles)}/reviews/',
+          'admin', lambda s: {'text': 'bench', 'score': 5}),
+    Route('reviews-detail', 'get', review_path),
+    Route('reviews-update', 'patch', review_path, 'admin',
+          lambda s: {'text': 'bench'}),
+    Route('reviews-delete', 'delete', review_path, 'admin'),
+    Route('comments-list', 'get',
+          lambda s: comment_path(s).rsplit('/', 2)[0] + '/'),
+    Route('comments-create', 'post',
+          lambda s: comment_path(s).rsplit('/', 2)[0] + '/',
+          'admin', lambda s: {'text': 'bench'}),
+    Route('comments-detail', 'get', comment_path),
+    Route('comments-update', 'patch', comment_path, 'admin',
+          lambda s: {'text': 'bench'}),
+    Route('comments-delete', 'delete', comment_path, 'admin'),
+    Route('export', 'get',
+          lambda s: f'/api/v1/export/{s.choice(sorted(EXPORTS))}/', 'admin'),
+    Route('metrics', 'get', lambda s: '/api/v1/metrics/', 'admin'),
+    Route('cache-stats', 'get', lambda s: '/api/v1/cache/stats/', 'admin'),
+)
+
+
+class Samples:
+    """Random existing objects the routes are called with."""
+
+    def __init__(self, rnd):
+        self.rnd = rnd
+        self.counter = 0
+        self.admin = User.objects.create(
+            username='bench_admin', email='bench_admin@yamdb.fake',
+            role=ADMIN
+        )
+        self.user = User.objects.create(
+            username='bench_user', email='bench_user@yamdb.fake',
+            role=USER, confirmation_code='bench'
+        )
+        self.titles = sample_ids(Title.objects.all(), SAMPLES, rnd)
+        self.titles_count = Title.objects.count()
+        self.usernames = [
+            User.objects.get(pk=pk).username
+            for pk in sample_ids(User.objects.all(), SAMPLES, rnd)
+        ]
+        self.genres = list(Genre.objects.values_list('slug', flat=True))
+        self.categories = list(
+            Categorу.objects.values_list('slug', flat=True)
+        )
+        self.reviews = [
+            Review.objects.values_list('title_id', 'pk').get(pk=pk)
+            for pk in sample_ids(Review.objects.all(), SAMPLES, rnd)
+        ]
+        self.comments = [
+            Comment.objects.values_list(
+                'review__title_id', 'review_id', 'pk'
+            ).get(pk=pk)
+            for pk in sample_ids(Comment.objects.all(), SAMPLES, rnd)
+        ]
+        self.words = [
+            name.split()[0][:4]
+            for name in Title.objects.values_list('name', flat=True)[:20]
+        ]
+        if not all((self.titles, self.genres, self.categories,
+                    self.reviews, self.comments)):
+            raise CommandError(
+                'В наборе данных должны быть произведения, жанры, '
+                'категории, отзывы и комментарии'
+            )
+
+    def choice(self, values):
+        return self.rnd.choice(values)
+
+    def next(self):
+        self.counter += 1
+        return self.counter
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест всех маршрутов API через тестовый клиент Django '
+        'на синтетических данных во временной базе данных. '
+        'Результат выводится в формате JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir',
+            help='Каталог с готовым набором данных (generate_data). '
+                 'Без него данные генерируются заново.',
+        )
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Количество запросов к каждому маршруту',
+        )
+        parser.add_argument(
+            '--routes', nargs='+', choices=[route.name for route in ROUTES],
+            help='Проверить только указанные маршруты',
+        )
+        parser.add_argument('--output', help='Записать результат в файл')
+
+    def handle(self, *args, **options):
+        routes = [
+            route for route in ROUTES
+            if not options['routes'] or route.name in options['routes']
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            data_dir = options['data_dir'] or os.path.join(directory, 'data')
+            if not options['data_dir']:
+                generate(
+                    data_dir,
+                    users=options['users'],
+                    titles=options['titles'],
+                    reviews=options['reviews'],
+                    comments=options['comments'],
+                    seed=options['seed'],
+                )
+            with scratch_database(directory), override_settings(
+                DEBUG=False,
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                # Measure the auth views, not the throttles in front of them.
+                REST_FRAMEWORK={
+                    **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}
+                },
+            ):
+                Importer(data_dir).run()
+                leaderboards.refresh()
+                samples = Samples(random.Random(options['seed']))
+                clients = {
+                    'anon': APIClient(),
+                    'admin': self.client_for(samples.admin),
+                    'user': self.client_for(samples.user),
+                }
+                results = {
+                    route.name: self.measure(
+                        route, clients[route.client], samples,
+                        options['requests']
+                    )
+                    for route in routes
+                }
+        report = {
+            'commit': current_commit(),
+            'database': connection.vendor,
+            'requests_per_route': options['requests'],
+            'routes': results,
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf8') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        return client
+
+    def call(self, route, client, samples):
+        request = getattr(client, route.method)
+        path = route.path(samples)
+        data = route.data(samples)
+        if not route.write:
+            return self.read(request(path, data))
+        with transaction.atomic():
+            response = request(path, data, format=route.format)
+            transaction.set_rollback(True)
+        return response
+
+    def read(self, response):
+        # A streaming body is produced while it is read, time it too.
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def measure(self, route, client, samples, count):
+        with CaptureQueriesContext(connection) as queries:
+            first = self.call(route, client, samples)
+        # Every request resets connection.queries, count them right away.
+        query_count = len(queries.captured_queries)
+        statuses = {first.status_code}
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(count):
+            request_started = time.perf_counter()
+            response = self.call(route, client, samples)
+            latencies.append(time.perf_counter() - request_started)
+            statuses.add(response.status_code)
+        result = summarize(latencies, time.perf_counter() - started) or {}
+        result['url_name'] = first.resolver_match.url_name
+        result['queries'] = query_count
+        result['statuses'] = sorted(statuses)
+        return result
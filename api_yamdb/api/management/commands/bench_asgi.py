@@ -0,0 +1,220 @@
+import asyncio
+import json
+import logging
+import random
+import socket
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer, WSGIRequestHandler,
+)
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test.utils import override_settings
+
+from api.asgi import ASGIHandler
+from api.benchmarks import current_commit, scratch_database, summarize
+from api.datagen import generate
+from api.importer import Importer
+from reviews.models import Comment, Review, Title
+
+SERVERS = ('wsgi', 'asgi')
+HOST = '127.0.0.1'
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BenchWSGIServer(ThreadedWSGIServer):
+    # A thread per connection, as many waiting connections as clients.
+    request_queue_size = 1024
+
+
+@contextmanager
+def wsgi_server():
+    server = BenchWSGIServer((HOST, 0), QuietRequestHandler)
+    server.set_app(get_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        yield server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind((HOST, 0))
+        return probe.getsockname()[1]
+
+
+@contextmanager
+def asgi_server():
+    import uvicorn
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        ASGIHandler(), host=HOST, port=port, lifespan='on',
+        log_level='warning', access_log=False,
+    ))
+    # Signal handlers can only be set in the main thread.
+    server.install_signal_handlers = lambda: None
+    thread = threading.Thread(target=server.run)
+    thread.start()
+    while not server.started and thread.is_alive():
+        time.sleep(0.05)
+    try:
+        yield port
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+async def fetch(port, path):
+    reader, writer = await asyncio.open_connection(HOST, port)
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\n'
+        f'Connection: close\r\n\r\n'.encode()
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def load(port, paths, concurrency):
+    """Requests paths over concurrency connections at a time."""
+    pending = iter(paths)
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        for path in pending:
+            started = time.perf_counter()
+            try:
+                status = await fetch(port, path)
+            except (OSError, IndexError, ValueError):
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность чтения каталога через '
+        'многопоточный WSGI сервер Django и ASGI (uvicorn) при большом '
+        'числе одновременных соединений на синтетических данных во '
+        'временной базе. Серверы и клиент работают в одном процессе. '
+        'Результат выводится в формате JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--servers', nargs='+', choices=SERVERS, default=SERVERS,
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=200,
+            help='Количество одновременных соединений',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=5000,
+            help='Количество запросов к каждому серверу',
+        )
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--titles', type=int, default=200)
+        parser.add_argument('--reviews', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Записать результат в файл')
+
+    def handle(self, *args, **options):
+        if 'asgi' in options['servers']:
+            try:
+                import uvicorn  # noqa: F401
+            except ImportError:
+                raise CommandError(
+                    'Для ASGI сервера установите uvicorn из requirements.txt'
+                )
+        servers = {'wsgi': wsgi_server, 'asgi': asgi_server}
+        rnd = random.Random(options['seed'])
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            data_dir = f'{directory}/data'
+            generate(
+                data_dir,
+                users=options['users'],
+                titles=options['titles'],
+                reviews=options['reviews'],
+                comments=options['comments'],
+                seed=options['seed'],
+            )
+            with scratch_database(directory), override_settings(DEBUG=False):
+                Importer(data_dir).run()
+                paths = self.paths(rnd, options['requests'])
+                for name in options['servers']:
+                    # Per request log lines would be measured too.
+                    logging.disable(logging.WARNING)
+                    try:
+                        with servers[name]() as port:
+                            latencies, errors, elapsed = asyncio.run(
+                                load(port, paths, options['concurrency'])
+                            )
+                    finally:
+                        logging.disable(logging.NOTSET)
+                    results[name] = {
+                        **(summarize(latencies, elapsed) or {}),
+                        'errors': errors,
+                    }
+        report = {
+            'commit': current_commit(),
+            'database': connection.vendor,
+            'concurrency': options['concurrency'],
+            'servers': results,
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf8') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def paths(self, rnd, count):
+        """Random catalog reads, the same for every server."""
+        titles = list(Title.objects.values_list('pk', flat=True))
+        reviews = list(Review.objects.values_list('title_id', 'pk')[:1000])
+        comments = list(Comment.objects.values_list(
+            'review__title_id', 'review_id'
+        )[:1000])
+        if not (titles and reviews and comments):
+            raise CommandError(
+                'В наборе данных должны быть произведения, отзывы и '
+                'комментарии'
+            )
+        routes = (
+            lambda: '/api/v1/titles/',
+            lambda: f'/api/v1/titles/{rnd.choice(titles)}/',
+            lambda: '/api/v1/genres/',
+            lambda: '/api/v1/categories/',
+            lambda: '/api/v1/titles/{}/reviews/'.format(
+                rnd.choice(reviews)[0]
+            ),
+            lambda: '/api/v1/titles/{}/reviews/{}/comments/'.format(
+                *rnd.choice(comments)
+            ),
+        )
+        return [rnd.choice(routes)() for _ in range(count)]
@@ -0,0 +1,101 @@
+import json
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from api.authentication import access_token_for, local_cache
+from api.benchmarks import current_commit, scratch_database, summarize
+from reviews.models import USER, Genre, User
+
+MODES = ('cached', 'stateless')
+PATH = '/api/v1/genres/'
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест аутентифицированных GET запросов с кэшем '
+        'пользователей и с токенами, содержащими роль '
+        '(AUTH_STATELESS_TOKENS), во временной базе данных. '
+        'Результат выводится в формате JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help='Количество запросов в каждом режиме',
+        )
+        parser.add_argument('--output', help='Записать результат в файл')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            with scratch_database(directory), override_settings(DEBUG=False):
+                Genre.objects.create(name='Драма', slug='drama')
+                User.objects.bulk_create(
+                    User(username=f'bench{number}',
+                         email=f'bench{number}@yamdb.fake', role=USER)
+                    for number in range(options['users'])
+                )
+                users = list(User.objects.all())
+                results = {}
+                for mode in MODES:
+                    with override_settings(
+                        AUTH_STATELESS_TOKENS=mode == 'stateless'
+                    ):
+                        clients = [self.client_for(user) for user in users]
+                        for cold in (False, True):
+                            name = f'{mode}-cold' if cold else mode
+                            results[name] = self.measure(
+                                clients, options['requests'], cold
+                            )
+        report = {
+            'commit': current_commit(),
+            'database': connection.vendor,
+            'path': PATH,
+            'users': options['users'],
+            'modes': results,
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf8') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {access_token_for(user)}'
+        )
+        return client
+
+    def measure(self, clients, count, cold):
+        """
+        Requests go to the users in turn. A cold run empties the user
+        cache before every request, as a fresh process would see it.
+        """
+        local_cache.clear()
+        user_queries = 0
+        statuses = set()
+        latencies = []
+        started = time.perf_counter()
+        for number in range(count):
+            if cold:
+                local_cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                request_started = time.perf_counter()
+                response = clients[number % len(clients)].get(PATH)
+                latencies.append(time.perf_counter() - request_started)
+            # Every request resets connection.queries, count them right away.
+            user_queries += sum(
+                User._meta.db_table in query['sql']
+                for query in queries.captured_queries
+            )
+            statuses.add(response.status_code)
+        result = summarize(latencies, time.perf_counter() - started) or {}
+        result['user_queries'] = user_queries
+        result['statuses'] = sorted(statuses)
+        return result
@@ -0,0 +1,180 @@
+import itertools
+import json
+import random
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+
+from api.benchmarks import current_commit, scratch_database, summarize
+from reviews.models import Categorу, Genre, GenreTitle, Review, Title, User
+
+# The connection setup before api/database.py: rollback journal,
+# fsync on every commit, the 5 s timeout of the sqlite3 module and a new
+# connection for every request.
+BASELINE = {
+    'pragmas': {
+        'journal_mode': 'DELETE', 'synchronous': 'FULL', 'mmap_size': 0,
+        'busy_timeout': 5000,
+    },
+    'persistent': False,
+}
+
+
+def configured():
+    database = settings.DATABASES['default']
+    return {
+        'pragmas': database.get('PRAGMAS', {}),
+        'persistent': database.get('CONN_MAX_AGE', 0) != 0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест базы данных: несколько потоков одновременно '
+        'создают отзывы и читают списки произведений во временной базе. '
+        'Для SQLite сравниваются прежние и текущие настройки соединения. '
+        'Результат выводится в формате JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--operations', type=int, default=200,
+            help='Количество операций в каждом потоке',
+        )
+        parser.add_argument(
+            '--write-share', type=float, default=0.3,
+            help='Доля операций записи',
+        )
+        parser.add_argument('--titles', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Записать результат в файл')
+
+    def handle(self, *args, **options):
+        profiles = {'configured': configured()}
+        if connection.vendor == 'sqlite':
+            profiles = {'baseline': BASELINE, **profiles}
+        with tempfile.TemporaryDirectory() as directory:
+            with scratch_database(directory):
+                self.titles, self.users = self.populate(options)
+                # Numbers of the written reviews, shared by the threads.
+                numbers = itertools.count()
+                results = {
+                    name: self.measure(profile, numbers, options)
+                    for name, profile in profiles.items()
+                }
+        report = {
+            'commit': current_commit(),
+            'database': connection.vendor,
+            'threads': options['threads'],
+            'operations_per_thread': options['operations'],
+            'write_share': options['write_share'],
+            'profiles': results,
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf8') as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def populate(self, options):
+        category = Categorу.objects.create(name='Категория', slug='bench')
+        genre = Genre.objects.create(name='Жанр', slug='bench')
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {number}', year=2000,
+                  category=category)
+            for number in range(options['titles'])
+        )
+        titles = list(Title.objects.values_list('pk', flat=True))
+        GenreTitle.objects.bulk_create(
+            GenreTitle(title_id=pk, genre=genre) for pk in titles
+        )
+        writes = options['threads'] * options['operations'] * 2
+        User.objects.bulk_create(
+            User(username=f'bench{number}',
+                 email=f'bench{number}@yamdb.fake')
+            for number in range(writes // len(titles) + 1)
+        )
+        users = list(User.objects.values_list('pk', flat=True))
+        return titles, users
+
+    def measure(self, profile, numbers, options):
+        database = settings.DATABASES['default']
+        pragmas = database.get('PRAGMAS')
+        database['PRAGMAS'] = profile['pragmas']
+        # Switching the journal mode needs the only connection to the file.
+        connection.close()
+        results = []
+        barrier = threading.Barrier(options['threads'] + 1)
+        threads = [
+            threading.Thread(target=self.work, args=(
+                profile, numbers, options, options['seed'] + number, barrier,
+                results,
+            ))
+            for number in range(options['threads'])
+        ]
+        try:
+            for thread in threads:
+                thread.start()
+            barrier.wait()
+            started = time.perf_counter()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            database['PRAGMAS'] = pragmas
+            connection.close()
+        reads = [latency for read, _, _ in results for latency in read]
+        writes = [latency for _, write, _ in results for latency in write]
+        return {
+            'reads': summarize(reads, elapsed),
+            'writes': summarize(writes, elapsed),
+            'errors': sum(errors for _, _, errors in results),
+            'throughput_rps': round((len(reads) + len(writes)) / elapsed, 1),
+        }
+
+    def work(self, profile, numbers, options, seed, barrier, results):
+        rnd = random.Random(seed)
+        reads, writes, errors = [], [], 0
+        try:
+            connection.ensure_connection()
+            barrier.wait()
+            for _ in range(options['operations']):
+                write = rnd.random() < options['write_share']
+                started = time.perf_counter()
+                try:
+                    if write:
+                        self.write(next(numbers), rnd)
+                    else:
+                        self.read(rnd)
+                except OperationalError:
+                    errors += 1
+                else:
+                    latency = time.perf_counter() - started
+                    (writes if write else reads).append(latency)
+                if not profile['persistent']:
+                    connection.close()
+        finally:
+            connection.close()
+            results.append((reads, writes, errors))
+
+    def write(self, number, rnd):
+        """Every write reviews a new (title, author) pair."""
+        with transaction.atomic():
+            Review.objects.create(
+                title_id=self.titles[number % len(self.titles)],
+                author_id=self.users[number // len(self.titles)],
+                text='bench',
+                score=rnd.randint(1, 10),
+            )
+
+    def read(self, rnd):
+        titles = Title.objects.select_related('category').prefetch_related(
+            'genre'
+        ).order_by('-rating', 'id')
+        offset = rnd.randrange(titles.count())
+        list(titles[offset:offset + 10])
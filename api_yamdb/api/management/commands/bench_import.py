@@ -0,0 +1,76 @@
+import json
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.benchmarks import scratch_database
+from api.datagen import generate
+from api.importer import TABLES_BY_NAME, Importer
+from reviews.models import Comment, Review
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость import_csv с разным количеством процессов '
+        'на синтетических данных во временной базе данных'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000,
+                            help='Количество отзывов')
+        parser.add_argument('--comments', type=int,
+                            help='Количество комментариев, по умолчанию '
+                                 'равно количеству отзывов')
+        parser.add_argument('--workers', type=int, nargs='+',
+                            default=[1, 2, 4, 8])
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        comments = options['comments']
+        if comments is None:
+            comments = options['rows']
+        with tempfile.TemporaryDirectory() as data_dir:
+            generate(
+                data_dir,
+                users=max(1000, options['rows'] // 100),
+                titles=1000,
+                reviews=options['rows'],
+                comments=comments,
+                seed=options['seed'],
+            )
+            with scratch_database(data_dir):
+                Importer(data_dir, batch_size=options['batch_size']).run(
+                    [TABLES_BY_NAME[name]
+                     for name in ('users', 'categories', 'genres', 'titles')]
+                )
+                results = [
+                    self.measure(data_dir, workers, options['batch_size'])
+                    for workers in options['workers']
+                ]
+        self.stdout.write(json.dumps({
+            'reviews': options['rows'],
+            'comments': comments,
+            'results': results,
+        }, indent=2))
+
+    def measure(self, data_dir, workers, batch_size):
+        with connection.cursor() as cursor:
+            for model in (Comment, Review):
+                cursor.execute(f'DELETE FROM {model._meta.db_table}')
+        importer = Importer(data_dir, batch_size=batch_size, workers=workers)
+        started = time.monotonic()
+        reports = importer.run(
+            [TABLES_BY_NAME['reviews'], TABLES_BY_NAME['comments']]
+        )
+        elapsed = time.monotonic() - started
+        rows = sum(report.inserted for report in reports)
+        return {
+            'workers': workers,
+            'rows': rows,
+            'errors': sum(report.errors for report in reports),
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(rows / elapsed),
+        }
@@ -0,0 +1,45 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from api.export import CSV, EXPORTS, FORMATS, lines
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает таблицы в csv файлы формата static/data, '
+        'которые можно загрузить обратно командой import_csv, или в ndjson'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'data_dir',
+            help='Каталог для выгруженных файлов',
+        )
+        parser.add_argument(
+            '--output', choices=FORMATS, default=CSV,
+            help='Формат файлов',
+        )
+        parser.add_argument(
+            '--tables',
+            nargs='+',
+            choices=list(EXPORTS),
+            help='Выгрузить только указанные таблицы',
+        )
+
+    def handle(self, *args, **options):
+        os.makedirs(options['data_dir'], exist_ok=True)
+        for name, export in EXPORTS.items():
+            if options['tables'] and name not in options['tables']:
+                continue
+            path = os.path.join(
+                options['data_dir'], export.filename(options['output'])
+            )
+            written = 0
+            with open(path, 'w', encoding='utf8', newline='') as target:
+                for line in lines(export, options['output']):
+                    target.write(line)
+                    written += 1
+            if options['output'] == CSV:
+                written -= 1  # header
+            self.stdout.write(f'{path}: {written} строк')
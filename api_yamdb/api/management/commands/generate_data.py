@@ -0,0 +1,61 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.datagen import generate
+from api.importer import Importer
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует воспроизводимый синтетический набор данных '
+        'в формате static/data/*.csv'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir',
+            default=os.path.join(settings.BASE_DIR, 'generated_data'),
+            help='Каталог для csv файлов',
+        )
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа для популярности',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--load',
+            action='store_true',
+            help='Сразу загрузить данные в базу через import_csv',
+        )
+
+    def handle(self, *args, **options):
+        for option in ('users', 'titles'):
+            if options[option] < 1:
+                raise CommandError(f'--{option} должен быть больше нуля')
+        started = time.monotonic()
+        written = generate(
+            options['output_dir'],
+            users=options['users'],
+            titles=options['titles'],
+            reviews=options['reviews'],
+            comments=options['comments'],
+            seed=options['seed'],
+            skew=options['skew'],
+        )
+        for filename, rows in written.items():
+            self.stdout.write(f'{filename}: {rows}')
+        self.stdout.write(
+            f'Данные записаны в {options["output_dir"]} '
+            f'за {time.monotonic() - started:.1f} с'
+        )
+        if options['load']:
+            Importer(options['output_dir'], stdout=self.stdout).run()
@@ -1,220 +1,118 @@
-from csv import DictReader
+import csv
+import os
+import time
+
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from django.shortcuts import get_object_or_404
+from django.core.management.base import BaseCommand, CommandError
 
-from reviews.models import (
-    User, Categorу, Comment, Review, Genre, GenreTitle, Title
+from api.importer import (
+    DEFAULT_BATCH_SIZE, DEFAULT_CHUNK_BYTES, TABLES, Importer,
 )
 
-ALREDY_LOADED_CATEGORY_ERROR_MESSAGE = """
-Если необходимо снова загрузить данные CATEGORY из CSV файлов,
-сначала удалите файо db.sqlite3 для очистки базы данных.
-Затем запустите `python manage.py migrate` для создания пустой
-базы данных с таблицами"""
-
-ALREDY_LOADED_COMMENT_ERROR_MESSAGE = """
-Если необходимо снова загрузить данные COMMENT из CSV файлов,
-сначала удалите файо db.sqlite3 для очистки базы данных.
-Затем запустите `python manage.py migrate` для создания пустой
-базы данных с таблицами"""
-
-ALREDY_LOADED_GENRE_ERROR_MESSAGE = """
-Если необходимо снова загрузить данные COMMENT из CSV файлов,
-сначала удалите файо db.sqlite3 для очистки базы данных.
-Затем запустите `python manage.py migrate` для создания пустой
-базы данных с таблицами"""
-
-ALREDY_LOADED_GENRETITLE_ERROR_MESSAGE = """
-Если необходимо снова загрузить данные COMMENT из CSV файлов,
-сначала удалите файо db.sqlite3 для очистки базы данных.
-Затем запустите `python manage.py migrate` для создания пустой
-базы данных с таблицами"""
-
-ALREDY_LOADED_REVIEW_ERROR_MESSAGE = """
-Если необходимо снова загрузить данные COMMENT из CSV файлов,
-сначала удалите файо db.sqlite3 для очистки базы данных.
-Затем запустите `python manage.py migrate` для создания пустой
-базы данных с таблицами"""
-
-ALREDY_LOADED_TITLE_ERROR_MESSAGE = """
-Если необходимо снова загрузить данные COMMENT из CSV файлов,
-сначала удалите файо db.sqlite3 для очистки базы данных.
-Затем запустите `python manage.py migrate` для создания пустой
-базы данных с таблицами"""
-
-ALREDY_LOADED_USER_ERROR_MESSAGE = """
-Если необходимо снова загрузить данные COMMENT из CSV файлов,
-сначала удалите файо db.sqlite3 для очистки базы данных.
-Затем запустите `python manage.py migrate` для создания пустой
-базы данных с таблицами"""
 
+class Command(BaseCommand):
+    help = "Загружает данные из *.csv"
 
-def get_category():
-    if Categorу.objects.exists():
-        print('данные CATEGORY уже загружены')
-        print(ALREDY_LOADED_CATEGORY_ERROR_MESSAGE)
-        return
-    print('Загружаю данные CATEGORY')
-    for row in DictReader(
-        open(
-            f'{settings.BASE_DIR}/static/data/category.csv',
-            'r',
-            encoding="utf8"
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Каталог с csv файлами',
         )
-    ):
-        category = Categorу(
-            name=row['name'],
-            slug=row['slug']
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одной транзакции',
         )
-        category.save()
-
-
-def get_comment():
-    if Comment.objects.exists():
-        print('данные COMMENT уже загружены')
-        print(ALREDY_LOADED_COMMENT_ERROR_MESSAGE)
-        return
-    print('Загружаю данные COMMENT')
-    for row in DictReader(
-        open(
-            f'{settings.BASE_DIR}/static/data/comments.csv',
-            'r',
-            encoding="utf8"
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество процессов для разбора файлов',
         )
-    ):
-        review_obj = get_object_or_404(Review, pk=row['review_id'])
-        author_obj = get_object_or_404(User, pk=row['author'])
-        comment = Comment(
-            id=row['id'],
-            review=review_obj,
-            text=row['text'],
-            author=author_obj,
-            pub_date=row['pub_date']
+        parser.add_argument(
+            '--chunk-bytes',
+            type=int,
+            default=DEFAULT_CHUNK_BYTES,
+            help='Размер части файла для одного процесса, в байтах',
         )
-        comment.save()
-
-
-def get_genre():
-    if Genre.objects.exists():
-        print('данные GENRE уже загружены')
-        print(ALREDY_LOADED_GENRE_ERROR_MESSAGE)
-        return
-    print('Загружаю данные GENRE')
-    for row in DictReader(open(
-            f'{settings.BASE_DIR}/static/data/genre.csv',
-            'r',
-            encoding="utf8"
-    )):
-        genre = Genre(
-            name=row['name'],
-            slug=row['slug']
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Дозагрузить новые и изменённые строки в заполненные '
+                 'таблицы, продолжая с сохранённой точки',
         )
-        genre.save()
-
-
-def get_genretitle():
-    if GenreTitle.objects.exists():
-        print('данные GENRETITLE уже загружены')
-        print(ALREDY_LOADED_GENRETITLE_ERROR_MESSAGE)
-        return
-    print('Загружаю данные GENRETITLE')
-    for row in DictReader(
-        open(
-            f'{settings.BASE_DIR}/static/data/genre_title.csv',
-            'r',
-            encoding="utf8"
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='С --incremental: читать файлы с начала, '
+                 'игнорируя сохранённые точки',
         )
-    ):
-        title_obj = get_object_or_404(Title, id=row['title_id'])
-        genre_obj = get_object_or_404(Genre, id=row['genre_id'])
-        genre_title = GenreTitle(
-            id=row['id'],
-            title=title_obj,
-            genre=genre_obj
+        parser.add_argument(
+            '--error-log',
+            help='Файл для записи отклонённых строк (csv)',
+        )
+        parser.add_argument(
+            '--tables',
+            nargs='+',
+            choices=[table.name for table in TABLES],
+            help='Загрузить только указанные таблицы',
         )
-        genre_title.save()
-
 
-def get_review():
-    if Review.objects.exists():
-        print('данные уже REVIEW загружены')
-        print(ALREDY_LOADED_REVIEW_ERROR_MESSAGE)
-        return
-    print('Загружаю данные REVIEW')
-    try:
-        for row in DictReader(open(
-                f'{settings.BASE_DIR}/static/data/review.csv',
-                'r',
-                encoding="utf8"
-        )):
-            title_obj = get_object_or_404(Title, id=row['title_id'])
-            author_obj = get_object_or_404(User, id=row['author'])
-            review = Review(
-                id=row['id'],
-                title=title_obj,
-                text=row['text'],
-                author=author_obj,
-                score=row['score'],
-                pub_date=row['pub_date']
+    def handle(self, *args, **options):
+        for option in ('batch_size', 'workers', 'chunk_bytes'):
+            if options[option] < 1:
+                raise CommandError(
+                    f'--{option.replace("_", "-")} должен быть больше нуля'
+                )
+        if options['incremental'] and options['workers'] > 1:
+            raise CommandError('--incremental работает только с --workers 1')
+        tables = [
+            table for table in TABLES
+            if not options['tables'] or table.name in options['tables']
+        ]
+        error_log = None
+        if options['error_log']:
+            error_log = open(
+                options['error_log'], 'w', encoding='utf8', newline=''
             )
-            review.save()
-    except Exception:
-        pass
-
-
-def get_title():
-    if Title.objects.exists():
-        print('данные уже TITLE загружены')
-        print(ALREDY_LOADED_TITLE_ERROR_MESSAGE)
-        return
-    print('Загружаю данные TITLE')
-    for row in DictReader(open(
-            f'{settings.BASE_DIR}/static/data/titles.csv',
-            'r',
-            encoding="utf8"
-    )):
-        category_obj = get_object_or_404(Categorу, id=row['category'])
-        title = Title(
-            id=row['id'],
-            name=row['name'],
-            year=row['year'],
-            category=category_obj
+            writer = csv.writer(error_log)
+            writer.writerow(('table', 'line', 'id', 'error'))
+
+        def on_error(table, line, row, message):
+            if error_log is None:
+                self.stderr.write(
+                    f'{table.filename}:{line or "?"} '
+                    f'id={row.get("id")}: {message}'
+                )
+            else:
+                writer.writerow((table.name, line, row.get('id'), message))
+
+        importer = Importer(
+            options['data_dir'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            chunk_bytes=options['chunk_bytes'],
+            incremental=options['incremental'],
+            restart=options['restart'],
+            on_error=on_error,
+            stdout=self.stdout,
         )
-        title.save()
-
-
-def get_user():
-    if User.objects.exists():
-        print('данные USER уже загружены')
-        print(ALREDY_LOADED_USER_ERROR_MESSAGE)
-        return
-    print('Загружаю данные USER')
-    for row in DictReader(open(
-            f'{settings.BASE_DIR}/static/data/users.csv',
-            'r',
-            encoding="utf8"
-    )):
-        user = User(
-            id=row['id'],
-            username=row['username'],
-            email=row['email'],
-            role=row['role'],
-            bio=row['bio'],
-            first_name=row['first_name'],
-            last_name=row['last_name']
+        started = time.monotonic()
+        try:
+            reports = importer.run(tables)
+        finally:
+            if error_log is not None:
+                error_log.close()
+        elapsed = time.monotonic() - started
+        inserted = sum(report.inserted for report in reports)
+        updated = sum(report.updated for report in reports)
+        errors = sum(report.errors for report in reports)
+        rows = inserted + updated
+        self.stdout.write(
+            f'Всего загружено {inserted} и обновлено {updated} строк '
+            f'за {elapsed:.2f} с '
+            f'({rows / elapsed if elapsed else 0:.0f} строк/с), '
+            f'ошибок {errors}'
         )
-        user.save()
-
-
-class Command(BaseCommand):
-    help = "Загружает данные из *.csv"
-
-    def handle(self, *args, **options):
-        get_user()
-        get_category()
-        get_genre()
-        get_title()
-        get_review()
-        get_comment()
-        get_genretitle()
@@ -0,0 +1,43 @@
+from django.core.management.commands import migrate
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+# Tables of reviews/migrations/0001_initial.py.
+INITIAL_TABLES = {
+    'reviews_user', 'reviews_categorу', 'reviews_genre', 'reviews_title',
+    'reviews_genretitle', 'reviews_review', 'reviews_comment',
+}
+
+
+def adopt_syncdb_schema(connection):
+    """
+    Marks reviews.0001_initial as applied on a database created by
+    migrate --run-syncdb before the app had migrations. Its tables are
+    already there, and Django refuses to migrate a database where
+    admin.0001_initial is applied before the migration it depends on.
+    Returns True if the migration was marked.
+    """
+    recorder = MigrationRecorder(connection)
+    if (
+        not recorder.has_table()
+        or recorder.migration_qs.filter(app='reviews').exists()
+        or not INITIAL_TABLES <= set(connection.introspection.table_names())
+    ):
+        return False
+    recorder.record_applied('reviews', '0001_initial')
+    return True
+
+
+class Command(migrate.Command):
+    help = (
+        f'{migrate.Command.help} База, созданная migrate --run-syncdb '
+        'до появления миграций reviews, принимается как reviews.0001_initial.'
+    )
+
+    def handle(self, *args, **options):
+        if adopt_syncdb_schema(connections[options['database']]):
+            self.stdout.write(
+                'Таблицы reviews уже созданы, миграция reviews.0001_initial '
+                'отмечена применённой'
+            )
+        super().handle(*args, **options)
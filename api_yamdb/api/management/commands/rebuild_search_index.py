@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.search import KINDS, get_backend, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Пересоздаёт поисковый индекс произведений, жанров и категорий'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kinds',
+            nargs='*',
+            help=f'Что переиндексировать: {", ".join(KINDS)}. '
+                 'По умолчанию всё',
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['kinds']) - set(KINDS)
+        if unknown:
+            raise CommandError(f'Неизвестный индекс: {", ".join(unknown)}')
+        kinds = [KINDS[name] for name in options['kinds']] or None
+        rebuild(kinds)
+        self.stdout.write(
+            f'Поисковый индекс ({type(get_backend()).__name__}) пересоздан'
+        )
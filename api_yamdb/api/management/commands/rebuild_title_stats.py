@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import ALL, invalidate, title_scopes
+from reviews.stats import rebuild_title_ratings, rebuild_title_scores
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг, количество отзывов и распределение оценок '
+        'произведений'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'title_ids',
+            nargs='*',
+            type=int,
+            help='id произведений, по умолчанию пересчитываются все',
+        )
+
+    def handle(self, *args, **options):
+        title_ids = options['title_ids'] or None
+        updated = rebuild_title_ratings(title_ids)
+        rebuild_title_scores(title_ids)
+        if options['title_ids']:
+            invalidate(*title_scopes(options['title_ids']))
+        else:
+            invalidate(ALL)
+        self.stdout.write(f'Пересчитано произведений: {updated}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.leaderboards import refresh
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинговые таблицы лучших и обсуждаемых '
+        'произведений, запускается по расписанию'
+    )
+
+    def handle(self, *args, **options):
+        rows = refresh()
+        self.stdout.write(f'Рейтинговые таблицы обновлены, строк: {rows}')
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.mail import send_queued
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди пачками через одно SMTP соединение '
+        'на пачку, неудачные отправки повторяются с нарастающей паузой'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.MAIL_QUEUE_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не завершаться, а ждать новые письма',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста (с --loop)',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            sent, claimed = send_queued(options['batch_size'])
+            total += sent
+            if claimed < options['batch_size']:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        self.stdout.write(f'Отправлено писем: {total}')
@@ -0,0 +1,220 @@
+"""
+Per request instrumentation of the API.
+
+MetricsMiddleware measures the wall time of every request, the number and
+total time of its database queries and the time spent validating and
+serializing data, and names the request after the view and the action
+that handled it, e.g. TitleViewSet.list. The numbers are sent in the
+Server-Timing header, logged by the api.metrics logger and added to
+in-process histograms that /api/v1/metrics/ renders in the Prometheus
+text format.
+
+Queries are counted with connection.execute_wrapper, so DEBUG may stay
+off; the cost per request is a few clock reads and a dict update under a
+lock. Histograms live in the process: with several workers every worker
+is a separate scrape target. Queries run while a streaming response is
+consumed happen after the middleware returns and are not counted.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN = 'unknown'
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERIES = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Counters of one request, also the execute_wrapper of its queries."""
+
+    __slots__ = ('view', 'queries', 'db_time', 'serializer_time', 'nested')
+
+    def __init__(self):
+        self.view = UNKNOWN
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.nested = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+class Histogram:
+    """A Prometheus histogram with a view label."""
+
+    def __init__(self, name, description, buckets):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, view, value):
+        series = self.series.get(view)
+        if series is None:
+            series = self.series[view] = [[0] * (len(self.buckets) + 1), 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self):
+        yield f'# HELP {self.name} {self.description}'
+        yield f'# TYPE {self.name} histogram'
+        for view, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                yield (
+                    f'{self.name}_bucket{{view="{view}",le="{bound}"}} '
+                    f'{cumulative}'
+                )
+            yield f'{self.name}_sum{{view="{view}"}} {total}'
+            yield f'{self.name}_count{{view="{view}"}} {cumulative}'
+
+
+HISTOGRAMS = (
+    Histogram(
+        'yamdb_request_duration_seconds', 'Wall time of requests.', SECONDS
+    ),
+    Histogram('yamdb_db_queries', 'Database queries per request.', QUERIES),
+    Histogram(
+        'yamdb_db_duration_seconds', 'Database time per request.', SECONDS
+    ),
+    Histogram(
+        'yamdb_serializer_duration_seconds',
+        'Serializer validation and rendering time per request.', SECONDS
+    ),
+)
+RESPONSES = 'yamdb_responses_total'
+_responses = {}
+_lock = threading.Lock()
+
+
+def record(metrics, status, duration):
+    values = (
+        duration, metrics.queries, metrics.db_time, metrics.serializer_time
+    )
+    with _lock:
+        for histogram, value in zip(HISTOGRAMS, values):
+            histogram.observe(metrics.view, value)
+        key = (metrics.view, status)
+        _responses[key] = _responses.get(key, 0) + 1
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        lines = [line for histogram in HISTOGRAMS
+                 for line in histogram.render()]
+        lines.append(f'# HELP {RESPONSES} Responses by view and status.')
+        lines.append(f'# TYPE {RESPONSES} counter')
+        lines.extend(
+            f'{RESPONSES}{{view="{view}",status="{status}"}} {count}'
+            for (view, status), count in sorted(_responses.items())
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    with _lock:
+        for histogram in HISTOGRAMS:
+            histogram.series.clear()
+        _responses.clear()
+
+
+def view_name(view_func, method):
+    """ViewSet.action for viewsets, the class or function name otherwise."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', UNKNOWN)
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower())
+    return f'{cls.__name__}.{action}' if action else cls.__name__
+
+
+def timed(method):
+    """Adds the run time of a serializer method to the current request."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        metrics = _current.get()
+        # Nested and list serializers are counted once, by the outermost.
+        if metrics is None or metrics.nested:
+            return method(self, *args, **kwargs)
+        metrics.nested = True
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            metrics.serializer_time += time.perf_counter() - started
+            metrics.nested = False
+    return wrapper
+
+
+def instrument_serializers():
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        cls.data = property(timed(cls.data.fget))
+    for cls in (serializers.BaseSerializer, serializers.ListSerializer):
+        cls.is_valid = timed(cls.is_valid)
+
+
+def server_timing(metrics, duration):
+    return (
+        f'db;dur={metrics.db_time * 1000:.1f};'
+        f'desc="{metrics.queries} queries", '
+        f'serializer;dur={metrics.serializer_time * 1000:.1f}, '
+        f'total;dur={duration * 1000:.1f}'
+    )
+
+
+class MetricsMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - started
+        record(metrics, response.status_code, duration)
+        response['Server-Timing'] = server_timing(metrics, duration)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                'view=%s method=%s path=%s status=%s duration_ms=%.1f '
+                'queries=%d db_ms=%.1f serializer_ms=%.1f',
+                metrics.view, request.method, request.path,
+                response.status_code, duration * 1000, metrics.queries,
+                metrics.db_time * 1000, metrics.serializer_time * 1000,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view = view_name(view_func, request.method)
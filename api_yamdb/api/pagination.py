@@ -0,0 +1,145 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from functools import reduce
+from operator import and_, or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination with an opt-in keyset mode.
+
+    A request with the cursor query parameter (an empty one for the first
+    page) is paginated by the ordering fields instead of an offset:
+    the cursor stores the ordering values of the last row of the page and
+    the next page is filtered with WHERE (a, b) < (x, y) ORDER BY a, b,
+    so a deep page costs the same as the first one. The last ordering
+    field must be unique. Cursor responses have no count.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+    ordering = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            self.limit = self.default_limit
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+        position, self.reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [self.flip(name) for name in ordering]
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+        rows = list(queryset.order_by(*ordering)[:self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if self.reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+        self.next_position = self.previous_position = None
+        if rows and has_next:
+            self.next_position = self.position(rows[-1])
+        if rows and has_previous:
+            self.previous_position = self.position(rows[0])
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.encode_cursor(self.next_position, reverse=False)),
+            ('previous', self.encode_cursor(
+                self.previous_position, reverse=True
+            )),
+            ('results', data),
+        ]))
+
+    @staticmethod
+    def flip(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+    def position(self, obj):
+        return [field.value_to_string(obj) for field in self.fields]
+
+    def after(self, ordering, position):
+        """
+        Rows strictly after position in the given ordering. The leading
+        field is bounded on its own too, so the index range starts right
+        at the cursor instead of at the beginning of the table.
+        """
+        values = []
+        for field, value in zip(self.fields, position):
+            try:
+                values.append(field.to_python(value))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        lookups = [
+            (field.name, 'lt' if name.startswith('-') else 'gt')
+            for field, name in zip(self.fields, ordering)
+        ]
+        conditions = []
+        for index, (name, lookup) in enumerate(lookups):
+            equal = {
+                field: value
+                for (field, _), value in zip(lookups[:index], values)
+            }
+            conditions.append(
+                Q(**equal, **{f'{name}__{lookup}': values[index]})
+            )
+        name, lookup = lookups[0]
+        bound = Q(**{f'{name}__{lookup}e': values[0]})
+        return reduce(and_, (bound, reduce(or_, conditions)))
+
+    def decode_cursor(self, request):
+        cursor = request.query_params[self.cursor_query_param]
+        if not cursor:
+            return None, False
+        try:
+            data = json.loads(b64decode(cursor.encode('ascii')).decode())
+            position, reverse = data['p'], bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or (
+            len(position) != len(self.fields)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse):
+        if position is None:
+            return None
+        data = {'p': position}
+        if reverse:
+            data['r'] = 1
+        cursor = b64encode(
+            json.dumps(data, ensure_ascii=False).encode()
+        ).decode('ascii')
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.offset_query_param
+        )
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+
+class TitlePagination(KeysetPagination):
+    ordering = ('name', 'id')
+
+
+class ReviewAndCommentPagination(KeysetPagination):
+    ordering = ('-pub_date', '-id')
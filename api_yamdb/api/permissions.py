@@ -35,5 +35,5 @@ class IsAdminModeratorOwnerOrReadOnly(permissions.IsAuthenticatedOrReadOnly):
             or (not request.user.is_anonymous and (
                 request.user.is_admin
                 or request.user.is_moderator
-                or obj.author == request.user))
+                or obj.author_id == request.user.id))
         )
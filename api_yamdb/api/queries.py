@@ -0,0 +1,113 @@
+"""
+Slow query log and N+1 detector.
+
+QueryInspector is a connection.execute_wrapper that counts the queries of
+a request by their SQL and times each of them. Queries slower than
+SLOW_QUERY_MS are logged with the view that ran them. When the request
+ends, queries are grouped by normalized SQL (literals and IN lists
+collapsed) and every group repeated N_PLUS_ONE_THRESHOLD times or more
+is reported as an N+1: logged, or raised as NPlusOneError when
+QUERY_INSPECTOR_STRICT is on, which the test suite does.
+
+Only the raw SQL string is counted per query, normalization runs once
+per distinct statement at the end of the request.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import UNKNOWN, view_name
+
+logger = logging.getLogger(__name__)
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LISTS = re.compile(r'\bIN \((?:[^()]|\([^()]*\))*\)', re.I)
+
+
+class NPlusOneError(AssertionError):
+    """The same query repeated within one request."""
+
+
+def normalize(sql):
+    return IN_LISTS.sub('IN (...)', LITERALS.sub('?', sql))
+
+
+class QueryInspector:
+
+    def __init__(self, threshold, slow_ms, view=UNKNOWN):
+        self.threshold = threshold
+        self.slow = slow_ms / 1000
+        self.view = view
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.statements[sql] += 1
+            if self.slow and duration >= self.slow:
+                logger.warning(
+                    'slow query view=%s duration_ms=%.1f sql=%s',
+                    self.view, duration * 1000, sql,
+                )
+
+    def repeated(self):
+        """[(count, normalized sql), ...] of the N+1 candidates."""
+        if not self.threshold:
+            return []
+        groups = Counter()
+        for sql, count in self.statements.items():
+            groups[normalize(sql)] += count
+        return [
+            (count, sql) for sql, count in groups.most_common()
+            if count >= self.threshold
+        ]
+
+    def check(self, strict):
+        for count, sql in self.repeated():
+            message = f'N+1 view={self.view} count={count} sql={sql}'
+            if strict:
+                raise NPlusOneError(message)
+            logger.warning(message)
+
+
+@contextmanager
+def inspect_queries(threshold=None, slow_ms=None, strict=None,
+                    view=UNKNOWN):
+    """Inspects the queries run inside the block on every database."""
+    inspector = QueryInspector(
+        settings.N_PLUS_ONE_THRESHOLD if threshold is None else threshold,
+        settings.SLOW_QUERY_MS if slow_ms is None else slow_ms,
+        view,
+    )
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(inspector))
+        yield inspector
+    inspector.check(
+        settings.QUERY_INSPECTOR_STRICT if strict is None else strict
+    )
+
+
+class QueryInspectorMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.N_PLUS_ONE_THRESHOLD and not settings.SLOW_QUERY_MS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with inspect_queries() as inspector:
+            request._query_inspector = inspector
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_inspector.view = view_name(view_func, request.method)
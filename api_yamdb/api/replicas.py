@@ -0,0 +1,80 @@
+"""
+Read replicas.
+
+ReplicaMiddleware picks one of DATABASE_REPLICAS for a request with a
+safe method and ReplicaRouter sends the reads of that request there;
+writes, unsafe requests and everything outside a request (management
+commands, shell) use the primary. After a successful write the client,
+identified by its Authorization header or its address, reads from the
+primary for REPLICA_STICKY_SECONDS, so it sees its own changes while
+the replicas catch up. The pin is kept in the default cache, which
+must be shared by the processes of the server for it to work across them.
+The response cache does not store replica reads of recently changed
+scopes for the same window, see api/cache.py.
+"""
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+_database = ContextVar('read_database', default=None)
+
+
+def reading_replica():
+    """Whether the reads of the current request go to a replica."""
+    return _database.get() is not None
+
+
+def client_key(request):
+    client = (
+        request.META.get('HTTP_AUTHORIZATION')
+        or request.META.get('REMOTE_ADDR', '')
+    )
+    return f'replica:pin:{hashlib.sha1(client.encode()).hexdigest()}'
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return _database.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                cache.set(
+                    client_key(request), True,
+                    settings.REPLICA_STICKY_SECONDS
+                )
+            return response
+        database = None
+        if not cache.get(client_key(request)):
+            database = random.choice(settings.DATABASE_REPLICAS)
+        token = _database.set(database)
+        try:
+            return self.get_response(request)
+        finally:
+            _database.reset(token)
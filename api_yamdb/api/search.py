@@ -0,0 +1,406 @@
+"""
+Full-text search over titles, genres and categories.
+
+A query is split into words and every word matches as a prefix, so
+`пов тур` finds `Поворот туда`. Matches are ranked by relevance, title
+names weigh more than descriptions. The index lives in a backend chosen
+by the SEARCH_BACKEND setting:
+
+- fts5: SQLite FTS5 virtual tables, one per kind, rowid is the pk;
+- postgresql: one table of tsvector documents with a GIN index;
+- python: an in-memory inverted index built on first use, for databases
+  without full-text search. It is kept per process, so it only suits a
+  single process and small catalogs.
+
+`auto` picks fts5 or postgresql by the database vendor and falls back to
+python. The index is updated by model signals and rebuilt by the
+importer and the rebuild_search_index command.
+"""
+import math
+import re
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+
+from reviews.models import Categorу, Genre, Title
+
+WORD = re.compile(r'\w+')
+
+
+class Kind:
+    """What is indexed for a model: (field, weight) pairs."""
+
+    def __init__(self, name, model, fields):
+        self.name = name
+        self.model = model
+        self.fields = fields
+
+    @property
+    def table(self):
+        return f'search_{self.name}'
+
+    def documents(self, objects):
+        for obj in objects:
+            yield obj.pk, [
+                getattr(obj, field) or '' for field, _ in self.fields
+            ]
+
+    def all_documents(self):
+        names = [field for field, _ in self.fields]
+        for pk, *values in self.model.objects.values_list(
+            'pk', *names
+        ).order_by().iterator():
+            yield pk, [value or '' for value in values]
+
+
+KINDS = {
+    kind.name: kind for kind in (
+        Kind('title', Title, (('name', 10.0), ('description', 1.0))),
+        Kind('genre', Genre, (('name', 1.0),)),
+        Kind('category', Categorу, (('name', 1.0),)),
+    )
+}
+KINDS_BY_MODEL = {kind.model: kind for kind in KINDS.values()}
+
+
+def pk_column(kind):
+    meta = kind.model._meta
+    return (
+        f'{connection.ops.quote_name(meta.db_table)}.'
+        f'{connection.ops.quote_name(meta.pk.column)}'
+    )
+
+
+def words(text):
+    return WORD.findall(text.lower())
+
+
+class SearchBackend(ABC):
+    """
+    filter() narrows a queryset of the kind's model to the matches and
+    orders it by relevance. The SQL backends join the index to the
+    queryset, so the full-text match runs once per query, and the COUNT
+    queries of the paginator do not compute the rank.
+    """
+
+    def install(self):
+        """Creates the index storage, returns kinds that were created."""
+        return []
+
+    @abstractmethod
+    def index(self, kind, objects):
+        """Adds or replaces the documents of objects."""
+
+    @abstractmethod
+    def remove(self, kind, pks):
+        """Drops the documents of pks."""
+
+    @abstractmethod
+    def rebuild(self, kind):
+        """Reindexes every object of the kind."""
+
+    @abstractmethod
+    def filter(self, queryset, kind, query):
+        """The matches in queryset, best first."""
+
+
+class Fts5Backend(SearchBackend):
+
+    def install(self):
+        created = []
+        with connection.cursor() as cursor:
+            existing = set(connection.introspection.table_names(cursor))
+            for kind in KINDS.values():
+                if kind.table in existing:
+                    continue
+                columns = ', '.join(field for field, _ in kind.fields)
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE {kind.table} USING fts5('
+                    f"{columns}, tokenize='unicode61 remove_diacritics 2', "
+                    "prefix='1 2 3')"
+                )
+                created.append(kind)
+        return created
+
+    def index(self, kind, objects):
+        columns = ', '.join(field for field, _ in kind.fields)
+        marks = ', '.join('%s' for _ in kind.fields)
+        rows = [(pk, *values) for pk, values in kind.documents(objects)]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {kind.table} (rowid, {columns}) '
+                f'VALUES (%s, {marks})',
+                rows
+            )
+
+    def remove(self, kind, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {kind.table} WHERE rowid = %s',
+                [(pk,) for pk in pks]
+            )
+
+    def rebuild(self, kind):
+        meta = kind.model._meta
+        columns = ', '.join(field for field, _ in kind.fields)
+        values = ', '.join(
+            f"COALESCE({meta.get_field(field).column}, '')"
+            for field, _ in kind.fields
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {kind.table}')
+            cursor.execute(
+                f'INSERT INTO {kind.table} (rowid, {columns}) '
+                f'SELECT {meta.pk.column}, {values} FROM {meta.db_table}'
+            )
+
+    def filter(self, queryset, kind, query):
+        terms = words(query)
+        if not terms:
+            return queryset.none()
+        match = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(str(weight) for _, weight in kind.fields)
+        # The rank column is bm25() with the weights given by the second
+        # MATCH, it is computed once per matching row of the join.
+        return queryset.extra(
+            tables=[kind.table],
+            where=[
+                f'{kind.table}.rowid = {pk_column(kind)}',
+                f'{kind.table} MATCH %s',
+                f'{kind.table}.rank MATCH %s',
+            ],
+            params=[match, f'bm25({weights})'],
+            order_by=[f'{kind.table}.rank', *kind.model._meta.ordering],
+        )
+
+
+class PostgresBackend(SearchBackend):
+    table = 'search_document'
+    weights = 'ABCD'
+
+    def install(self):
+        with connection.cursor() as cursor:
+            if self.table in connection.introspection.table_names(cursor):
+                return []
+            cursor.execute(
+                f'CREATE TABLE {self.table} ('
+                'kind varchar(20) NOT NULL, object_id integer NOT NULL, '
+                'document tsvector NOT NULL, '
+                'PRIMARY KEY (kind, object_id))'
+            )
+            cursor.execute(
+                f'CREATE INDEX {self.table}_document_idx '
+                f'ON {self.table} USING gin (document)'
+            )
+        return list(KINDS.values())
+
+    def vector(self, kind):
+        return ' || '.join(
+            f"setweight(to_tsvector('simple', %s), '{self.weights[index]}')"
+            for index in range(len(kind.fields))
+        )
+
+    def index(self, kind, objects):
+        rows = [
+            (kind.name, pk, *values)
+            for pk, values in kind.documents(objects)
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self.table} (kind, object_id, document) '
+                f'VALUES (%s, %s, {self.vector(kind)}) '
+                'ON CONFLICT (kind, object_id) '
+                'DO UPDATE SET document = EXCLUDED.document',
+                rows
+            )
+
+    def remove(self, kind, pks):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} '
+                'WHERE kind = %s AND object_id = ANY(%s)',
+                (kind.name, list(pks))
+            )
+
+    def rebuild(self, kind):
+        meta = kind.model._meta
+        vector = self.vector(kind) % tuple(
+            f"COALESCE({meta.get_field(field).column}, '')"
+            for field, _ in kind.fields
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE kind = %s', (kind.name,)
+            )
+            cursor.execute(
+                f'INSERT INTO {self.table} (kind, object_id, document) '
+                f'SELECT %s, {meta.pk.column}, {vector} '
+                f'FROM {meta.db_table}',
+                (kind.name,)
+            )
+
+    def filter(self, queryset, kind, query):
+        terms = words(query)
+        if not terms:
+            return queryset.none()
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return queryset.extra(
+            tables=[self.table],
+            select={
+                'search_rank': "ts_rank(document, to_tsquery('simple', %s))"
+            },
+            select_params=[tsquery],
+            where=[
+                f'{self.table}.kind = %s',
+                f'{self.table}.object_id = {pk_column(kind)}',
+                f"{self.table}.document @@ to_tsquery('simple', %s)",
+            ],
+            params=[kind.name, tsquery],
+            order_by=['-search_rank', *kind.model._meta.ordering],
+        )
+
+
+class InvertedIndex:
+    """Word -> {pk: weight} postings with a sorted vocabulary for prefixes."""
+
+    def __init__(self):
+        self.postings = defaultdict(dict)
+        self.documents = {}
+        self.vocabulary = []
+
+    def add(self, pk, weighted_texts):
+        self.discard(pk)
+        weights = defaultdict(float)
+        for text, weight in weighted_texts:
+            for word in words(text):
+                weights[word] += weight
+        for word, weight in weights.items():
+            if word not in self.postings:
+                self.vocabulary.insert(
+                    bisect_left(self.vocabulary, word), word
+                )
+            self.postings[word][pk] = weight
+        self.documents[pk] = list(weights)
+
+    def discard(self, pk):
+        for word in self.documents.pop(pk, ()):
+            postings = self.postings[word]
+            postings.pop(pk, None)
+            if not postings:
+                del self.postings[word]
+                del self.vocabulary[bisect_left(self.vocabulary, word)]
+
+    def expand(self, prefix):
+        start = bisect_left(self.vocabulary, prefix)
+        for word in self.vocabulary[start:]:
+            if not word.startswith(prefix):
+                break
+            yield word
+
+    def search(self, terms):
+        """pks matching every term, best first, scored by weight * idf."""
+        total = len(self.documents) or 1
+        scores = None
+        for term in terms:
+            found = defaultdict(float)
+            for word in self.expand(term):
+                postings = self.postings[word]
+                idf = math.log(1 + total / len(postings))
+                for pk, weight in postings.items():
+                    found[pk] += weight * idf
+            if scores is None:
+                scores = found
+            else:
+                scores = {
+                    pk: score + found[pk]
+                    for pk, score in scores.items() if pk in found
+                }
+            if not scores:
+                return []
+        return sorted(scores, key=lambda pk: (-scores[pk], pk))
+
+
+class PythonBackend(SearchBackend):
+
+    def __init__(self):
+        self.indexes = {}
+
+    def get_index(self, kind):
+        if kind.name not in self.indexes:
+            self.rebuild(kind)
+        return self.indexes[kind.name]
+
+    def add(self, index, kind, documents):
+        weights = [weight for _, weight in kind.fields]
+        for pk, values in documents:
+            index.add(pk, zip(values, weights))
+
+    def index(self, kind, objects):
+        if kind.name in self.indexes:
+            self.add(self.indexes[kind.name], kind, kind.documents(objects))
+
+    def remove(self, kind, pks):
+        if kind.name in self.indexes:
+            for pk in pks:
+                self.indexes[kind.name].discard(pk)
+
+    def rebuild(self, kind):
+        index = InvertedIndex()
+        self.add(index, kind, kind.all_documents())
+        self.indexes[kind.name] = index
+
+    def filter(self, queryset, kind, query):
+        pks = self.get_index(kind).search(words(query))
+        pks = pks[:settings.SEARCH_PYTHON_MAX_RESULTS]
+        if not pks:
+            return queryset.none()
+        rank = Case(
+            *(When(pk=pk, then=Value(position))
+              for position, pk in enumerate(pks)),
+            output_field=IntegerField()
+        )
+        return queryset.filter(pk__in=pks).order_by(
+            rank.asc(), *kind.model._meta.ordering
+        )
+
+
+BACKENDS = {
+    'fts5': Fts5Backend,
+    'postgresql': PostgresBackend,
+    'python': PythonBackend,
+}
+
+
+def fts5_available():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    name = settings.SEARCH_BACKEND
+    if name == 'auto':
+        if connection.vendor == 'sqlite' and fts5_available():
+            name = 'fts5'
+        elif connection.vendor == 'postgresql':
+            name = 'postgresql'
+        else:
+            name = 'python'
+    return BACKENDS[name]()
+
+
+def search(queryset, kind, query):
+    return get_backend().filter(queryset, KINDS[kind], query)
+
+
+def rebuild(kinds=None):
+    backend = get_backend()
+    backend.install()
+    for kind in kinds or KINDS.values():
+        backend.rebuild(kind)
@@ -1,6 +1,9 @@
+from django.conf import settings
 from rest_framework import serializers
 
-from reviews.models import Categorу, Comment, Genre, Review, Title, User
+from reviews.models import (
+    Categorу, Comment, Genre, Ranking, Review, Title, User,
+)
 from reviews.validators import username_validator, year_validator
 
 
@@ -61,7 +64,7 @@ class GenreSerializer(serializers.ModelSerializer):
 class TitleSerializer(serializers.ModelSerializer):
     genre = GenreSerializer(many=True)
     category = CategorуSerializer()
-    rating = serializers.FloatField()
+    rating = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Title
@@ -104,6 +107,80 @@ class TitleCreateUpdateSerializer(serializers.ModelSerializer):
         )
 
 
+class BulkSlugSerializer(serializers.Serializer):
+    """A category or a genre of a bulk request, the slug is checked later."""
+    name = serializers.CharField(max_length=256)
+    slug = serializers.SlugField(max_length=50)
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """Genres and category stay slugs, bulk.py resolves them at once."""
+    genre = serializers.ListField(
+        child=serializers.SlugField(), allow_empty=False
+    )
+    category = serializers.SlugField()
+
+    def validate_year(self, value):
+        year_validator(value)
+        return value
+
+    class Meta:
+        model = Title
+        fields = (
+            'name',
+            'year',
+            'description',
+            'genre',
+            'category'
+        )
+
+
+class ReviewBulkSerializer(serializers.ModelSerializer):
+    title = serializers.IntegerField(min_value=1)
+    author = serializers.CharField(max_length=150)
+
+    class Meta:
+        model = Review
+        fields = (
+            'title',
+            'author',
+            'text',
+            'score',
+        )
+
+
+class LeaderboardQuerySerializer(serializers.Serializer):
+    min_reviews = serializers.ChoiceField(
+        choices=settings.LEADERBOARD_MIN_REVIEWS,
+        default=settings.LEADERBOARD_MIN_REVIEWS[0],
+    )
+    genre = serializers.SlugField(required=False)
+    category = serializers.SlugField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=settings.LEADERBOARD_SIZE, default=10
+    )
+
+    def validate(self, data):
+        if data.get('genre') and data.get('category'):
+            raise serializers.ValidationError(
+                'Укажите жанр или категорию, но не оба сразу.'
+            )
+        return data
+
+
+class RankingSerializer(serializers.ModelSerializer):
+    title = TitleSerializer()
+
+    class Meta:
+        model = Ranking
+        fields = (
+            'position',
+            'score',
+            'reviews_count',
+            'title',
+        )
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
@@ -111,18 +188,6 @@ class ReviewSerializer(serializers.ModelSerializer):
         default=serializers.CurrentUserDefault(),
     )
 
-    def validate(self, data):
-        title_id = self.context['view'].kwargs.get('title_id')
-        user = self.context['request'].user
-        if self.context['request'].method == 'PATCH':
-            return data
-        if Review.objects.filter(
-            title=title_id,
-            author=user
-        ).exists():
-            raise serializers.ValidationError('Вы уже оставили отзыв.')
-        return data
-
     class Meta:
         model = Review
         fields = (
@@ -0,0 +1,119 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_init, post_migrate, post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from .authentication import TOKEN_CLAIMS, forget_user, revoke_tokens
+from .cache import ALL, invalidate, title_scopes
+from .search import KINDS_BY_MODEL, get_backend
+from reviews.models import Categorу, Genre, GenreTitle, Review, Title, User
+
+# A change of any of them revokes the stateless tokens of the user.
+TOKEN_STATE = (*TOKEN_CLAIMS, 'is_active')
+
+
+@receiver(post_save, sender=Categorу)
+@receiver(pre_delete, sender=Categorу)
+def category_changed(sender, instance, created=False, **kwargs):
+    if created:
+        invalidate('categories')
+        return
+    invalidate(
+        'categories',
+        *title_scopes(instance.titles.values_list('id', flat=True))
+    )
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def genre_changed(sender, instance, created=False, **kwargs):
+    if created:
+        invalidate('genres')
+        return
+    invalidate(
+        'genres', *title_scopes(instance.titles.values_list('id', flat=True))
+    )
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def title_changed(sender, instance, **kwargs):
+    invalidate(*title_scopes([instance.pk]))
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def title_relation_changed(sender, instance, **kwargs):
+    invalidate(*title_scopes([instance.title_id]))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate(*title_scopes([instance.pk]))
+    elif pk_set is not None:
+        invalidate(*title_scopes(pk_set))
+    else:
+        invalidate(ALL)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Categorу)
+def searchable_saved(sender, instance, **kwargs):
+    get_backend().index(KINDS_BY_MODEL[sender], [instance])
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Categorу)
+def searchable_deleted(sender, instance, **kwargs):
+    get_backend().remove(KINDS_BY_MODEL[sender], [instance.pk])
+
+
+@receiver(post_migrate)
+def install_search_index(sender, using, **kwargs):
+    """Creates the search tables and fills them from existing rows."""
+    if sender.name != 'reviews' or using != DEFAULT_DB_ALIAS:
+        return
+    backend = get_backend()
+    for kind in backend.install():
+        backend.rebuild(kind)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+def token_state(instance):
+    # Deferred fields are not in __dict__ and read as unknown.
+    return tuple(instance.__dict__.get(name) for name in TOKEN_STATE)
+
+
+@receiver(post_init, sender=User)
+def remember_token_state(sender, instance, **kwargs):
+    instance._token_state = token_state(instance)
+
+
+@receiver(post_save, sender=User)
+def user_role_changed(sender, instance, created, **kwargs):
+    """
+    Revokes the tokens that still carry the old role, or every token
+    when the save was marked with revoke_tokens_on_save.
+    """
+    state = token_state(instance)
+    if not created and (
+        state != instance._token_state
+        or instance.__dict__.pop('revoke_tokens_on_save', False)
+    ):
+        revoke_tokens(instance)
+    instance._token_state = state
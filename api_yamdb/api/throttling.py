@@ -0,0 +1,93 @@
+"""
+Token bucket throttles for the auth endpoints.
+
+A bucket holds up to N tokens of a `N/period` rate from
+DEFAULT_THROTTLE_RATES and refills continuously at N per period, so
+bursts up to N are allowed and the sustained rate is bounded. The state
+is one (tokens, timestamp) pair per key in the cache, every check is a
+single get and set. Like the DRF throttles the check is not atomic
+across processes, a race can let a request or two through.
+"""
+import hashlib
+from collections.abc import Mapping
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Buckets keyed by the `field` of the request data."""
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+    field = None
+
+    def get_rate(self):
+        # Read on every request, so a scope without a rate is disabled.
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_ident_value(self, request):
+        # A body that is not an object (a JSON list) gets no bucket and
+        # is rejected by the view.
+        if not isinstance(request.data, Mapping):
+            return None
+        value = request.data.get(self.field)
+        return self.normalize(value) if isinstance(value, str) else None
+
+    def normalize(self, value):
+        return value
+
+    def get_cache_key(self, request, view):
+        ident = self.get_ident_value(request)
+        if not ident:
+            return None
+        # Request data may hold anything, keep the key safe for memcached.
+        ident = hashlib.sha1(ident.encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        refill = self.num_requests / self.duration
+        self.now = self.timer()
+        tokens, stamp = self.cache.get(
+            self.key, (self.num_requests, self.now)
+        )
+        tokens = min(self.num_requests, tokens + (self.now - stamp) * refill)
+        if tokens < 1:
+            self.remaining_wait = (1 - tokens) / refill
+            return False
+        self.cache.set(self.key, (tokens - 1, self.now), self.duration)
+        return True
+
+    def wait(self):
+        return self.remaining_wait
+
+
+class IPThrottle(TokenBucketThrottle):
+
+    def get_ident_value(self, request):
+        # X-Forwarded-For is only trusted for REST_FRAMEWORK['NUM_PROXIES'].
+        return self.get_ident(request)
+
+
+class SignupIPThrottle(IPThrottle):
+    scope = 'signup-ip'
+
+
+class TokenIPThrottle(IPThrottle):
+    scope = 'token-ip'
+
+
+class SignupEmailThrottle(TokenBucketThrottle):
+    scope = 'signup-email'
+    field = 'email'
+
+    def normalize(self, value):
+        return value.strip().lower()
+
+
+class TokenUsernameThrottle(TokenBucketThrottle):
+    scope = 'token-username'
+    field = 'username'
@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (
     CategorуViewSet, CommentViewSet, GenreViewSet, ReviewViewSet, TitleViewSet,
-    UsersViewSet, signup_user, user_token,
+    UsersViewSet, cache_stats, export_table, request_metrics, signup_user,
+    user_token,
 )
 
 router_v1 = DefaultRouter()
@@ -26,4 +27,7 @@ urlpatterns = [
     path('v1/', include(router_v1.urls)),
     path('v1/auth/signup/', signup_user, name='signup_user'),
     path('v1/auth/token/', user_token, name='token'),
+    path('v1/cache/stats/', cache_stats, name='cache_stats'),
+    path('v1/export/<str:name>/', export_table, name='export'),
+    path('v1/metrics/', request_metrics, name='metrics'),
 ]
@@ -1,52 +1,91 @@
-from django.db import IntegrityError
-from django.db.models import Avg
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import (
-    filters, mixins, pagination, permissions, serializers, status, viewsets,
+    mixins, pagination, permissions, serializers, status, viewsets,
+)
+from rest_framework.decorators import (
+    action, api_view, permission_classes, throttle_classes,
 )
-from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.settings import api_settings
 
-from .filters import TitleFilter
+from . import bulk, export, leaderboards, metrics
+from .authentication import access_token_for
+from .cache import CachedListMixin, CachedRetrieveMixin, stats
+from .filters import IndexedSearchFilter, TitleFilter
+from .mail import queue_mail
+from .pagination import ReviewAndCommentPagination, TitlePagination
 from .permissions import IsAdmin, IsAdminModeratorOwnerOrReadOnly, ReadOnly
 from .serializers import (
-    CategorуSerializer, CommentSerializer, GenreSerializer, ReviewSerializer,
-    SignUpSerializer, TitleCreateUpdateSerializer, TitleSerializer,
+    BulkSlugSerializer, CategorуSerializer, CommentSerializer,
+    GenreSerializer, LeaderboardQuerySerializer, RankingSerializer,
+    ReviewBulkSerializer, ReviewSerializer, SignUpSerializer,
+    TitleBulkSerializer, TitleCreateUpdateSerializer, TitleSerializer,
     TokenSerializer, UserSerializer,
 )
-from reviews.models import Categorу, Genre, Review, Title, User
+from .throttling import (
+    SignupEmailThrottle, SignupIPThrottle, TokenIPThrottle,
+    TokenUsernameThrottle,
+)
+from reviews.models import (
+    SCORES, Categorу, Comment, Genre, Review, Title, User,
+)
 
 
 @api_view(['POST', ])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([SignupIPThrottle, SignupEmailThrottle])
 def signup_user(request):
     """
-    Creates a user and sends a confirmation code to the email.
+    Creates a user and queues a confirmation code to the email.
     If the user is already in the database
-    sends a confirmation code to the user's email again.
+    queues a new confirmation code to the user's email again,
+    unless one was queued less than SIGNUP_RESEND_WINDOW seconds ago.
     """
     serializer = SignUpSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    now = timezone.now()
+    resend_after = now - timedelta(seconds=settings.SIGNUP_RESEND_WINDOW)
+    code = get_random_string(length=20)
     try:
-        user, _ = User.objects.get_or_create(**serializer.validated_data)
+        with transaction.atomic():
+            # The transaction starts with a write: on SQLite one that
+            # reads first can not take the write lock after a concurrent
+            # commit and fails with "database is locked" at once.
+            updated = User.objects.filter(**data).exclude(
+                ~Q(confirmation_code=''),
+                confirmation_code_sent_at__gt=resend_after,
+            ).update(confirmation_code=code, confirmation_code_sent_at=now)
+            if not updated:
+                if User.objects.filter(**data).exists():
+                    return Response(data, status=status.HTTP_200_OK)
+                User.objects.create(
+                    **data, confirmation_code=code,
+                    confirmation_code_sent_at=now
+                )
+            queue_mail(
+                data['email'], 'Ваш код подтверждения регистрации на YaMDb!',
+                f'Код подтверждения - {code}'
+            )
     except IntegrityError:
         return Response(
             {'Введена не правильная пара имени пользователя и e-mail.'},
             status=status.HTTP_400_BAD_REQUEST)
-    confirmation_code = get_random_string(length=20)
-    user.confirmation_code = confirmation_code
-    user.save()
-    subject = 'Ваш код подтверждения регистрации на YaMDb!'
-    message = f'Код подтверждения - {user.confirmation_code}'
-    user.email_user(subject, message, fail_silently=False)
     return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
 @api_view(['POST', ])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([TokenIPThrottle, TokenUsernameThrottle])
 def user_token(request):
     """
     Creates a token at the user's request.
@@ -59,8 +98,7 @@ def user_token(request):
     if confirmation_code != user.confirmation_code:
         message = 'Не верный код'
         raise serializers.ValidationError(message)
-    refresh = RefreshToken.for_user(user)
-    token = {'token': str(refresh.access_token)}
+    token = {'token': str(access_token_for(user))}
     return Response(token, status=status.HTTP_201_CREATED)
 
 
@@ -71,6 +109,13 @@ class UsersViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAdmin, )
     pagination_class = pagination.PageNumberPagination
 
+    def perform_update(self, serializer):
+        # Any change of a user by an admin revokes the stateless tokens
+        # of the user. user_role_changed does it in post_save, so a role
+        # change in the same request bumps the version only once.
+        serializer.instance.revoke_tokens_on_save = True
+        serializer.save()
+
     @action(methods=['get', 'PATCH'], detail=False,
             permission_classes=[permissions.IsAuthenticated],
             url_path='me', url_name='me')
@@ -93,23 +138,85 @@ class UsersViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+def bulk_response(items, create):
+    """Runs a bulk.create_* function on the list from the request body."""
+    error = bulk.validate_size(items)
+    if error:
+        raise serializers.ValidationError(error)
+    try:
+        results = create(items)
+    except IntegrityError:
+        # A concurrent request created a conflicting row after the checks.
+        raise serializers.ValidationError(
+            'Данные изменились во время запроса, повторите его.'
+        )
+    return Response(results)
+
+
+@api_view(['GET', ])
+@permission_classes([IsAdmin])
+def export_table(request, name):
+    """Streams a whole table as CSV (default) or NDJSON (?output=ndjson)."""
+    table = export.EXPORTS.get(name)
+    if table is None:
+        raise Http404
+    output = request.query_params.get('output', export.CSV)
+    if output not in export.FORMATS:
+        raise serializers.ValidationError(
+            {'output': [f'Допустимые значения: {", ".join(export.FORMATS)}.']}
+        )
+    response = StreamingHttpResponse(
+        export.lines(table, output), content_type=export.CONTENT_TYPES[output]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{table.filename(output)}"'
+    )
+    return response
+
+
+@api_view(['GET', ])
+@permission_classes([IsAdmin])
+def cache_stats(request):
+    """Hit and miss counters of the response cache per endpoint."""
+    return Response(stats())
+
+
+@api_view(['GET', ])
+@permission_classes([IsAdmin])
+def request_metrics(request):
+    """Request histograms of this process in the Prometheus text format."""
+    return HttpResponse(
+        metrics.render(), content_type='text/plain; version=0.0.4'
+    )
+
+
 class CategoryAndGenreViewSetsDaddy(
+    CachedListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     viewsets.GenericViewSet,
     mixins.DestroyModelMixin,
 ):
     permission_classes = (ReadOnly | IsAdmin,)
-    filter_backends = (filters.SearchFilter,)
+    filter_backends = (IndexedSearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Creates a list of objects, returns a result per object."""
+        return bulk_response(request.data, lambda items: bulk.create_slugged(
+            self.queryset.model, BulkSlugSerializer, items, self.cache_scope
+        ))
+
 
 class CategorуViewSet(
     CategoryAndGenreViewSetsDaddy
 ):
     queryset = Categorу.objects.all()
     serializer_class = CategorуSerializer
+    cache_scope = 'categories'
+    search_kind = 'category'
 
 
 class GenreViewSet(
@@ -117,52 +224,160 @@ class GenreViewSet(
 ):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_scope = 'genres'
+    search_kind = 'genre'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(rating=Avg('reviews__score'))
+class TitleViewSet(
+    CachedListMixin,
+    CachedRetrieveMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = (
+        Title.objects.select_related('category').prefetch_related('genre')
+    )
     serializer_class = TitleSerializer
     permission_classes = (ReadOnly | IsAdmin,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
-    ordering_fields = ('rating',)
+    pagination_class = TitlePagination
+    cache_scope = 'titles'
 
     def get_serializer_class(self):
         if self.action in ('create', 'partial_update'):
             return TitleCreateUpdateSerializer
         return TitleSerializer
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Creates a list of titles with their genres."""
+        return bulk_response(request.data, lambda items: bulk.create_titles(
+            TitleBulkSerializer, items
+        ))
 
-class ReviewViewSet(viewsets.ModelViewSet):
-    serializer_class = ReviewSerializer
+    @action(detail=False, methods=['post'], url_path='reviews/bulk')
+    def bulk_reviews(self, request):
+        """Creates a list of reviews of any titles and authors."""
+        return bulk_response(request.data, lambda items: bulk.create_reviews(
+            ReviewBulkSerializer, items
+        ))
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, *args, **kwargs):
+        """Number of reviews, mean score and reviews per score."""
+        return self.cached_response(
+            self.title_stats, request, *args, **kwargs
+        )
+
+    @action(detail=False, methods=['get'])
+    def top(self, request, *args, **kwargs):
+        """Best rated titles, overall or of a genre or a category."""
+        return self.cached_response(self.leaderboard, request)
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request, *args, **kwargs):
+        """Titles with the most reviews in the last days."""
+        return self.cached_response(self.leaderboard, request)
+
+    def leaderboard(self, request):
+        serializer = LeaderboardQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        query = serializer.validated_data
+        if self.action == 'trending':
+            board = leaderboards.TRENDING
+        else:
+            board = leaderboards.top_board(
+                query['min_reviews'], query.get('genre'),
+                query.get('category')
+            )
+        rankings = leaderboards.read(board, query['limit'])
+        return Response(RankingSerializer(rankings, many=True).data)
+
+    def title_stats(self, request, *args, **kwargs):
+        title = get_object_or_404(
+            Title.objects.select_related('score_histogram'),
+            pk=self.kwargs['pk']
+        )
+        histogram = getattr(title, 'score_histogram', None)
+        return Response({
+            'count': title.reviews_count,
+            'mean': title.rating,
+            'histogram': (
+                histogram.counts() if histogram else dict.fromkeys(SCORES, 0)
+            ),
+        })
+
+
+class ReviewAndCommentViewSetsDaddy(viewsets.ModelViewSet):
+    """
+    Nested viewsets filter by the parent ids from the URL instead of
+    loading the parent. Whether the parent exists is only checked when a
+    list page comes out empty, to answer 404 rather than an empty list.
+    parent_lookups maps fields of parent_model to URL kwargs.
+    """
     permission_classes = (IsAdminModeratorOwnerOrReadOnly,)
+    pagination_class = ReviewAndCommentPagination
+    parent_model = None
+    parent_lookups = {}
+
+    def get_parent_filter(self):
+        return {
+            field: self.kwargs.get(kwarg)
+            for field, kwarg in self.parent_lookups.items()
+        }
+
+    def get_parent(self):
+        return get_object_or_404(self.parent_model, **self.get_parent_filter())
 
-    def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+    def parent_exists(self):
+        return self.parent_model.objects.filter(
+            **self.get_parent_filter()
+        ).exists()
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not (queryset if page is None else page) and (
+            not self.parent_exists()
+        ):
+            raise Http404
+        return page
+
+
+class ReviewViewSet(ReviewAndCommentViewSetsDaddy):
+    serializer_class = ReviewSerializer
+    parent_model = Title
+    parent_lookups = {'pk': 'title_id'}
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return Review.objects.filter(
+            title_id=self.kwargs.get('title_id')
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
-            title=self.get_title()
-        )
+        """
+        The unique_title_id constraint rejects a second review of the
+        author, including one created by a concurrent request.
+        """
+        title = self.get_parent()
+        try:
+            with transaction.atomic():
+                serializer.save(author=self.request.user, title=title)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ['Вы уже оставили отзыв.']}
+            )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReviewAndCommentViewSetsDaddy):
     serializer_class = CommentSerializer
-    permission_classes = (IsAdminModeratorOwnerOrReadOnly,)
+    parent_model = Review
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
 
     def get_queryset(self):
-        review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
-        return review.comments.all()
+        return Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id'),
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(
-            author=self.request.user,
-            review=get_object_or_404(
-                Review, pk=self.kwargs.get('review_id'),
-                title_id=self.kwargs.get('title_id')
-            )
-        )
+        serializer.save(author=self.request.user, review=self.get_parent())
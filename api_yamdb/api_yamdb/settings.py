@@ -26,11 +26,14 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'django_filters',
-    'api',
-    'reviews',
+    'api.apps.ApiConfig',
+    'reviews.apps.ReviewsConfig',
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.queries.QueryInspectorMiddleware',
+    'api.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,14 +65,79 @@ TEMPLATES = [
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 
-# Database
+# Database, configured by the DB_* variables. PRAGMAS and
+# CONN_HEALTH_CHECKS are applied by api/database.py.
+
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite3')
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 60))
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'api_yamdb'),
+            'USER': os.getenv('DB_USER', 'postgres'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            # Reconnect when the server dropped a persistent connection.
+            'CONN_HEALTH_CHECKS': DB_CONN_MAX_AGE != 0,
+            # DB_POOLING does not pool connections, Django 2.2 has no pool.
+            # It only disables server-side cursors for an external pooler
+            # (PgBouncer in transaction mode), where the server connection
+            # changes between transactions and QuerySet.iterator() can not
+            # keep a named cursor open.
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+                'DB_POOLING', ''
+            ).lower() in ('1', 'true', 'yes'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv(
+                'DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')
+            ),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'PRAGMAS': {
+                # Readers and the writer do not block each other.
+                'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+                # Durable enough with WAL, no fsync on every commit.
+                'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+                'mmap_size': int(
+                    os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+                ),
+                # Wait for the write lock instead of failing at once.
+                'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+            },
+        }
+    }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+# Read replicas, see api/replicas.py. DB_REPLICAS lists SQLite files or
+# PostgreSQL host[:port] of copies of the primary database.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        # Tests run against the primary only.
+        'TEST': {'MIRROR': 'default'},
     }
-}
+    if DB_ENGINE == 'postgresql':
+        host, _, port = replica.strip().partition(':')
+        DATABASES[alias]['HOST'] = host
+        DATABASES[alias]['PORT'] = port or DATABASES[alias]['PORT']
+    else:
+        DATABASES[alias]['NAME'] = replica.strip()
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+# Clients read from the primary for this long after a write.
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
 
 
 # Password validation
@@ -116,13 +184,27 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 5,
+    # Reverse proxies in front of the server. The client address for the
+    # throttles is taken from X-Forwarded-For only behind them, otherwise
+    # a client could pick its own address with the header.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
+    # Token buckets of api/throttling.py: burst size per refill period.
+    'DEFAULT_THROTTLE_RATES': {
+        'signup-ip': '20/min',
+        'signup-email': '5/hour',
+        'token-ip': '30/min',
+        'token-username': '10/min',
+    },
 }
 
+# Signups repeated within this many seconds reuse the code already sent.
+SIGNUP_RESEND_WINDOW = 300
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -131,6 +213,81 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'id',
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+}
+
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+
+# Users authenticated by a token are cached for AUTH_USER_CACHE_TTL
+# seconds, in the process or in the AUTH_USER_CACHE_ALIAS cache if set.
+# Changes of a user only drop the entry in the process that made them,
+# so with several processes and no shared alias a role change, a
+# deactivation or revoked stateless tokens take up to the TTL to apply.
+AUTH_USER_CACHE_ALIAS = os.getenv('AUTH_USER_CACHE_ALIAS') or None
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 30))
+AUTH_USER_CACHE_SIZE = 10000
+
+# Access tokens carry the role and a token version of the user, only the
+# version is checked on a request. Changing the role revokes the tokens.
+AUTH_STATELESS_TOKENS = os.getenv(
+    'AUTH_STATELESS_TOKENS', ''
+).lower() in ('1', 'true', 'yes')
+
+# Request timing, query counts and /api/v1/metrics/, see api/metrics.py
+METRICS_ENABLED = os.getenv(
+    'METRICS_ENABLED', 'true'
+).lower() in ('1', 'true', 'yes')
+
+# Slow query log and N+1 detector, see api/queries.py. Zero disables a check,
+# strict mode raises on N+1 instead of logging it.
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 5))
+QUERY_INSPECTOR_STRICT = os.getenv(
+    'QUERY_INSPECTOR_STRICT', ''
+).lower() in ('1', 'true', 'yes')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.metrics': {
+            'handlers': ['console'],
+            'level': os.getenv('METRICS_LOG_LEVEL', 'INFO'),
+        },
+        'api.queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
+
+# Thread pools of the ASGI application, see api/asgi.py. Each thread may
+# hold a database connection.
+ASGI_READ_THREADS = int(os.getenv('ASGI_READ_THREADS', 16))
+ASGI_WRITE_THREADS = int(os.getenv('ASGI_WRITE_THREADS', 4))
+
+# Largest list accepted by the bulk endpoints, see api/bulk.py
+BULK_MAX_ITEMS = 10000
+
+# Precomputed leaderboards, see api/leaderboards.py
+LEADERBOARD_SIZE = 100
+LEADERBOARD_MIN_REVIEWS = (1, 10, 100)
+LEADERBOARD_TRENDING_DAYS = 7
+
+# fts5, postgresql, python or auto, see api/search.py
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto')
+SEARCH_PYTHON_MAX_RESULTS = 1000
+
 # email settings
 
 PRODUCTION_EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -147,3 +304,14 @@ EMAIL_USE_SSL = True
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Mail is queued in OutboundEmail and sent by send_queued_mail. Eager mode
+# sends it right after the request commits, for development without a worker.
+MAIL_QUEUE_EAGER = os.getenv(
+    'MAIL_QUEUE_EAGER', ''
+).lower() in ('1', 'true', 'yes')
+MAIL_QUEUE_BATCH_SIZE = 100
+MAIL_QUEUE_MAX_ATTEMPTS = 8
+MAIL_QUEUE_RETRY_DELAY = 30
+MAIL_QUEUE_MAX_RETRY_DELAY = 3600
+MAIL_QUEUE_LEASE = 300
@@ -1,6 +1,9 @@
 from django.contrib import admin
 
-from .models import Categorу, Comment, Genre, Review, Title, User
+from .models import (
+    Categorу, Comment, Genre, ImportCheckpoint, OutboundEmail, Review, Title,
+    User,
+)
 
 
 @admin.register(User)
@@ -39,7 +42,10 @@ class GenreAdmin(admin.ModelAdmin):
 
 @admin.register(Title)
 class TitleAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'name', 'year', 'category', 'description')
+    list_display = (
+        'pk', 'name', 'year', 'category', 'rating', 'reviews_count',
+        'description',
+    )
     list_filter = ('name',)
     empty_value_display = '-пусто-'
 
@@ -58,3 +64,19 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+
+
+@admin.register(ImportCheckpoint)
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('table', 'file', 'byte_offset', 'last_id', 'updated')
+    empty_value_display = '-пусто-'
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'recipient', 'subject', 'created', 'attempts', 'sent_at',
+    )
+    list_filter = ('sent_at',)
+    search_fields = ('recipient',)
+    empty_value_display = '-пусто-'
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboundemail',
+            name='lease_token',
+            field=models.CharField(blank=True, editable=False, help_text='Случайная метка последнего обработчика, взявшего письмо.', max_length=20, verbose_name='Метка обработчика'),
+        ),
+    ]
@@ -3,6 +3,7 @@ from datetime import datetime
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
 
 from .validators import username_validator
 
@@ -62,6 +63,18 @@ class User(AbstractUser):
     confirmation_code = models.CharField(
         max_length=20,
     )
+    confirmation_code_sent_at = models.DateTimeField(
+        'Код подтверждения отправлен',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    token_version = models.PositiveIntegerField(
+        'Версия токенов',
+        default=0,
+        editable=False,
+        help_text='Увеличивается при смене роли, отзывая выданные токены.'
+    )
 
     class Meta:
         ordering = ('-username',)
@@ -77,6 +90,22 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    def refresh_from_db(self, using=None, fields=None):
+        # The authentication cache gives users with only some fields
+        # loaded: the first deferred field accessed loads all of them.
+        if fields is not None:
+            deferred = self.get_deferred_fields()
+            if deferred.intersection(fields):
+                fields = deferred.union(fields)
+        super().refresh_from_db(using, fields)
+
+    def delete(self, *args, **kwargs):
+        # Imported here, reviews.stats depends on the models.
+        from .stats import deferred_title_stats
+
+        with deferred_title_stats():
+            return super().delete(*args, **kwargs)
+
     @property
     def is_admin(self):
         return self.role == ADMIN or self.is_staff
@@ -150,23 +179,99 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         blank=True,
         null=True,
-        related_name='titles'
+        related_name='titles',
+        db_index=False
+    )
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Средняя оценка, пересчитывается при изменении отзывов.'
+    )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False
+    )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
     )
 
     class Meta:
-        ordering = ('name', )
+        ordering = ('name', 'id')
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=('name', 'id'), name='title_name_idx'),
+            models.Index(
+                fields=('year', 'name', 'id'), name='title_year_name_idx'
+            ),
+            models.Index(
+                fields=('category', 'name', 'id'),
+                name='title_category_name_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def delete(self, *args, **kwargs):
+        from .stats import deferred_title_stats
+
+        with deferred_title_stats():
+            return super().delete(*args, **kwargs)
+
+
+SCORES = range(1, 11)
+
+
+class ScoreHistogram(models.Model):
+    """
+    Number of reviews of a title per score, kept up to date by the review
+    signals. A title without reviews may have no row.
+    """
+    title = models.OneToOneField(
+        Title,
+        verbose_name='Произведение',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score_histogram'
+    )
+    score_1 = models.PositiveIntegerField('Оценок 1', default=0)
+    score_2 = models.PositiveIntegerField('Оценок 2', default=0)
+    score_3 = models.PositiveIntegerField('Оценок 3', default=0)
+    score_4 = models.PositiveIntegerField('Оценок 4', default=0)
+    score_5 = models.PositiveIntegerField('Оценок 5', default=0)
+    score_6 = models.PositiveIntegerField('Оценок 6', default=0)
+    score_7 = models.PositiveIntegerField('Оценок 7', default=0)
+    score_8 = models.PositiveIntegerField('Оценок 8', default=0)
+    score_9 = models.PositiveIntegerField('Оценок 9', default=0)
+    score_10 = models.PositiveIntegerField('Оценок 10', default=0)
+
+    class Meta:
+        verbose_name = 'Распределение оценок'
+        verbose_name_plural = 'Распределения оценок'
+
+    def __str__(self):
+        return f'{self.title_id}: {self.counts()}'
+
+    @staticmethod
+    def field(score):
+        return f'score_{score}'
+
+    def counts(self):
+        return {score: getattr(self, self.field(score)) for score in SCORES}
+
 
 class GenreTitle(models.Model):
     genre = models.ForeignKey(
         Genre,
         verbose_name='Наименование жанра',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     title = models.ForeignKey(
         Title,
@@ -177,6 +282,11 @@ class GenreTitle(models.Model):
     class Meta:
         verbose_name = 'Произведение и жанр'
         verbose_name_plural = 'Произведения и жанры'
+        indexes = [
+            models.Index(
+                fields=('genre', 'title'), name='genretitle_genre_title_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.genre}, произведение - {self.title}'
@@ -198,7 +308,7 @@ class ReviewAndCommentDaddy(models.Model):
     )
 
     class Meta:
-        ordering = ('-pub_date', )
+        ordering = ('-pub_date', '-id')
         abstract = True
 
     def __str__(self):
@@ -210,7 +320,8 @@ class Review(ReviewAndCommentDaddy):
         Title,
         verbose_name='Произведение',
         on_delete=models.CASCADE,
-        related_name='reviews'
+        related_name='reviews',
+        db_index=False
     )
     score = models.PositiveSmallIntegerField(
         verbose_name='Оценка',
@@ -224,6 +335,12 @@ class Review(ReviewAndCommentDaddy):
     class Meta(ReviewAndCommentDaddy.Meta):
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = [
+            models.Index(
+                fields=('title', '-pub_date', '-id'),
+                name='review_title_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=('author', 'title_id'),
@@ -237,9 +354,151 @@ class Comment(ReviewAndCommentDaddy):
         Review,
         verbose_name='Отзыв',
         on_delete=models.CASCADE,
-        related_name='comments'
+        related_name='comments',
+        db_index=False
     )
 
     class Meta(ReviewAndCommentDaddy.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=('review', '-pub_date', '-id'),
+                name='comment_review_pub_date_idx'
+            ),
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    table = models.CharField(
+        verbose_name='Таблица',
+        max_length=50,
+        unique=True
+    )
+    file = models.CharField(
+        verbose_name='Файл',
+        max_length=255
+    )
+    fingerprint = models.CharField(
+        verbose_name='Отпечаток начала файла',
+        max_length=40
+    )
+    byte_offset = models.BigIntegerField(
+        verbose_name='Смещение в байтах',
+        default=0
+    )
+    last_id = models.BigIntegerField(
+        verbose_name='Последний id',
+        null=True,
+        blank=True
+    )
+    updated = models.DateTimeField(
+        verbose_name='Обновлено',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'Точка загрузки csv'
+        verbose_name_plural = 'Точки загрузки csv'
+
+    def __str__(self):
+        return f'{self.table}: {self.file}@{self.byte_offset}'
+
+
+class OutboundEmail(models.Model):
+    recipient = models.EmailField(
+        verbose_name='Получатель',
+        max_length=254
+    )
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=255
+    )
+    body = models.TextField(
+        verbose_name='Текст'
+    )
+    created = models.DateTimeField(
+        verbose_name='Создано',
+        auto_now_add=True
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Следующая попытка',
+        default=timezone.now
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток',
+        default=0
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Отправлено',
+        null=True,
+        blank=True
+    )
+    lease_token = models.CharField(
+        verbose_name='Метка обработчика',
+        max_length=20,
+        blank=True,
+        editable=False,
+        help_text='Случайная метка последнего обработчика, взявшего письмо.'
+    )
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(
+                fields=['sent_at', 'next_attempt_at'],
+                name='outboundemail_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
+
+
+class Ranking(models.Model):
+    """
+    A precomputed leaderboard row, see api/leaderboards.py. Boards are
+    replaced as a whole by refresh_leaderboards.
+    """
+    board = models.CharField(
+        verbose_name='Рейтинговая таблица',
+        max_length=100
+    )
+    position = models.PositiveIntegerField(
+        verbose_name='Место'
+    )
+    title = models.ForeignKey(
+        Title,
+        verbose_name='Произведение',
+        on_delete=models.CASCADE,
+        related_name='+',
+        db_index=False
+    )
+    score = models.FloatField(
+        verbose_name='Показатель'
+    )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов'
+    )
+    updated = models.DateTimeField(
+        verbose_name='Обновлено'
+    )
+
+    class Meta:
+        ordering = ('board', 'position')
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтингах'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('board', 'position'),
+                name='unique_board_position'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.board} #{self.position}: {self.title_id}'
@@ -0,0 +1,61 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Review
+from .stats import (
+    deferred_titles, rebuild_title_ratings, rebuild_title_scores,
+    shift_title_rating, shift_title_scores,
+)
+
+
+def _remember_review_state(instance):
+    # __dict__ is used so that deferred fields are not loaded here.
+    instance._stats_state = (
+        instance.__dict__.get('title_id'),
+        instance.__dict__.get('score'),
+    )
+
+
+@receiver(post_init, sender=Review)
+def review_initialized(sender, instance, **kwargs):
+    _remember_review_state(instance)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_title_id, old_score = instance._stats_state
+    if created:
+        shift_title_rating(instance.title_id, 1, instance.score)
+        shift_title_scores(instance.title_id, {instance.score: 1})
+    elif old_title_id is None or old_score is None:
+        title_ids = {instance.title_id, old_title_id} - {None}
+        rebuild_title_ratings(title_ids)
+        rebuild_title_scores(title_ids)
+    elif old_title_id != instance.title_id:
+        shift_title_rating(old_title_id, -1, -old_score)
+        shift_title_scores(old_title_id, {old_score: -1})
+        shift_title_rating(instance.title_id, 1, instance.score)
+        shift_title_scores(instance.title_id, {instance.score: 1})
+    elif old_score != instance.score:
+        shift_title_rating(instance.title_id, 0, instance.score - old_score)
+        shift_title_scores(
+            instance.title_id, {old_score: -1, instance.score: 1}
+        )
+    _remember_review_state(instance)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    deferred = deferred_titles()
+    if deferred is not None:
+        deferred.add(instance.title_id)
+        return
+    title_id, score = instance._stats_state
+    if title_id is None or score is None:
+        rebuild_title_ratings([instance.title_id])
+        rebuild_title_scores([instance.title_id])
+        return
+    shift_title_rating(title_id, -1, -score)
+    shift_title_scores(title_id, {score: -1})
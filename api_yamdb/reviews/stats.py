@@ -0,0 +1,141 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import (
+    Avg, Case, Count, ExpressionWrapper, F, FloatField, OuterRef, Q,
+    Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce
+
+from .models import SCORES, Review, ScoreHistogram, Title
+
+# Keeps IN (...) lists below the SQLite parameter limit.
+REBUILD_CHUNK = 500
+
+_deferred_titles = ContextVar('deferred_titles', default=None)
+
+
+def shift_title_rating(title_id, count_delta, score_delta):
+    """
+    Applies a review change to the stored rating of a title.
+    A single UPDATE, the new average is computed from the old
+    column values on the database side.
+    """
+    reviews_count = F('reviews_count') + count_delta
+    score_sum = F('score_sum') + score_delta
+    Title.objects.filter(pk=title_id).update(
+        reviews_count=reviews_count,
+        score_sum=score_sum,
+        rating=Case(
+            When(reviews_count__lte=-count_delta, then=Value(None)),
+            default=ExpressionWrapper(
+                Cast(score_sum, FloatField()) / reviews_count,
+                output_field=FloatField()
+            ),
+            output_field=FloatField()
+        )
+    )
+
+
+def rebuild_title_ratings(title_ids=None):
+    """
+    Recomputes rating, reviews_count and score_sum from the reviews table.
+    Without title_ids every title is rebuilt.
+    Returns the number of updated titles.
+    """
+    reviews = (
+        Review.objects.filter(title=OuterRef('pk'))
+        .order_by()
+        .values('title')
+    )
+    titles = Title.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+    return titles.update(
+        reviews_count=Coalesce(
+            Subquery(reviews.annotate(count=Count('pk')).values('count')),
+            0
+        ),
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0
+        ),
+        rating=Subquery(
+            reviews.annotate(mean=Avg('score')).values('mean'),
+            output_field=FloatField()
+        ),
+    )
+
+
+def shift_title_scores(title_id, deltas):
+    """
+    Applies {score: delta} to the score histogram of a title in one
+    UPDATE. The row is created on the first review of the title.
+    """
+    deltas = {score: delta for score, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    histogram = ScoreHistogram.objects.filter(title_id=title_id)
+    changes = {
+        ScoreHistogram.field(score): F(ScoreHistogram.field(score)) + delta
+        for score, delta in deltas.items()
+    }
+    if not histogram.update(**changes):
+        if min(deltas.values()) < 0:
+            # No row to take a review from: the title is being deleted
+            # (the cascade may delete the row before the reviews) or its
+            # histogram was never built, see rebuild_title_scores.
+            return
+        ScoreHistogram.objects.bulk_create(
+            [ScoreHistogram(title_id=title_id)], ignore_conflicts=True
+        )
+        histogram.update(**changes)
+
+
+def rebuild_title_scores(title_ids=None):
+    """
+    Recomputes score histograms from the reviews table.
+    Without title_ids every title is rebuilt.
+    """
+    histograms = ScoreHistogram.objects.all()
+    reviews = Review.objects.order_by()
+    if title_ids is not None:
+        histograms = histograms.filter(title_id__in=title_ids)
+        reviews = reviews.filter(title_id__in=title_ids)
+    histograms.delete()
+    rows = reviews.values('title_id').annotate(**{
+        ScoreHistogram.field(score): Count('pk', filter=Q(score=score))
+        for score in SCORES
+    })
+    ScoreHistogram.objects.bulk_create(
+        (ScoreHistogram(**row) for row in rows.iterator()), batch_size=500
+    )
+
+
+def deferred_titles():
+    """The set collecting titles inside deferred_title_stats, or None."""
+    return _deferred_titles.get()
+
+
+@contextmanager
+def deferred_title_stats():
+    """
+    Collects the titles of the reviews deleted in the block instead of
+    updating their stats once per review, and rebuilds the titles that
+    still exist at the end. Wraps Title and User deletes, whose cascades
+    can delete many reviews of one title or of many titles.
+    """
+    if _deferred_titles.get() is not None:
+        yield
+        return
+    title_ids = set()
+    token = _deferred_titles.set(title_ids)
+    try:
+        yield
+    finally:
+        _deferred_titles.reset(token)
+    title_ids = sorted(title_ids)
+    for start in range(0, len(title_ids), REBUILD_CHUNK):
+        chunk = title_ids[start:start + REBUILD_CHUNK]
+        rebuild_title_ratings(chunk)
+        rebuild_title_scores(chunk)
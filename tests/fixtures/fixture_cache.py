@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import caches
+
+    from api.authentication import local_cache
+
+    for cache in caches.all():
+        cache.clear()
+    local_cache.clear()
+    yield
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def eager_mail(settings):
+    """Mail of the suite lands in mail.outbox without a queue worker."""
+    settings.MAIL_QUEUE_EAGER = True
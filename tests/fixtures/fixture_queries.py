@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def strict_queries(settings):
+    """Every API request of the suite fails on an N+1 query."""
+    settings.QUERY_INSPECTOR_STRICT = True
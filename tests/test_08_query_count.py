@@ -0,0 +1,166 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import (
+    auth_client, create_comments, create_reviews, create_titles,
+)
+
+
+def assert_num_queries(client, method, url, expected, data=None):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data=data)
+    executed = len(context.captured_queries)
+    sql = '\n'.join(query['sql'] for query in context.captured_queries)
+    assert executed == expected, (
+        f'Проверьте, что {method.upper()} запрос `{url}` выполняет '
+        f'{expected} запросов к базе данных, а не {executed}:\n{sql}'
+    )
+    return response
+
+
+def create_many_titles(count, genres_per_title):
+    from reviews.models import Categorу, Genre, GenreTitle, Title
+
+    category = Categorу.objects.create(name='Категория', slug='category')
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(genres_per_title)
+    )
+    genres = list(Genre.objects.all())
+    for i in range(count):
+        title = Title.objects.create(
+            name=f'Произведение {i}', year=2000, category=category
+        )
+        GenreTitle.objects.bulk_create(
+            GenreTitle(genre=genre, title=title) for genre in genres
+        )
+
+
+class Test08QueryCountAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_list_constant(self, client):
+        create_many_titles(count=10, genres_per_title=3)
+        for limit in (1, 10):
+            assert_num_queries(
+                client, 'get', f'/api/v1/titles/?limit={limit}', 3
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_titles(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        title_id = titles[0]['id']
+        assert_num_queries(client, 'get', '/api/v1/titles/', 3)
+        assert_num_queries(
+            client, 'get', f'/api/v1/titles/?genre={genres[0]["slug"]}', 3
+        )
+        assert_num_queries(client, 'get', f'/api/v1/titles/{title_id}/', 2)
+        data = {
+            'name': 'Новое', 'year': 2001, 'genre': [genres[0]['slug']],
+            'category': categories[0]['slug']
+        }
+        assert_num_queries(admin_client, 'post', '/api/v1/titles/', 9, data)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_categories_and_genres(self, client, admin_client):
+        create_titles(admin_client)
+        for url in ('/api/v1/categories/', '/api/v1/genres/'):
+            assert_num_queries(client, 'get', url, 2)
+            assert_num_queries(client, 'get', f'{url}?search=к', 2)
+            assert_num_queries(
+                admin_client, 'post', url, 3, {'name': 'Новое', 'slug': 'new'}
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_reviews(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        assert_num_queries(client, 'get', url, 2)
+        assert_num_queries(client, 'get', f'{url}{reviews[0]["id"]}/', 1)
+        url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        # The first review of a title also creates its score histogram.
+        assert_num_queries(
+            admin_client, 'post', url, 7, {'text': 'Текст', 'score': 7}
+        )
+        user_client = auth_client(user)
+        user_client.get(url)
+        assert_num_queries(
+            user_client, 'post', url, 5, {'text': 'Текст', 'score': 7}
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_comments(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        assert_num_queries(client, 'get', url, 2)
+        assert_num_queries(client, 'get', f'{url}{comments[0]["id"]}/', 1)
+        assert_num_queries(admin_client, 'post', url, 2, {'text': 'Текст'})
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_users(self, admin_client, user_client, admin):
+        assert_num_queries(admin_client, 'get', '/api/v1/users/', 3)
+        assert_num_queries(
+            admin_client, 'get', f'/api/v1/users/{admin.username}/', 1
+        )
+        assert_num_queries(user_client, 'get', '/api/v1/users/me/', 1)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_auth(self, client, user):
+        assert_num_queries(
+            client, 'post', '/api/v1/auth/signup/', 4,
+            {'username': user.username, 'email': user.email}
+        )
+        user.refresh_from_db()
+        assert_num_queries(
+            client, 'post', '/api/v1/auth/token/', 1,
+            {
+                'username': user.username,
+                'confirmation_code': user.confirmation_code
+            }
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_08_cached_authentication(self, user_client, user):
+        assert_num_queries(user_client, 'get', '/api/v1/users/me/', 1)
+        response = assert_num_queries(
+            user_client, 'get', '/api/v1/users/', 0
+        )
+        assert response.status_code == 403, (
+            'Проверьте, что права проверяются по закэшированной роли '
+            'без запросов к базе данных'
+        )
+        user.role = 'admin'
+        user.save()
+        response = user_client.get('/api/v1/users/')
+        assert response.status_code == 200, (
+            'Проверьте, что изменение роли пользователя сбрасывает кэш '
+            'аутентификации'
+        )
+        response = assert_num_queries(
+            user_client, 'get', '/api/v1/users/me/', 1
+        )
+        assert response.json()['email'] == user.email
+
+    @pytest.mark.django_db(transaction=True)
+    def test_09_nested_scoping(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        review_id = reviews[0]['id']
+        assert_num_queries(
+            client, 'get', f'/api/v1/titles/{titles[1]["id"]}/reviews/', 2
+        )
+        assert client.get('/api/v1/titles/0/reviews/').status_code == 404, (
+            'Проверьте, что список отзывов несуществующего произведения '
+            'возвращает 404'
+        )
+        wrong = f'/api/v1/titles/{titles[1]["id"]}/reviews/{review_id}/'
+        response = assert_num_queries(client, 'get', f'{wrong}comments/', 2)
+        assert response.status_code == 404, (
+            'Проверьте, что комментарии отзыва запрашиваются только '
+            'у его произведения'
+        )
+        response = client.get(f'{wrong}comments/{comments[0]["id"]}/')
+        assert response.status_code == 404
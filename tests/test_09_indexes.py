@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+
+from .common import load_dataset, query_plans
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='EXPLAIN QUERY PLAN есть в SQLite'
+)
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    load_dataset(tmp_path)
+
+
+def assert_uses_index(client, url, index, sorted_by_index=True):
+    plans = query_plans(client, url)
+    details = [detail for _, plan in plans for detail in plan]
+    for detail in details:
+        assert not detail.startswith('SCAN') or 'USING' in detail, (
+            f'Проверьте, что GET запрос `{url}` не читает таблицу целиком: '
+            f'{detail}'
+        )
+    assert any(index in detail for detail in details), (
+        f'Проверьте, что GET запрос `{url}` использует индекс `{index}`: '
+        f'{details}'
+    )
+    if sorted_by_index:
+        page = [plan for sql, plan in plans if 'LIMIT' in sql][0]
+        assert not any('TEMP B-TREE' in detail for detail in page), (
+            f'Проверьте, что GET запрос `{url}` сортирует строки '
+            f'по индексу, а не во временной таблице: {page}'
+        )
+
+
+class Test09IndexesAPI:
+
+    @pytest.mark.django_db
+    def test_01_titles(self, client, dataset):
+        from reviews.models import Title
+
+        year = Title.objects.values_list('year', flat=True).first()
+        assert_uses_index(client, '/api/v1/titles/', 'title_name_idx')
+        assert_uses_index(
+            client, '/api/v1/titles/?offset=200', 'title_name_idx'
+        )
+        assert_uses_index(
+            client, f'/api/v1/titles/?year={year}', 'title_year_name_idx'
+        )
+        assert_uses_index(
+            client, '/api/v1/titles/?category=book', 'title_category_name_idx'
+        )
+        assert_uses_index(
+            client, '/api/v1/titles/?genre=drama',
+            'genretitle_genre_title_idx', sorted_by_index=False
+        )
+
+    @pytest.mark.django_db
+    def test_02_reviews_and_comments(self, client, dataset):
+        from reviews.models import Comment
+
+        comment = Comment.objects.select_related('review').first()
+        url = f'/api/v1/titles/{comment.review.title_id}/reviews/'
+        assert_uses_index(client, url, 'review_title_pub_date_idx')
+        assert_uses_index(
+            client, f'{url}{comment.review_id}/comments/',
+            'comment_review_pub_date_idx'
+        )
+
+    @pytest.mark.django_db
+    def test_03_users(self, dataset, admin_client):
+        assert_uses_index(
+            admin_client, '/api/v1/users/', 'sqlite_autoindex_reviews_user'
+        )
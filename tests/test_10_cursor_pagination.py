@@ -0,0 +1,117 @@
+import pytest
+from django.db import connection
+
+from .common import create_reviews, load_dataset, query_plans
+
+
+def walk(client, url):
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+        )
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что при пагинации курсором не считается `count`'
+        )
+        pages.append(data)
+        url = data['next']
+    return pages
+
+
+class Test10CursorPaginationAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_limit_offset_by_default(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/')
+        data = response.json()
+        assert 'count' in data and 'next' in data, (
+            'Проверьте, что без параметра `cursor` '
+            'используется пагинация limit/offset'
+        )
+
+    @pytest.mark.django_db
+    def test_02_reviews_and_comments(self, client, tmp_path):
+        from reviews.models import Comment, Review
+
+        load_dataset(tmp_path, titles=20, reviews=400, comments=400)
+        Review.objects.filter(title_id=1, pk__lte=10).update(
+            pub_date=Review.objects.get(pk=1).pub_date
+        )
+        url = '/api/v1/titles/1/reviews/'
+        pages = walk(client, f'{url}?cursor=&limit=7')
+        ids = [row['id'] for page in pages for row in page['results']]
+        expected = list(
+            Review.objects.filter(title_id=1)
+            .order_by('-pub_date', '-id').values_list('id', flat=True)
+        )
+        assert ids == expected, (
+            'Проверьте, что при пагинации курсором отзывы выдаются '
+            'по убыванию (pub_date, id) без пропусков и повторов'
+        )
+        assert all(len(page['results']) == 7 for page in pages[:-1])
+        assert pages[0]['previous'] is None
+
+        previous = client.get(pages[2]['previous']).json()
+        assert previous['results'] == pages[1]['results'], (
+            'Проверьте, что ссылка `previous` ведёт на предыдущую страницу'
+        )
+        assert client.get(previous['previous']).json()['results'] == (
+            pages[0]['results']
+        )
+
+        review_id = Comment.objects.values_list('review_id', flat=True)[0]
+        title_id = Review.objects.get(pk=review_id).title_id
+        pages = walk(
+            client,
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+            '?cursor=&limit=3'
+        )
+        ids = [row['id'] for page in pages for row in page['results']]
+        assert ids == list(
+            Comment.objects.filter(review_id=review_id)
+            .order_by('-pub_date', '-id').values_list('id', flat=True)
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_titles(self, client, admin_client):
+        from reviews.models import Title
+
+        Title.objects.bulk_create(
+            Title(name=name, year=2000) for name in 'ВБАБВАБ'
+        )
+        pages = walk(client, '/api/v1/titles/?cursor=&limit=2')
+        ids = [row['id'] for page in pages for row in page['results']]
+        assert ids == list(
+            Title.objects.order_by('name', 'id').values_list('id', flat=True)
+        ), (
+            'Проверьте, что при пагинации курсором произведения выдаются '
+            'по (name, id), в том числе с одинаковыми названиями'
+        )
+        response = client.get('/api/v1/titles/?cursor=мусор')
+        assert response.status_code == 404, (
+            'Проверьте, что неверный курсор возвращает статус 404'
+        )
+
+    @pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='EXPLAIN QUERY PLAN есть в SQLite'
+    )
+    @pytest.mark.django_db
+    def test_04_deep_page_uses_index(self, client, tmp_path):
+        load_dataset(tmp_path)
+        pages = walk(client, '/api/v1/titles/1/reviews/?cursor=&limit=50')
+        assert len(pages) > 3
+        url = pages[-2]['next']
+        page = [plan for sql, plan in query_plans(client, url)
+                if 'LIMIT' in sql][0]
+        assert any(
+            'review_title_pub_date_idx (title_id=? AND pub_date<?)' in detail
+            for detail in page
+        ), (
+            'Проверьте, что страница по курсору начинается сразу с позиции '
+            f'курсора в индексе: {page}'
+        )
+        assert not any('TEMP B-TREE' in detail for detail in page)
@@ -0,0 +1,116 @@
+import pytest
+
+from .common import create_titles
+from .test_08_query_count import assert_num_queries
+
+
+def cache_status(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+    )
+    return response['X-Cache']
+
+
+class Test11ResponseCacheAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_cached_reads(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        urls = (
+            '/api/v1/categories/', '/api/v1/genres/', '/api/v1/titles/',
+            '/api/v1/titles/?genre=drama',
+            f'/api/v1/titles/{titles[0]["id"]}/',
+        )
+        for url in urls:
+            first = client.get(url)
+            response = assert_num_queries(client, 'get', url, 0)
+            assert response['X-Cache'] == 'HIT', (
+                f'Проверьте, что повторный GET запрос `{url}` '
+                'отдаётся из кэша'
+            )
+            assert response.json() == first.json()
+        assert cache_status(admin_client, '/api/v1/titles/') == 'MISS', (
+            'Проверьте, что ключ кэша учитывает роль пользователя'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_precise_invalidation(self, client, admin_client):
+        from reviews.models import Genre
+
+        titles, _, genres = create_titles(admin_client)
+        first = f'/api/v1/titles/{titles[0]["id"]}/'
+        second = f'/api/v1/titles/{titles[1]["id"]}/'
+        urls = (
+            '/api/v1/categories/', '/api/v1/genres/', '/api/v1/titles/',
+            first, second,
+        )
+        for url in urls:
+            client.get(url)
+
+        response = admin_client.post(
+            f'{first}reviews/', data={'text': 'Текст', 'score': 7}
+        )
+        assert response.status_code == 201
+        assert cache_status(client, first) == 'MISS', (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения'
+        )
+        assert client.get(first).json()['rating'] == 7
+        assert cache_status(client, '/api/v1/titles/') == 'MISS'
+        for url in ('/api/v1/categories/', '/api/v1/genres/', second):
+            assert cache_status(client, url) == 'HIT', (
+                f'Проверьте, что отзыв не сбрасывает кэш `{url}`'
+            )
+
+        genre = Genre.objects.get(slug=genres[2]['slug'])
+        genre.name = 'Трагедия'
+        genre.save()
+        assert cache_status(client, '/api/v1/genres/') == 'MISS'
+        assert cache_status(client, second) == 'MISS', (
+            'Проверьте, что изменение жанра сбрасывает кэш его произведений'
+        )
+        assert client.get(second).json()['genre'][0]['name'] == 'Трагедия'
+        for url in ('/api/v1/categories/', first):
+            assert cache_status(client, url) == 'HIT', (
+                f'Проверьте, что изменение жанра не сбрасывает кэш `{url}`'
+            )
+
+        response = admin_client.delete(f'/api/v1/genres/{genres[2]["slug"]}/')
+        assert response.status_code == 204
+        assert client.get(second).json()['genre'] == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_stats(self, client, admin_client, user_client):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        response = user_client.get('/api/v1/cache/stats/')
+        assert response.status_code == 403, (
+            'Проверьте, что статистика кэша доступна только администратору'
+        )
+        response = admin_client.get('/api/v1/cache/stats/')
+        assert response.status_code == 200
+        assert response.json()['genres']['list'] == {'hits': 1, 'misses': 1}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_host_in_key(self, client):
+        from reviews.models import Title
+
+        for number in range(6):
+            Title.objects.create(name=f'Произведение {number}', year=2000)
+        url = '/api/v1/titles/'
+        response = client.get(url, HTTP_HOST='evil.example')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['next'].startswith('http://evil.example/')
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что ключ кэша учитывает хост запроса'
+        )
+        assert response.json()['next'].startswith('http://testserver/'), (
+            'Проверьте, что ссылки пагинации из кэша не содержат чужой хост'
+        )
+        assert cache_status(client, url) == 'HIT'
+        response = client.get(url, secure=True)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что ключ кэша учитывает схему запроса'
+        )
+        assert response.json()['next'].startswith('https://testserver/')
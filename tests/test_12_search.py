@@ -0,0 +1,105 @@
+import pytest
+
+
+@pytest.fixture(params=['fts5', 'python'])
+def search_backend(request, settings):
+    from api.search import get_backend
+
+    settings.SEARCH_BACKEND = request.param
+    get_backend.cache_clear()
+    yield request.param
+    get_backend.cache_clear()
+
+
+def names(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+    )
+    return [row['name'] for row in response.json()['results']]
+
+
+class Test12SearchAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles(self, client, search_backend):
+        from reviews.models import Title
+
+        Title.objects.create(
+            name='Туманность', year=2000, description='Резкий поворот сюжета'
+        )
+        Title.objects.create(name='Поворот туда', year=2000)
+        Title.objects.create(name='Проект', year=2000)
+        assert names(client, '/api/v1/titles/?name=Пово') == [
+            'Поворот туда', 'Туманность'
+        ], (
+            'Проверьте, что поиск по `name` находит слова по началу, '
+            'а совпадения в названии выше совпадений в описании'
+        )
+        assert names(client, '/api/v1/titles/?name=пов тУд') == [
+            'Поворот туда'
+        ], 'Проверьте, что поиск находит произведения со всеми словами'
+        assert names(client, '/api/v1/titles/?name=ворот') == [], (
+            'Проверьте, что поиск ищет слова по началу, а не подстроки'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_index_follows_changes(self, client, search_backend):
+        from reviews.models import Title
+
+        names(client, '/api/v1/titles/?name=пробный')
+        title = Title.objects.create(name='Пробный', year=2000)
+        assert names(client, '/api/v1/titles/?name=пробн') == ['Пробный']
+        title.name = 'Итоговый'
+        title.save()
+        assert names(client, '/api/v1/titles/?name=пробн') == [], (
+            'Проверьте, что поисковый индекс обновляется при изменении'
+        )
+        assert names(client, '/api/v1/titles/?name=итог') == ['Итоговый']
+        title.delete()
+        assert names(client, '/api/v1/titles/?name=итог') == [], (
+            'Проверьте, что поисковый индекс обновляется при удалении'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_genres_and_categories(self, client, admin_client,
+                                      search_backend):
+        for url in ('/api/v1/genres/', '/api/v1/categories/'):
+            for name, slug in (('Научная фантастика', 'sci-fi'),
+                               ('Фэнтези', 'fantasy')):
+                admin_client.post(url, data={'name': name, 'slug': slug})
+            assert names(client, f'{url}?search=фан') == [
+                'Научная фантастика'
+            ], f'Проверьте, что `{url}` ищет по началу слов названия'
+            assert sorted(names(client, f'{url}?search=ф')) == [
+                'Научная фантастика', 'Фэнтези'
+            ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_incremental_import(self, client, search_backend, tmp_path,
+                                   monkeypatch):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        def rebuild(kinds=None):
+            raise AssertionError('Полное переиндексирование')
+
+        monkeypatch.setattr('api.importer.rebuild_search_index', rebuild)
+        titles = tmp_path / 'titles.csv'
+        for rows in (
+            '1,Пробный,2000,\n2,Черновик,2000,\n',
+            '1,Пробный,2000,\n2,Итоговый,2000,\n3,Новинка,2001,\n',
+        ):
+            titles.write_text(f'id,name,year,category\n{rows}', 'utf8')
+            call_command(
+                'import_csv', data_dir=str(tmp_path), tables=['titles'],
+                incremental=True, stdout=StringIO()
+            )
+        assert names(client, '/api/v1/titles/?name=черн') == [], (
+            'Проверьте, что import_csv --incremental обновляет поисковый '
+            'индекс изменённых строк'
+        )
+        assert names(client, '/api/v1/titles/?name=итог') == ['Итоговый']
+        assert names(client, '/api/v1/titles/?name=нов') == ['Новинка']
+        assert names(client, '/api/v1/titles/?name=проб') == ['Пробный']
@@ -0,0 +1,75 @@
+import pytest
+from rest_framework.test import APIClient
+
+from .test_08_query_count import assert_num_queries
+
+
+@pytest.fixture
+def stateless(settings):
+    settings.AUTH_STATELESS_TOKENS = True
+
+
+def token_client(user):
+    user.confirmation_code = 'code'
+    user.save()
+    response = APIClient().post(
+        '/api/v1/auth/token/',
+        data={'username': user.username, 'confirmation_code': 'code'}
+    )
+    assert response.status_code == 201
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}')
+    return client
+
+
+class Test13StatelessTokensAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_no_user_queries(self, stateless, admin):
+        from api.authentication import local_cache
+
+        client = token_client(admin)
+        client.get('/api/v1/users/?limit=1')
+        local_cache.delete(f'user:{admin.pk}')
+        response = assert_num_queries(client, 'get', '/api/v1/genres/', 1)
+        assert response.status_code == 200, (
+            'Проверьте, что роль берётся из токена без запроса пользователя'
+        )
+        response = client.post(
+            '/api/v1/categories/', data={'name': 'Фильм', 'slug': 'movie'}
+        )
+        assert response.status_code == 201
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_role_change_revokes(self, stateless, admin_client, user):
+        client = token_client(user)
+        assert client.get('/api/v1/users/').status_code == 403
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == 200
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что изменение пользователя отзывает его токены'
+        )
+        user.refresh_from_db()
+        client = token_client(user)
+        assert client.get('/api/v1/users/').status_code == 200
+
+        user.role = 'user'
+        user.save()
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что смена роли отзывает токены пользователя'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_profile(self, stateless, user):
+        client = token_client(user)
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 200
+        assert response.json()['email'] == user.email
+        response = client.patch('/api/v1/users/me/', data={'bio': 'Новое'})
+        assert response.status_code == 200
+        assert client.get('/api/v1/users/me/').status_code == 200, (
+            'Проверьте, что изменение профиля без смены роли '
+            'не отзывает токены'
+        )
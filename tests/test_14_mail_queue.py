@@ -0,0 +1,182 @@
+import threading
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import connection
+
+PARALLEL = 8
+
+
+class FailingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+@pytest.fixture
+def queued(settings):
+    settings.MAIL_QUEUE_EAGER = False
+
+
+class Test14MailQueueAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_queues(self, client, queued):
+        from reviews.models import OutboundEmail
+
+        outbox_before_count = len(mail.outbox)
+        response = client.post(
+            '/api/v1/auth/signup/',
+            data={'username': 'queued', 'email': 'queued@yamdb.fake'}
+        )
+        assert response.status_code == 200
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что письмо с кодом подтверждения ставится в очередь, '
+            'а не отправляется во время запроса'
+        )
+        email = OutboundEmail.objects.get()
+        assert email.recipient == 'queued@yamdb.fake'
+        assert email.sent_at is None
+
+        call_command('send_queued_mail')
+        assert len(mail.outbox) == outbox_before_count + 1
+        assert mail.outbox[-1].to == ['queued@yamdb.fake']
+        email.refresh_from_db()
+        assert email.sent_at is not None
+        call_command('send_queued_mail')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что отправленные письма не отправляются повторно'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_retry_with_backoff(self, settings, queued):
+        from api.mail import queue_mail
+        from reviews.models import OutboundEmail
+
+        email = queue_mail('retry@yamdb.fake', 'Тема', 'Текст')
+        backend = settings.EMAIL_BACKEND
+        settings.EMAIL_BACKEND = 'tests.test_14_mail_queue.FailingBackend'
+        call_command('send_queued_mail')
+        email.refresh_from_db()
+        assert email.sent_at is None
+        assert email.attempts == 1
+        assert 'SMTP' in email.last_error
+        assert email.next_attempt_at > email.created, (
+            'Проверьте, что повторная отправка откладывается'
+        )
+
+        settings.EMAIL_BACKEND = backend
+        outbox_before_count = len(mail.outbox)
+        call_command('send_queued_mail')
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что письмо не отправляется раньше следующей попытки'
+        )
+        OutboundEmail.objects.update(next_attempt_at=email.created)
+        call_command('send_queued_mail')
+        assert len(mail.outbox) == outbox_before_count + 1
+        email.refresh_from_db()
+        assert email.attempts == 2 and email.sent_at is not None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_signup_atomic(self, client, queued, monkeypatch):
+        from api import views
+        from reviews.models import OutboundEmail, User
+
+        def failing_queue_mail(*args):
+            raise ConnectionError('Очередь недоступна')
+
+        monkeypatch.setattr(views, 'queue_mail', failing_queue_mail)
+        with pytest.raises(ConnectionError):
+            client.post(
+                '/api/v1/auth/signup/',
+                data={'username': 'atomic', 'email': 'atomic@yamdb.fake'}
+            )
+        assert not User.objects.filter(username='atomic').exists(), (
+            'Проверьте, что пользователь не создаётся, если письмо '
+            'не удалось поставить в очередь'
+        )
+        assert not OutboundEmail.objects.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_parallel_signups(self, client, queued, monkeypatch):
+        from api.throttling import TokenBucketThrottle
+        from reviews.models import OutboundEmail, User
+
+        monkeypatch.setattr(TokenBucketThrottle, 'get_rate', lambda self: None)
+        barrier = threading.Barrier(PARALLEL)
+        statuses = []
+
+        def signup(number):
+            try:
+                barrier.wait()
+                for attempt in range(10):
+                    name = f'parallel{number}x{attempt}'
+                    response = client.post(
+                        '/api/v1/auth/signup/',
+                        data={'username': name, 'email': f'{name}@yamdb.fake'}
+                    )
+                    statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=signup, args=(number,))
+            for number in range(PARALLEL)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert statuses == [200] * PARALLEL * 10, (
+            'Проверьте, что одновременные регистрации не завершаются '
+            'ошибкой блокировки базы данных'
+        )
+        users = User.objects.filter(username__startswith='parallel')
+        assert users.count() == PARALLEL * 10
+        assert OutboundEmail.objects.count() == PARALLEL * 10
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_parallel_workers(self):
+        from api.mail import claim
+        from reviews.models import OutboundEmail
+
+        for _ in range(20):
+            OutboundEmail.objects.bulk_create(
+                OutboundEmail(
+                    recipient=f'worker{number}@yamdb.fake', subject='Тема',
+                    body='Текст'
+                )
+                for number in range(150)
+            )
+            barrier = threading.Barrier(2)
+            claimed = []
+            errors = []
+
+            def work():
+                try:
+                    barrier.wait()
+                    claimed.append([email.pk for email in claim(100)])
+                except Exception as error:
+                    errors.append(error)
+                finally:
+                    connection.close()
+
+            threads = [threading.Thread(target=work) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert not errors, (
+                'Проверьте, что несколько обработчиков очереди могут '
+                f'работать одновременно: {errors[0]!r}'
+            )
+            first, second = claimed
+            assert not set(first) & set(second), (
+                'Проверьте, что два обработчика не берут одно и то же письмо'
+            )
+            assert sorted(first + second) == sorted(
+                OutboundEmail.objects.values_list('pk', flat=True)
+            )
+            OutboundEmail.objects.all().delete()
@@ -0,0 +1,115 @@
+import pytest
+from django.core import mail
+
+SIGNUP = '/api/v1/auth/signup/'
+TOKEN = '/api/v1/auth/token/'
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    from api.throttling import TokenBucketThrottle
+
+    now = [1000.0]
+    monkeypatch.setattr(TokenBucketThrottle, 'timer', lambda self: now[0])
+    return now
+
+
+class Test15ThrottlingAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_dedup(self, client):
+        from reviews.models import User
+
+        data = {'username': 'dedup', 'email': 'dedup@yamdb.fake'}
+        outbox_before_count = len(mail.outbox)
+        assert client.post(SIGNUP, data=data).status_code == 200
+        code = User.objects.get(username='dedup').confirmation_code
+        assert client.post(SIGNUP, data=data).status_code == 200
+        assert User.objects.get(username='dedup').confirmation_code == code, (
+            'Проверьте, что повторная регистрация в течение '
+            'SIGNUP_RESEND_WINDOW не меняет код подтверждения'
+        )
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что повторная регистрация в течение '
+            'SIGNUP_RESEND_WINDOW не отправляет письмо повторно'
+        )
+
+        User.objects.filter(username='dedup').update(
+            confirmation_code_sent_at=None
+        )
+        assert client.post(SIGNUP, data=data).status_code == 200
+        assert User.objects.get(username='dedup').confirmation_code != code
+        assert len(mail.outbox) == outbox_before_count + 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_signup_email_bucket(self, client, clock):
+        data = {'username': 'bucket', 'email': 'bucket@yamdb.fake'}
+        for _ in range(5):
+            assert client.post(SIGNUP, data=data).status_code == 200
+        response = client.post(SIGNUP, data=data)
+        assert response.status_code == 429, (
+            f'Проверьте, что частые запросы к `{SIGNUP}` с одним email '
+            'ограничиваются'
+        )
+        assert int(response['Retry-After']) > 0
+        other = {'username': 'other', 'email': 'other@yamdb.fake'}
+        assert client.post(SIGNUP, data=other).status_code == 200, (
+            'Проверьте, что ограничение по email не влияет на другие адреса'
+        )
+        clock[0] += 3600 / 5
+        assert client.post(SIGNUP, data=data).status_code == 200, (
+            'Проверьте, что корзина пополняется со временем'
+        )
+        assert client.post(SIGNUP, data=data).status_code == 429
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_ip_bucket(self, client, clock):
+        for number in range(20):
+            response = client.post(SIGNUP, data={
+                'username': f'ip{number}', 'email': f'ip{number}@yamdb.fake'
+            })
+            assert response.status_code == 200
+        response = client.post(
+            SIGNUP, data={'username': 'ip', 'email': 'ip@yamdb.fake'}
+        )
+        assert response.status_code == 429, (
+            f'Проверьте, что частые запросы к `{SIGNUP}` с одного IP '
+            'ограничиваются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_token_username_bucket(self, client, clock, user):
+        data = {'username': user.username, 'confirmation_code': 'wrong'}
+        for _ in range(10):
+            assert client.post(TOKEN, data=data).status_code == 400
+        assert client.post(TOKEN, data=data).status_code == 429, (
+            f'Проверьте, что подбор кода через `{TOKEN}` ограничивается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_forwarded_for_ignored(self, client, clock):
+        for number in range(30):
+            client.post(
+                TOKEN, data={'username': f'spoof{number}'},
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{number}'
+            )
+        response = client.post(
+            TOKEN, data={'username': 'spoof'},
+            HTTP_X_FORWARDED_FOR='10.0.1.1'
+        )
+        assert response.status_code == 429, (
+            'Проверьте, что без NUM_PROXIES ограничение по IP не обходится '
+            'заголовком X-Forwarded-For'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_list_body(self, client):
+        for url in (SIGNUP, TOKEN):
+            response = client.post(
+                url, data=[{'username': 'list'}],
+                content_type='application/json'
+            )
+            assert response.status_code == 400, (
+                f'Проверьте, что POST запрос `{url}` со списком в теле '
+                'возвращает статус 400'
+            )
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+from django.db import connection
+
+from .test_08_query_count import assert_num_queries
+
+PARALLEL = 8
+
+
+class Test16ReviewConcurrencyAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_parallel_reviews(self, admin_client):
+        from reviews.models import Review, Title
+
+        title = Title.objects.create(name='Гонка', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        barrier = threading.Barrier(PARALLEL)
+        statuses = []
+
+        def post():
+            try:
+                barrier.wait()
+                response = admin_client.post(
+                    url, data={'text': 'Текст', 'score': 5}
+                )
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=post) for _ in range(PARALLEL)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(statuses) == [201] + [400] * (PARALLEL - 1), (
+            'Проверьте, что из одновременных запросов на создание отзыва '
+            'одного автора успешен только один, а остальные получают 400'
+        )
+        assert Review.objects.filter(title=title).count() == 1
+        title.refresh_from_db()
+        assert title.reviews_count == 1 and title.rating == 5
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_duplicate_without_lookup(self, admin_client):
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Повтор', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        admin_client.post(url, data={'text': 'Текст', 'score': 5})
+        response = assert_num_queries(
+            admin_client, 'post', url, 3, {'text': 'Текст', 'score': 5}
+        )
+        assert response.status_code == 400
+        assert response.json() == {
+            'non_field_errors': ['Вы уже оставили отзыв.']
+        }
@@ -0,0 +1,95 @@
+import pytest
+from django.core.management import call_command
+
+from .test_08_query_count import assert_num_queries
+
+
+def histogram(**counts):
+    return {str(score): counts.get(f's{score}', 0) for score in range(1, 11)}
+
+
+class Test17TitleStatsAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_stats(self, client, admin_client, admin, user, moderator):
+        from reviews.models import Review, Title
+
+        title = Title.objects.create(name='Статистика', year=2000)
+        url = f'/api/v1/titles/{title.id}/stats/'
+        response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+        )
+        assert response.json() == {
+            'count': 0, 'mean': None, 'histogram': histogram()
+        }
+
+        Review.objects.create(title=title, author=admin, text='.', score=10)
+        Review.objects.create(title=title, author=user, text='.', score=6)
+        review = Review.objects.create(
+            title=title, author=moderator, text='.', score=6
+        )
+        response = assert_num_queries(client, 'get', url, 1)
+        assert response.json() == {
+            'count': 3, 'mean': 22 / 3, 'histogram': histogram(s6=2, s10=1)
+        }, 'Проверьте, что статистика обновляется при создании отзывов'
+
+        response = admin_client.patch(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/',
+            data={'score': 2}
+        )
+        assert response.status_code == 200
+        assert client.get(url).json()['histogram'] == histogram(
+            s2=1, s6=1, s10=1
+        ), 'Проверьте, что статистика обновляется при изменении оценки'
+
+        response = admin_client.delete(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        )
+        assert response.status_code == 204
+        assert client.get(url).json() == {
+            'count': 2, 'mean': 8.0, 'histogram': histogram(s6=1, s10=1)
+        }, 'Проверьте, что статистика обновляется при удалении отзыва'
+        assert client.get('/api/v1/titles/0/stats/').status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rebuild(self, client, admin, user):
+        from reviews.models import Review, ScoreHistogram, Title
+
+        title = Title.objects.create(name='Пересчёт', year=2000)
+        Review.objects.create(title=title, author=admin, text='.', score=3)
+        Review.objects.create(title=title, author=user, text='.', score=3)
+        ScoreHistogram.objects.filter(title=title).update(score_3=0, score_1=5)
+        call_command('rebuild_title_stats')
+        response = client.get(f'/api/v1/titles/{title.id}/stats/')
+        assert response.json()['histogram'] == histogram(s3=2), (
+            'Проверьте, что rebuild_title_stats пересчитывает распределение '
+            'оценок'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cascade_delete(self, client, admin_client, admin, user):
+        from reviews.models import Review, ScoreHistogram, Title
+
+        title = Title.objects.create(name='Удаление', year=2000)
+        other = Title.objects.create(name='Остаётся', year=2000)
+        for author, score in ((admin, 4), (user, 8)):
+            Review.objects.create(
+                title=title, author=author, text='.', score=score
+            )
+        Review.objects.create(title=other, author=admin, text='.', score=5)
+        Review.objects.create(title=other, author=user, text='.', score=9)
+
+        response = admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 204, (
+            'Проверьте, что произведение с отзывами удаляется'
+        )
+        assert not ScoreHistogram.objects.filter(title_id=title.id).exists()
+
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204, (
+            'Проверьте, что пользователь с отзывами удаляется'
+        )
+        assert client.get(f'/api/v1/titles/{other.id}/stats/').json() == {
+            'count': 1, 'mean': 5.0, 'histogram': histogram(s5=1)
+        }, 'Проверьте, что удаление автора обновляет статистику произведения'
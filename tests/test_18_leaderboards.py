@@ -0,0 +1,91 @@
+import pytest
+from django.core.management import call_command
+
+from .test_08_query_count import assert_num_queries
+
+
+def catalog():
+    from reviews.models import Categorу, Genre, Review, Title, User
+
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    film = Categorу.objects.create(name='Фильм', slug='film')
+    users = [
+        User.objects.create(username=f'critic{i}', email=f'c{i}@yamdb.fake')
+        for i in range(12)
+    ]
+    scores = {
+        'Лучшее': (10, 2, drama, film),
+        'Популярное': (8, 12, comedy, film),
+        'Среднее': (6, 3, drama, None),
+    }
+    titles = {}
+    for name, (score, count, genre, category) in scores.items():
+        title = Title.objects.create(name=name, year=2000, category=category)
+        title.genre.add(genre)
+        Review.objects.bulk_create(
+            Review(title=title, author=user, text='.', score=score)
+            for user in users[:count]
+        )
+        titles[name] = title
+    call_command('rebuild_title_stats')
+    return titles
+
+
+def names(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+    )
+    return [row['title']['name'] for row in response.json()]
+
+
+class Test18LeaderboardsAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_top(self, client):
+        catalog()
+        call_command('refresh_leaderboards')
+        assert names(client, '/api/v1/titles/top/') == [
+            'Лучшее', 'Популярное', 'Среднее'
+        ]
+        assert names(client, '/api/v1/titles/top/?min_reviews=10') == [
+            'Популярное'
+        ], 'Проверьте, что учитывается минимальное количество отзывов'
+        assert names(client, '/api/v1/titles/top/?genre=drama') == [
+            'Лучшее', 'Среднее'
+        ]
+        assert names(client, '/api/v1/titles/top/?category=film&limit=1') == [
+            'Лучшее'
+        ]
+        response = client.get('/api/v1/titles/top/')
+        assert response.json()[0]['position'] == 1
+        assert response.json()[0]['reviews_count'] == 2
+        for url in ('/api/v1/titles/top/?min_reviews=5',
+                    '/api/v1/titles/top/?genre=drama&category=film',
+                    '/api/v1/titles/top/?limit=1000'):
+            assert client.get(url).status_code == 400, (
+                f'Проверьте, что GET запрос `{url}` возвращает статус 400'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_trending(self, client):
+        from reviews.models import Review
+
+        titles = catalog()
+        Review.objects.filter(title=titles['Популярное']).update(
+            pub_date='2000-01-01T00:00:00Z'
+        )
+        call_command('refresh_leaderboards')
+        assert names(client, '/api/v1/titles/trending/') == [
+            'Среднее', 'Лучшее'
+        ], 'Проверьте, что обсуждаемые произведения считаются за последние дни'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_constant_queries(self, client):
+        catalog()
+        call_command('refresh_leaderboards')
+        for limit in (1, 3):
+            assert_num_queries(
+                client, 'get', f'/api/v1/titles/top/?limit={limit}', 2
+            )
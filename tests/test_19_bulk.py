@@ -0,0 +1,122 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def bulk(client, url, items, expected=200):
+    response = client.post(url, data=items, format='json')
+    assert response.status_code == expected, (
+        f'Проверьте, что POST запрос `{url}` возвращает статус {expected}'
+    )
+    return response.json()
+
+
+def statuses(results):
+    return [result['status'] for result in results]
+
+
+def titles(count, genres=('drama',), category='film'):
+    return [
+        {'name': f'Пакет {number}', 'year': 2000, 'genre': list(genres),
+         'category': category}
+        for number in range(count)
+    ]
+
+
+class Test19BulkAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_genres(self, client, admin_client, user_client):
+        url = '/api/v1/genres/bulk/'
+        items = [{'name': 'Драма', 'slug': 'drama'}]
+        response = user_client.post(url, data=items, format='json')
+        assert response.status_code == 403
+        bulk(admin_client, url, items)
+        results = bulk(admin_client, url, [
+            {'name': 'Комедия', 'slug': 'comedy'},
+            {'name': 'Снова драма', 'slug': 'drama'},
+            {'name': 'Ещё комедия', 'slug': 'comedy'},
+            {'name': 'Без slug'},
+            {'name': 'Триллер', 'slug': 'thriller'},
+        ])
+        assert statuses(results) == [201, 400, 400, 400, 201], (
+            'Проверьте, что результат возвращается для каждого объекта'
+        )
+        assert 'slug' in results[1]['errors']
+        response = client.get('/api/v1/genres/?search=трил')
+        assert [row['slug'] for row in response.json()['results']] == [
+            'thriller'
+        ], 'Проверьте, что созданные жанры попадают в поисковый индекс'
+        bulk(admin_client, url, {'name': 'Не список'}, 400)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_titles(self, client, admin_client):
+        from reviews.models import Categorу, Genre
+
+        Genre.objects.create(name='Драма', slug='drama')
+        Genre.objects.create(name='Комедия', slug='comedy')
+        Categorу.objects.create(name='Фильм', slug='film')
+        url = '/api/v1/titles/bulk/'
+        items = titles(2, genres=('drama', 'comedy')) + [
+            {'name': 'Нет жанра', 'year': 2000, 'genre': ['unknown'],
+             'category': 'film'},
+            {'name': 'Из будущего', 'year': 3000, 'genre': ['drama'],
+             'category': 'film'},
+        ]
+        results = bulk(admin_client, url, items)
+        assert statuses(results) == [201, 201, 400, 400]
+        assert 'genre' in results[2]['errors']
+        response = client.get(f'/api/v1/titles/{results[1]["id"]}/')
+        assert response.json()['name'] == 'Пакет 1'
+        assert sorted(row['slug'] for row in response.json()['genre']) == [
+            'comedy', 'drama'
+        ], 'Проверьте, что жанры произведений сохраняются'
+        assert client.get('/api/v1/titles/?genre=comedy').json()['count'] == 2
+        assert client.get('/api/v1/titles/?name=пакет').json()['count'] == 2
+
+        executed = []
+        for count in (1, 50):
+            with CaptureQueriesContext(connection) as context:
+                bulk(admin_client, url, titles(count))
+            executed.append(len(context.captured_queries))
+        assert executed[0] == executed[1], (
+            'Проверьте, что число запросов к базе данных не зависит '
+            f'от размера пакета: {executed}'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_reviews(self, client, admin_client, admin, user):
+        from reviews.models import Title
+
+        first = Title.objects.create(name='Первое', year=2000)
+        second = Title.objects.create(name='Второе', year=2000)
+        url = '/api/v1/titles/reviews/bulk/'
+        results = bulk(admin_client, url, [
+            {'title': first.id, 'author': admin.username, 'text': '.',
+             'score': 10},
+            {'title': first.id, 'author': user.username, 'text': '.',
+             'score': 6},
+            {'title': second.id, 'author': user.username, 'text': '.',
+             'score': 4},
+            {'title': first.id, 'author': user.username, 'text': '.',
+             'score': 1},
+            {'title': 0, 'author': user.username, 'text': '.', 'score': 1},
+            {'title': second.id, 'author': 'nobody', 'text': '.',
+             'score': 1},
+        ])
+        assert statuses(results) == [201, 201, 201, 400, 400, 400]
+        response = client.get(f'/api/v1/titles/{first.id}/stats/').json()
+        assert response['count'] == 2 and response['mean'] == 8.0, (
+            'Проверьте, что отзывы из пакета учитываются в рейтинге'
+        )
+        assert response['histogram']['10'] == 1
+        results = bulk(admin_client, url, [
+            {'title': second.id, 'author': user.username, 'text': '.',
+             'score': 5},
+        ])
+        assert statuses(results) == [400], (
+            'Проверьте, что повторный отзыв автора на произведение '
+            'не создаётся'
+        )
+        response = client.get(f'/api/v1/titles/{first.id}/reviews/')
+        assert response.json()['count'] == 2
@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .conftest import MANAGE_PATH
+
+DATA_DIR = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def content(response):
+    return b''.join(response.streaming_content).decode()
+
+
+def snapshot():
+    from reviews.models import (
+        Categorу, Comment, Genre, GenreTitle, Review, Title, User,
+    )
+
+    return {
+        model.__name__: list(model.objects.order_by('pk').values_list())
+        for model in (Categorу, Comment, Genre, GenreTitle, Review, Title)
+    } | {'User': list(User.objects.order_by('pk').values_list(
+        'id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'
+    ))}
+
+
+class Test20ExportAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_access(self, client, user_client, admin_client):
+        url = '/api/v1/export/titles/'
+        assert client.get(url).status_code == 401
+        assert user_client.get(url).status_code == 403
+        assert admin_client.get('/api/v1/export/unknown/').status_code == 404
+        response = admin_client.get(url + '?output=xml')
+        assert response.status_code == 400, (
+            'Проверьте, что неизвестный формат выгрузки возвращает статус 400'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_formats(self, admin_client, admin):
+        from reviews.models import Categorу, Genre, Review, Title
+
+        category = Categorу.objects.create(name='Фильм', slug='film')
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        title = Title.objects.create(
+            name='Сталкер, "Зона"', year=1979, category=category
+        )
+        title.genre.set([drama, comedy])
+        Title.objects.create(name='Без жанра', year=2000)
+        Review.objects.create(title=title, author=admin, text='.', score=9)
+
+        response = admin_client.get('/api/v1/export/titles/')
+        assert response.status_code == 200
+        assert response.streaming, (
+            'Проверьте, что выгрузка отдаётся потоком (StreamingHttpResponse)'
+        )
+        assert response['Content-Type'].startswith('text/csv')
+        rows = list(csv.reader(io.StringIO(content(response))))
+        assert rows == [
+            ['id', 'name', 'year', 'category', 'description'],
+            [str(title.id), 'Сталкер, "Зона"', '1979', str(category.id), ''],
+            [str(title.id + 1), 'Без жанра', '2000', '', ''],
+        ], 'Проверьте, что колонки выгрузки совпадают с static/data/titles.csv'
+
+        response = admin_client.get('/api/v1/export/titles/?output=ndjson')
+        records = [json.loads(line) for line in content(response).splitlines()]
+        assert records[0]['genre'] == [drama.id, comedy.id]
+        assert records[0]['rating'] == 9.0
+        assert records[1]['genre'] == [] and records[1]['category'] is None
+
+        response = admin_client.get('/api/v1/export/reviews/?output=ndjson')
+        record = json.loads(content(response))
+        assert record['author'] == admin.id and record['score'] == 9
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_round_trip(self, tmp_path):
+        from reviews.models import (
+            Categorу, Comment, Genre, GenreTitle, Review, Title, User,
+        )
+
+        call_command('import_csv', data_dir=DATA_DIR, stdout=StringIO())
+        before = snapshot()
+        assert before['Comment']
+        call_command('export_data', str(tmp_path), stdout=StringIO())
+        assert sorted(os.listdir(tmp_path)) == sorted(
+            name for name in os.listdir(DATA_DIR) if name.endswith('.csv')
+        ), 'Проверьте, что имена выгруженных файлов совпадают с static/data'
+        for model in (Comment, Review, GenreTitle, Title, Genre, Categorу,
+                      User):
+            model.objects.all().delete()
+        call_command('import_csv', data_dir=str(tmp_path), stdout=StringIO())
+        assert snapshot() == before, (
+            'Проверьте, что выгрузка загружается обратно командой import_csv'
+        )
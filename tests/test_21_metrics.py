@@ -0,0 +1,87 @@
+import logging
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def metrics():
+    from api import metrics
+
+    metrics.reset()
+    return metrics
+
+
+def sample(text, name, view):
+    match = re.search(
+        rf'^{name}\{{view="{re.escape(view)}"\}} (\S+)$', text, re.M
+    )
+    assert match, f'Проверьте, что метрика {name} для {view} выгружается'
+    return float(match.group(1))
+
+
+class Test21MetricsAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_server_timing(self, client, metrics, caplog):
+        with caplog.at_level(logging.INFO, logger='api.metrics'):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get('/api/v1/titles/')
+        header = response.get('Server-Timing', '')
+        queries = re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', header)
+        assert queries, (
+            'Проверьте, что ответ содержит заголовок Server-Timing '
+            'со временем запросов к базе данных'
+        )
+        assert int(queries.group(1)) == len(context.captured_queries)
+        assert re.search(r'serializer;dur=[\d.]+', header)
+        assert re.search(r'total;dur=[\d.]+', header)
+        assert any(
+            'view=TitleViewSet.list' in message
+            and f'queries={len(context.captured_queries)}' in message
+            for message in caplog.messages
+        ), 'Проверьте, что параметры запроса записываются в лог'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_prometheus(self, client, user_client, admin_client, metrics):
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{title.id}/stats/')
+        client.get('/api/v1/titles/0/')
+
+        url = '/api/v1/metrics/'
+        assert client.get(url).status_code == 401
+        assert user_client.get(url).status_code == 403
+        response = admin_client.get(url)
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        name = 'yamdb_request_duration_seconds'
+        assert sample(text, f'{name}_count', 'TitleViewSet.list') == 2
+        assert sample(text, f'{name}_count', 'TitleViewSet.stats') == 1
+        assert sample(
+            text, 'yamdb_serializer_duration_seconds_sum', 'TitleViewSet.list'
+        ) > 0, 'Проверьте, что учитывается время работы сериализаторов'
+        assert sample(text, 'yamdb_db_queries_count', 'TitleViewSet.list') == 2
+        assert re.search(
+            r'^yamdb_request_duration_seconds_bucket'
+            r'\{view="TitleViewSet.list",le="\+Inf"\} 2$', text, re.M
+        )
+        assert re.search(
+            r'^yamdb_responses_total'
+            r'\{view="TitleViewSet.retrieve",status="404"\} 1$', text, re.M
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_disabled(self, client, settings):
+        settings.METRICS_ENABLED = False
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что METRICS_ENABLED=False отключает middleware'
+        )
@@ -0,0 +1,54 @@
+import logging
+
+import pytest
+
+from .test_08_query_count import create_many_titles
+
+
+class Test22QueryInspectorAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_n_plus_one_raises(self, client, monkeypatch):
+        from api.queries import NPlusOneError
+        from api.views import TitleViewSet
+        from reviews.models import Title
+
+        create_many_titles(count=10, genres_per_title=2)
+        assert client.get('/api/v1/titles/?limit=10').status_code == 200
+        monkeypatch.setattr(TitleViewSet, 'queryset', Title.objects.all())
+        # Another query string, the first response is cached.
+        with pytest.raises(NPlusOneError) as error:
+            client.get('/api/v1/titles/?limit=10&offset=0')
+        assert 'view=TitleViewSet.list' in str(error.value), (
+            'Проверьте, что N+1 запросы обнаруживаются в строгом режиме'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_n_plus_one_logged(self, settings, caplog):
+        from api.queries import inspect_queries
+        from reviews.models import Title
+
+        settings.QUERY_INSPECTOR_STRICT = False
+        create_many_titles(count=6, genres_per_title=1)
+        with caplog.at_level(logging.WARNING, logger='api.queries'):
+            with inspect_queries(view='loop'):
+                for title in Title.objects.all():
+                    list(title.genre.all())
+        assert any(
+            'N+1 view=loop count=6' in message for message in caplog.messages
+        ), 'Проверьте, что повторяющиеся запросы записываются в лог'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_slow_query(self, client, settings, caplog):
+        from api.queries import normalize
+
+        settings.SLOW_QUERY_MS = 0.000001
+        with caplog.at_level(logging.WARNING, logger='api.queries'):
+            client.get('/api/v1/genres/')
+        assert any(
+            message.startswith('slow query view=GenreViewSet.list')
+            for message in caplog.messages
+        ), 'Проверьте, что медленные запросы записываются в лог с именем view'
+        assert normalize(
+            "SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'a''b'"
+        ) == normalize("SELECT * FROM t WHERE id IN (4) AND name = 'c'")
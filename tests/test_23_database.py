@@ -0,0 +1,43 @@
+import pytest
+from django.core.signals import request_started
+from django.db import connection
+
+
+def pragma(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+class Test23DatabaseAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_sqlite_pragmas(self, settings):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Настройки соединения SQLite')
+        pragmas = settings.DATABASES['default']['PRAGMAS']
+        connection.close()
+        assert pragma('journal_mode') == pragmas['journal_mode'].lower(), (
+            'Проверьте, что новое соединение с SQLite включает WAL'
+        )
+        assert pragma('synchronous') == 1, (
+            'Проверьте, что для SQLite установлен synchronous=NORMAL'
+        )
+        assert pragma('busy_timeout') == pragmas['busy_timeout']
+        assert pragma('mmap_size') == pragmas['mmap_size']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_health_check(self, monkeypatch):
+        connection.ensure_connection()
+        monkeypatch.setitem(
+            connection.settings_dict, 'CONN_HEALTH_CHECKS', True
+        )
+        monkeypatch.setattr(connection, 'is_usable', lambda: True)
+        request_started.send(sender=None)
+        assert connection.connection is not None
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+        request_started.send(sender=None)
+        assert connection.connection is None, (
+            'Проверьте, что разорванное соединение закрывается '
+            'в начале запроса'
+        )
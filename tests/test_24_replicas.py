@@ -0,0 +1,73 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    """A SQLite replica that is only updated by sync_replicas."""
+    if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+        pytest.skip('Реплика в файле SQLite')
+    alias = 'replica_test'
+    connections.databases[alias] = {
+        **connections.databases[DEFAULT_DB_ALIAS],
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+    }
+    settings.DATABASE_REPLICAS = [alias]
+    yield alias
+    connections[alias].close()
+    delattr(connections._connections, alias)
+    del connections.databases[alias]
+
+
+def titles_count(client):
+    response = client.get('/api/v1/titles/')
+    assert response.status_code == 200
+    return response.json()['count']
+
+
+class Test24ReplicasAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reads_from_replica(self, replica, client, admin_client):
+        from reviews.models import Categorу, Genre, Title
+
+        Categorу.objects.create(name='Фильм', slug='film')
+        Genre.objects.create(name='Драма', slug='drama')
+        Title.objects.create(name='Первое', year=2000)
+        call_command('sync_replicas', stdout=StringIO())
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Второе', 'year': 2000, 'genre': ['drama'],
+            'category': 'film',
+        })
+        assert response.status_code == 201
+        assert Title.objects.count() == 2, (
+            'Проверьте, что вне запросов чтение идёт с основной базы'
+        )
+        assert titles_count(client) == 1, (
+            'Проверьте, что GET запросы читают данные с реплики'
+        )
+        assert titles_count(admin_client) == 2, (
+            'Проверьте, что клиент после записи читает основную базу'
+        )
+        call_command('sync_replicas', stdout=StringIO())
+        assert titles_count(client) == 2, (
+            'Проверьте, что ответ, прочитанный с отстающей реплики сразу '
+            'после изменения, не попадает в кэш'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_writes_go_to_primary(self, replica, admin_client):
+        from reviews.models import Genre
+
+        call_command('sync_replicas', stdout=StringIO())
+        response = admin_client.post(
+            '/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'}
+        )
+        assert response.status_code == 201
+        assert Genre.objects.using(DEFAULT_DB_ALIAS).filter(
+            slug='drama'
+        ).exists()
+        assert not Genre.objects.using(replica).exists()
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+
+def call(application, method, path, body=b'', headers=(), query=b''):
+    """Runs one request through the ASGI application."""
+    received = [{'type': 'http.request', 'body': body}]
+    sent = []
+
+    async def receive():
+        return received.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'query_string': query,
+        'root_path': '', 'client': ('127.0.0.1', 50000),
+        'server': ('testserver', 80),
+        'headers': [(b'host', b'testserver'), *headers],
+    }
+    asyncio.run(application(scope, receive, send))
+    start, *bodies = sent
+    assert start['type'] == 'http.response.start'
+    return (
+        start['status'], dict(start['headers']),
+        [message['body'] for message in bodies],
+    )
+
+
+@pytest.fixture
+def application():
+    from api.asgi import ASGIHandler
+
+    application = ASGIHandler()
+    yield application
+    application.reads.shutdown()
+    application.writes.shutdown()
+
+
+class Test25ASGI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_catalog_reads(self, application):
+        from reviews.models import Genre, Title
+
+        Genre.objects.create(name='Драма', slug='drama')
+        title = Title.objects.create(name='Произведение', year=2000)
+        status, headers, bodies = call(application, 'GET', '/api/v1/titles/')
+        assert status == 200
+        assert headers[b'content-type'] == b'application/json'
+        assert json.loads(b''.join(bodies))['count'] == 1
+        status, _, bodies = call(
+            application, 'GET', '/api/v1/genres/', query=b'search=%D0%B4%D1%80'
+        )
+        assert json.loads(b''.join(bodies))['results'][0]['slug'] == 'drama'
+        status, _, _ = call(application, 'GET', f'/api/v1/titles/{title.id}/')
+        assert status == 200
+        assert application.executor(
+            {'method': 'GET', 'path': f'/api/v1/titles/{title.id}/reviews/'}
+        ) is application.reads, (
+            'Проверьте, что чтение каталога обслуживает отдельный пул потоков'
+        )
+        assert application.executor(
+            {'method': 'POST', 'path': '/api/v1/titles/'}
+        ) is application.writes
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_writes_and_streaming(self, application, admin, token_admin):
+        body = json.dumps({'name': 'Драма', 'slug': 'drama'}).encode()
+        authorization = f'Bearer {token_admin["access"]}'.encode()
+        status, _, bodies = call(
+            application, 'POST', '/api/v1/genres/', body, headers=[
+                (b'content-type', b'application/json'),
+                (b'authorization', authorization),
+            ]
+        )
+        assert status == 201, b''.join(bodies)
+        status, headers, bodies = call(
+            application, 'GET', '/api/v1/export/genres/',
+            headers=[(b'authorization', authorization)]
+        )
+        assert status == 200 and len(bodies) > 2, (
+            'Проверьте, что потоковый ответ отправляется по частям'
+        )
+        assert b''.join(bodies).decode().splitlines()[1].endswith('drama')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_stream_thread(self, application, admin, token_admin,
+                              monkeypatch):
+        from api import export
+        from reviews.models import Genre
+
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {number}', slug=f'genre-{number}')
+            for number in range(30)
+        )
+        lines = export.lines
+        threads = set()
+
+        def recorded_lines(table, output):
+            for line in lines(table, output):
+                threads.add(threading.get_ident())
+                yield line
+
+        monkeypatch.setattr(export, 'lines', recorded_lines)
+        authorization = f'Bearer {token_admin["access"]}'.encode()
+        status, _, bodies = call(
+            application, 'GET', '/api/v1/export/genres/',
+            headers=[(b'authorization', authorization)]
+        )
+        assert status == 200
+        assert len(b''.join(bodies).decode().splitlines()) == 31
+        assert len(threads) == 1, (
+            'Проверьте, что потоковый ответ читается в одном потоке'
+        )
+
+    def test_04_lifespan(self, application):
+        messages = [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(application({'type': 'lifespan'}, receive, send))
+        assert sent == [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete'
+        ]
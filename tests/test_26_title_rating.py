@@ -0,0 +1,100 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def counters(title):
+    title.refresh_from_db()
+    return title.rating, title.reviews_count, title.score_sum
+
+
+def create_user(django_user_model, number):
+    return django_user_model.objects.create_user(
+        username=f'rater{number}', email=f'rater{number}@yamdb.fake'
+    )
+
+
+class Test26TitleRatingAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_score_update_and_delete(self, client, admin_client, admin,
+                                        user):
+        from reviews.models import Review, Title
+
+        title = Title.objects.create(name='Счётчики', year=2000)
+        Review.objects.create(title=title, author=user, text='.', score=4)
+        review = Review.objects.create(
+            title=title, author=admin, text='.', score=8
+        )
+        assert counters(title) == (6.0, 2, 12)
+
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        assert admin_client.patch(url, data={'score': 2}).status_code == 200
+        assert counters(title) == (3.0, 2, 6), (
+            'Проверьте, что рейтинг пересчитывается при изменении оценки'
+        )
+        assert client.get(f'/api/v1/titles/{title.id}/').json()[
+            'rating'
+        ] == 3
+
+        assert admin_client.delete(url).status_code == 204
+        assert counters(title) == (4.0, 1, 4), (
+            'Проверьте, что рейтинг пересчитывается при удалении отзыва'
+        )
+        Review.objects.get(author=user).delete()
+        assert counters(title) == (None, 0, 0), (
+            'Проверьте, что рейтинг произведения без отзывов пустой'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_cascade(self, admin_client, django_user_model):
+        from reviews.models import Review, ScoreHistogram, Title
+
+        title = Title.objects.create(name='Удаляемое', year=2000)
+        for number in range(10):
+            Review.objects.create(
+                title=title, author=create_user(django_user_model, number),
+                text='.', score=number + 1
+            )
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 204, (
+            'Проверьте, что произведение с отзывами удаляется'
+        )
+        updates = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "reviews_title"')
+        ]
+        assert len(updates) <= 1, (
+            'Проверьте, что удаление произведения не пересчитывает его '
+            'рейтинг для каждого отзыва'
+        )
+        assert not Review.objects.filter(title_id=title.id).exists()
+        assert not ScoreHistogram.objects.filter(title_id=title.id).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_user_cascade(self, admin_client, admin, django_user_model):
+        from reviews.models import Review, Title
+
+        author = create_user(django_user_model, 0)
+        titles = [
+            Title.objects.create(name=f'Произведение {number}', year=2000)
+            for number in range(6)
+        ]
+        for title in titles:
+            Review.objects.create(title=title, author=author, text='.',
+                                  score=10)
+            Review.objects.create(title=title, author=admin, text='.',
+                                  score=5)
+        response = admin_client.delete(f'/api/v1/users/{author.username}/')
+        assert response.status_code == 204, (
+            'Проверьте, что пользователь с отзывами удаляется'
+        )
+        for title in titles:
+            assert counters(title) == (5.0, 1, 5), (
+                'Проверьте, что удаление автора пересчитывает рейтинг '
+                'произведений с его отзывами'
+            )
+            assert title.score_histogram.counts() == {
+                score: int(score == 5) for score in range(1, 11)
+            }
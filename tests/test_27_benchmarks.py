@@ -0,0 +1,68 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import URLPattern, URLResolver
+
+
+def url_names(patterns):
+    """Names of every route in the patterns, includes are walked."""
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= url_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+class Test27BenchmarksAPI:
+
+    def test_01_generate(self, tmp_path):
+        from api.datagen import generate
+
+        sizes = dict(users=20, titles=10, reviews=50, comments=30, seed=1)
+        written = generate(str(tmp_path / 'first'), **sizes)
+        assert written['review.csv'] == 50
+        assert written['comments.csv'] == 30
+        generate(str(tmp_path / 'second'), **sizes)
+        for filename in written:
+            assert (
+                (tmp_path / 'first' / filename).read_bytes()
+                == (tmp_path / 'second' / filename).read_bytes()
+            ), 'Проверьте, что одинаковый seed даёт одинаковые файлы'
+
+    def test_02_summarize(self):
+        from api.benchmarks import summarize
+
+        assert summarize([], 1.0) is None
+        assert summarize([0.002, 0.001, 0.003], 1.0) == {
+            'requests': 3, 'p50_ms': 2.0, 'p95_ms': 3.0, 'p99_ms': 3.0,
+            'mean_ms': 2.0, 'throughput_rps': 3.0,
+        }
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bench_api(self):
+        output = StringIO()
+        call_command(
+            'bench_api', users=20, titles=10, reviews=50, comments=50,
+            requests=2, stdout=output
+        )
+        routes = json.loads(output.getvalue())['routes']
+        failed = {
+            name: result['statuses'] for name, result in routes.items()
+            if any(status >= 500 for status in result['statuses'])
+        }
+        assert not failed, (
+            f'Проверьте, что маршруты bench_api не возвращают ошибки: {failed}'
+        )
+        assert routes['titles-list']['requests'] == 2
+        from api import urls
+
+        missing = url_names(urls.urlpatterns) - {
+            result['url_name'] for result in routes.values()
+        }
+        assert not missing, (
+            f'Проверьте, что bench_api измеряет все маршруты API: {missing}'
+        )
@@ -0,0 +1,232 @@
+import csv
+import shutil
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils.dateparse import parse_datetime
+
+from .test_20_export import DATA_DIR, snapshot
+
+
+def records(path):
+    with open(path, encoding='utf8', newline='') as source:
+        return list(csv.DictReader(source))
+
+
+def import_csv(data_dir, stderr=None, **options):
+    output = StringIO()
+    call_command(
+        'import_csv', data_dir=str(data_dir), stdout=output,
+        stderr=stderr or StringIO(), **options
+    )
+    return output.getvalue()
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    directory = tmp_path / 'data'
+    shutil.copytree(DATA_DIR, directory)
+    return directory
+
+
+def append(path, *rows):
+    # The static files do not end with a line break.
+    with open(path, 'a', encoding='utf8', newline='') as target:
+        target.write('\n')
+        csv.writer(target, lineterminator='\n').writerows(rows)
+
+
+class Test28ImportAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_static_data(self):
+        from reviews.models import (
+            Categorу, Comment, Genre, GenreTitle, Review, Title, User,
+        )
+
+        errors = StringIO()
+        import_csv(DATA_DIR, stderr=errors)
+        # The review of a user missing from users.csv is rejected.
+        assert errors.getvalue().splitlines() == [
+            'review.csv:80 id=50: Пользователь с id=1054 не найден'
+        ], 'Проверьте, что отклонённые строки выводятся в stderr'
+        for model, filename in (
+            (User, 'users.csv'), (Categorу, 'category.csv'),
+            (Genre, 'genre.csv'), (Title, 'titles.csv'),
+            (GenreTitle, 'genre_title.csv'), (Review, 'review.csv'),
+            (Comment, 'comments.csv'),
+        ):
+            rejected = {'50'} if model is Review else set()
+            pks = model.objects.values_list('pk', flat=True)
+            assert sorted(pks) == sorted(
+                int(row['id']) for row in records(f'{DATA_DIR}/{filename}')
+                if row['id'] not in rejected
+            ), f'Проверьте, что import_csv загружает все строки {filename}'
+
+        reviews = {
+            row['id']: row for row in records(f'{DATA_DIR}/review.csv')
+        }
+        review = Review.objects.get(pk=1)
+        assert review.text == reviews['1']['text'], (
+            'Проверьте, что многострочные тексты загружаются целиком'
+        )
+        for review in Review.objects.all():
+            assert review.pub_date == parse_datetime(
+                reviews[str(review.pk)]['pub_date']
+            ), 'Проверьте, что import_csv сохраняет pub_date из файла'
+        scores = [
+            int(row['score']) for row in reviews.values()
+            if row['title_id'] == '1'
+        ]
+        title = Title.objects.get(pk=1)
+        assert (title.reviews_count, title.rating) == (
+            len(scores), sum(scores) / len(scores)
+        ), 'Проверьте, что после загрузки отзывов пересчитывается рейтинг'
+
+        before = snapshot()
+        assert 'уже загружены' in import_csv(DATA_DIR), (
+            'Проверьте, что заполненные таблицы не загружаются повторно'
+        )
+        assert snapshot() == before
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_error_log(self, data_dir, tmp_path):
+        from reviews.models import Review
+
+        append(
+            data_dir / 'review.csv',
+            (900, 1, 'Оценка вне шкалы', 3, 11, '2020-01-01T00:00:00Z'),
+            (901, 999, 'Нет произведения', 3, 5, '2020-01-01T00:00:00Z'),
+            (902, 1, 'Второй отзыв автора', 1, 5, '2020-01-01T00:00:00Z'),
+            (903, 1, 'Без даты', 3, 5, ''),
+            (904, 1, 'Правильный', 3, 5, '2020-01-01T00:00:00Z'),
+        )
+        error_log = tmp_path / 'errors.csv'
+        import_csv(data_dir, error_log=str(error_log))
+        errors = records(error_log)
+        assert [(row['table'], row['id']) for row in errors] == [
+            ('reviews', '50'), ('reviews', '900'), ('reviews', '901'),
+            ('reviews', '903'), ('reviews', '902'),
+        ], (
+            'Проверьте, что import_csv записывает отклонённые строки '
+            'в --error-log'
+        )
+        assert all(row['error'] for row in errors)
+        assert Review.objects.filter(pk=904).exists(), (
+            'Проверьте, что ошибки в пачке не мешают загрузке остальных строк'
+        )
+        assert not Review.objects.filter(pk__in=(900, 901, 902, 903)).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_workers(self, tmp_path):
+        from api.datagen import generate
+        from reviews.models import (
+            Categorу, Comment, Genre, GenreTitle, Review, Title, User,
+        )
+
+        generate(
+            str(tmp_path), users=50, titles=60, reviews=600, comments=600,
+            seed=2
+        )
+        import_csv(tmp_path)
+        sequential = snapshot()
+        for model in (Comment, Review, GenreTitle, Title, Genre, Categorу,
+                      User):
+            model.objects.all().delete()
+        # Small chunks, so every file is split between the workers.
+        import_csv(tmp_path, workers=2, chunk_bytes=4096)
+        assert snapshot() == sequential, (
+            'Проверьте, что import_csv --workers загружает то же, что и '
+            'загрузка в одном процессе'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_incremental_upsert(self, data_dir):
+        from reviews.models import Review, Title
+
+        import_csv(data_dir)
+        reviews = records(data_dir / 'review.csv')
+        assert reviews[0]['id'] == '1'
+        reviews[0]['score'] = '2'
+        with open(data_dir / 'review.csv', 'w', encoding='utf8',
+                  newline='') as target:
+            writer = csv.DictWriter(target, fieldnames=list(reviews[0]))
+            writer.writeheader()
+            writer.writerows(reviews)
+        append(
+            data_dir / 'review.csv',
+            (905, 1, 'Новый отзыв', 3, 6, '2021-01-01T00:00:00Z'),
+        )
+        output = import_csv(data_dir, incremental=True, tables=['reviews'])
+        assert 'Всего загружено 1 и обновлено 1 строк' in output, (
+            'Проверьте, что import_csv --incremental добавляет новые строки, '
+            'обновляет изменённые и пропускает остальные'
+        )
+        assert Review.objects.get(pk=1).score == 2
+        assert Review.objects.get(pk=905).text == 'Новый отзыв'
+        title = Title.objects.get(pk=1)
+        assert (title.reviews_count, title.score_sum) == (3, 2 + 10 + 6), (
+            'Проверьте, что рейтинг изменённых произведений пересчитывается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_resume(self, data_dir, monkeypatch):
+        from api.importer import TABLES_BY_NAME, Importer
+        from reviews.models import ImportCheckpoint, Review
+
+        import_csv(data_dir, tables=['users', 'categories', 'titles'])
+        insert = Importer.insert
+        batches = []
+
+        def failing_insert(self, report, rows):
+            batches.append(rows)
+            if len(batches) == 3:
+                raise RuntimeError('Сбой загрузки')
+            insert(self, report, rows)
+
+        monkeypatch.setattr(Importer, 'insert', failing_insert)
+        with pytest.raises(RuntimeError):
+            import_csv(
+                data_dir, incremental=True, tables=['reviews'], batch_size=10
+            )
+        rows = records(data_dir / 'review.csv')
+        assert Review.objects.count() == 20, (
+            'Проверьте, что пачки до сбоя остаются в базе'
+        )
+        checkpoint = ImportCheckpoint.objects.get(table='reviews')
+        assert checkpoint.last_id == max(int(row['id']) for row in rows[:20])
+
+        monkeypatch.setattr(Importer, 'insert', insert)
+        table = TABLES_BY_NAME['reviews']
+        build = table.build
+        built = []
+
+        def counting_build(row, ids):
+            built.append(row['id'])
+            return build(row, ids)
+
+        monkeypatch.setattr(table, 'build', counting_build)
+        output = import_csv(data_dir, incremental=True, tables=['reviews'])
+        assert f'Продолжаю reviews с байта {checkpoint.byte_offset}' in (
+            output
+        ), 'Проверьте, что прерванная загрузка продолжается с точки загрузки'
+        assert built == [row['id'] for row in rows[20:]], (
+            'Проверьте, что загруженные строки не читаются повторно'
+        )
+        assert sorted(Review.objects.values_list('pk', flat=True)) == sorted(
+            int(row['id']) for row in rows if row['id'] != '50'
+        )
+
+        built.clear()
+        append(
+            data_dir / 'review.csv',
+            (906, 26, 'Дописанный', 3, 7, '2021-01-01T00:00:00Z'),
+            (907, 3, 'Дописанный', 3, 8, '2021-01-01T00:00:00Z'),
+        )
+        import_csv(data_dir, incremental=True, tables=['reviews'])
+        assert built == ['906', '907'], (
+            'Проверьте, что после дописывания строк в конец файла читаются '
+            'только новые строки'
+        )
+        assert Review.objects.filter(pk__in=(906, 907)).count() == 2
@@ -0,0 +1,85 @@
+import pytest
+
+from .test_08_query_count import assert_num_queries
+
+
+class Test29AuthCacheAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_role_change(self, admin_client, user_client, user):
+        assert user_client.get('/api/v1/users/').status_code == 403
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == 200
+        assert user_client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что смена роли действует со следующего запроса'
+        )
+        user.refresh_from_db()
+        user.role = 'user'
+        user.save()
+        assert user_client.get('/api/v1/users/').status_code == 403
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_deactivate_and_delete(self, user_client, user):
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        user.is_active = False
+        user.save()
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что заблокированный пользователь теряет доступ '
+            'со следующего запроса'
+        )
+        user.is_active = True
+        user.save()
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        user.delete()
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что удалённый пользователь теряет доступ '
+            'со следующего запроса'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_profile_from_cache(self, user_client, user):
+        user_client.get('/api/v1/users/me/')
+        response = assert_num_queries(
+            user_client, 'get', '/api/v1/users/me/', 1
+        )
+        assert response.json()['email'] == user.email, (
+            'Проверьте, что профиль из кэша загружает остальные поля '
+            'одним запросом'
+        )
+        response = user_client.patch(
+            '/api/v1/users/me/', data={'bio': 'Новое'}
+        )
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert (user.bio, user.role) == ('Новое', 'user')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_single_revocation(self, admin_client, user_client, user):
+        version = user.token_version
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'moderator'}
+        )
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert user.token_version == version + 1, (
+            'Проверьте, что смена роли увеличивает версию токенов один раз'
+        )
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'bio': 'Другое'}
+        )
+        user.refresh_from_db()
+        assert user.token_version == version + 2, (
+            'Проверьте, что любой PATCH запрос администратора к '
+            '/users/{username}/ отзывает токены пользователя'
+        )
+        response = user_client.patch(
+            '/api/v1/users/me/', data={'bio': 'Своё'}
+        )
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert user.token_version == version + 2, (
+            'Проверьте, что изменение своего профиля без смены прав '
+            'не отзывает токены'
+        )
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+from .conftest import MANAGE_PATH
+
+
+def manage(database, *args):
+    """Runs manage.py on an SQLite file, returns the output."""
+    result = subprocess.run(
+        [sys.executable, 'manage.py', *args], cwd=MANAGE_PATH,
+        capture_output=True, text=True, env={
+            **os.environ, 'DB_ENGINE': 'sqlite3', 'DB_NAME': str(database),
+            'DB_REPLICAS': '',
+        }
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def syncdb_database(database):
+    """
+    A database as migrate --run-syncdb created it before reviews had
+    migrations: the initial tables without records in django_migrations.
+    """
+    manage(database, 'migrate')
+    manage(database, 'migrate', 'reviews', '0001')
+    with sqlite3.connect(database) as connection:
+        connection.execute(
+            "DELETE FROM django_migrations WHERE app = 'reviews'"
+        )
+        connection.executescript('''
+            INSERT INTO reviews_user (
+                id, password, is_superuser, is_staff, is_active, date_joined,
+                username, email, first_name, last_name, bio, role,
+                confirmation_code
+            ) VALUES (
+                1, '', 0, 0, 1, '2020-01-01', 'old', 'old@yamdb.fake', '',
+                '', '', 'user', ''
+            ), (
+                2, '', 0, 0, 1, '2020-01-01', 'older', 'older@yamdb.fake',
+                '', '', '', 'user', ''
+            );
+            INSERT INTO reviews_title (id, name, year)
+            VALUES (1, 'Старое', 2000), (2, 'Без отзывов', 2000);
+            INSERT INTO reviews_review (text, pub_date, score, author_id,
+                                        title_id)
+            VALUES ('.', '2020-01-01', 4, 1, 1), ('.', '2020-01-01', 9, 2, 1);
+        ''')
+
+
+class Test30MigrationsAPI:
+
+    def test_01_upgrade_syncdb_database(self, tmp_path):
+        database = tmp_path / 'db.sqlite3'
+        syncdb_database(database)
+        output = manage(database, 'migrate')
+        assert 'reviews.0001_initial' in output, (
+            'Проверьте, что migrate принимает базу, созданную '
+            'migrate --run-syncdb, как reviews.0001_initial'
+        )
+        assert 'reviews.0002' in output
+        with sqlite3.connect(database) as connection:
+            titles = connection.execute(
+                'SELECT id, rating, reviews_count, score_sum '
+                'FROM reviews_title ORDER BY id'
+            ).fetchall()
+            histogram = connection.execute(
+                'SELECT score_4, score_9 FROM reviews_scorehistogram '
+                'WHERE title_id = 1'
+            ).fetchone()
+        assert titles == [(1, 6.5, 2, 13), (2, None, 0, 0)], (
+            'Проверьте, что миграция заполняет рейтинг существующих '
+            'произведений'
+        )
+        assert histogram == (1, 1)
+        assert 'No migrations to apply' in manage(database, 'migrate')
+
+    def test_02_catalog_indexes(self, tmp_path):
+        database = tmp_path / 'db.sqlite3'
+        syncdb_database(database)
+        manage(database, 'migrate')
+        with sqlite3.connect(database) as connection:
+            indexes = {
+                name for name, in connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index'"
+                )
+            }
+        for index in (
+            'title_name_idx', 'title_year_name_idx', 'title_category_name_idx',
+            'genretitle_genre_title_idx', 'review_title_pub_date_idx',
+            'comment_review_pub_date_idx',
+        ):
+            assert index in indexes, (
+                f'Проверьте, что миграции создают индекс {index} '
+                'в существующей базе'
+            )
+        manage(database, 'makemigrations', '--check', '--dry-run')